@@ -1,23 +1,147 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, DESCENDING
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
+import base64
+import json
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize MongoDB connection with error handling
 mongo_uri = os.getenv("MONGO_URI")
 db_name = os.getenv("DB_NAME")
 
-if not mongo_uri or not db_name:
-    print("Warning: MongoDB credentials not found. Database operations will not work.")
-    client = None
-    db = None
-else:
+# The connection is not opened at import time. Applications that already own
+# a MongoClient (the FastAPI backend) hand it over with bind(); standalone
+# scripts get a client of their own on first use via connect().
+client = None
+db = None
+
+def bind(mongo_client, database):
+    """
+    Use an existing client and database instead of opening a new connection pool.
+    
+    Args:
+        mongo_client (MongoClient): Client owned by the caller
+        database (Database): Database handle on that client
+    """
+    global client, db
+    client = mongo_client
+    db = database
+
+def connect():
+    """
+    Open a client from MONGO_URI/DB_NAME unless one is already bound.
+    
+    Returns:
+        Database or None: The database handle, or None if not configured
+    """
+    global client, db
+    if db is not None:
+        return db
+    if not mongo_uri or not db_name:
+        print("Warning: MongoDB credentials not found. Database operations will not work.")
+        return None
     client = MongoClient(mongo_uri)
     db = client[db_name]
+    return db
+
+def _db():
+    database = connect()
+    if database is None:
+        raise Exception("Database not configured")
+    return database
+
+# Session listings are paged newest first on (created_at, _id); _id breaks ties
+# between sessions created in the same millisecond, so no row is skipped or
+# repeated between pages.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+STREAM_BATCH_SIZE = 500
+_PAGE_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that was not issued by this service."""
+
+def encode_cursor(session):
+    """
+    Build an opaque cursor pointing just past the given session.
+    
+    Args:
+        session (dict): Last session of a page (needs _id and created_at)
+    
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = json.dumps([session["created_at"].isoformat(), str(session["_id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor from encode_cursor.
+    
+    Args:
+        cursor (str): Cursor string
+    
+    Returns:
+        tuple: (created_at, ObjectId) of the last session already returned
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, session_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), ObjectId(session_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+def _page_filter(query, cursor):
+    if not cursor:
+        return query
+    created_at, session_id = decode_cursor(cursor)
+    # The plain created_at bound keeps this a single index range scan; the
+    # $or only has to resolve ties on the boundary timestamp.
+    return {
+        **query,
+        "created_at": {"$lte": created_at},
+        "$or": [{"created_at": {"$lt": created_at}}, {"_id": {"$lt": session_id}}],
+    }
+
+def _page_projection(projection):
+    """Caller's projection (dict or list of fields), plus the fields the cursor needs."""
+    if projection is None:
+        return None
+    if not isinstance(projection, dict):
+        projection = {field: 1 for field in projection}
+    if any(value for key, value in projection.items() if key != "_id"):
+        return {**projection, "_id": 1, "created_at": 1}
+    return {key: value for key, value in projection.items() if key not in ("_id", "created_at")}
+
+def _find_page(query, limit=DEFAULT_PAGE_SIZE, cursor=None, projection=None, database=None):
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    database = database if database is not None else _db()
+    docs = list(
+        database.sessions.find(_page_filter(query, cursor), _page_projection(projection))
+        .sort(_PAGE_SORT)
+        .limit(limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    return {
+        "sessions": docs,
+        "next_cursor": encode_cursor(docs[-1]) if has_more else None,
+    }
+
+def _stream(query, projection=None, batch_size=STREAM_BATCH_SIZE):
+    # Each batch is its own short keyset query, so a long batch job never holds
+    # a server cursor open (no cursor timeouts) and can resume from any cursor.
+    cursor = None
+    while True:
+        page = _find_page(query, batch_size, cursor, projection)
+        yield from page["sessions"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
 
 def create_session(user_id, role, company, q_list):
     """
@@ -32,9 +156,6 @@ def create_session(user_id, role, company, q_list):
     Returns:
         str: The ID of the created session
     """
-    if db is None:
-        raise Exception("Database not configured")
-    
     session = {
         "user_id": user_id,
         "type": "recruiter_convo",
@@ -47,7 +168,7 @@ def create_session(user_id, role, company, q_list):
         "created_at": datetime.utcnow(),
         "completed_at": None
     }
-    result = db.sessions.insert_one(session)
+    result = _db().sessions.insert_one(session)
     return str(result.inserted_id)
 
 def get_next_question(session_id):
@@ -60,7 +181,7 @@ def get_next_question(session_id):
     Returns:
         dict or None: The next unanswered question, or None if all questions are answered
     """
-    session = db.sessions.find_one({"_id": ObjectId(session_id)})
+    session = _db().sessions.find_one({"_id": ObjectId(session_id)})
     if session is None:
         return None
     
@@ -78,7 +199,7 @@ def save_answer(session_id, index, answer):
         index (int): Index of the question being answered
         answer (str): User's answer
     """
-    db.sessions.update_one(
+    _db().sessions.update_one(
         {"_id": ObjectId(session_id), "questions.index": index},
         {"$set": {"questions.$.answer": answer}}
     )
@@ -92,7 +213,7 @@ def save_followup(session_id, question, answer):
         question (str): Follow-up question
         answer (str): User's answer to follow-up
     """
-    db.sessions.update_one(
+    _db().sessions.update_one(
         {"_id": ObjectId(session_id)},
         {"$set": {"follow_up": {"question": question, "answer": answer}}}
     )
@@ -105,7 +226,7 @@ def save_feedback(session_id, feedback):
         session_id (str): ID of the session
         feedback (dict): Feedback containing score, strengths, improvements, and comment
     """
-    db.sessions.update_one(
+    _db().sessions.update_one(
         {"_id": ObjectId(session_id)},
         {"$set": {"summary": feedback, "status": "completed", "completed_at": datetime.utcnow()}}
     )
@@ -120,19 +241,37 @@ def get_session(session_id):
     Returns:
         dict or None: The session data, or None if not found
     """
-    return db.sessions.find_one({"_id": ObjectId(session_id)})
+    return _db().sessions.find_one({"_id": ObjectId(session_id)})
 
-def get_user_sessions(user_id):
+def get_user_sessions(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None, projection=None, database=None):
     """
-    Get all sessions for a specific user.
+    Get one page of a user's sessions, newest first.
     
     Args:
         user_id (str): ID of the user
+        limit (int): Page size (capped at MAX_PAGE_SIZE)
+        cursor (str): next_cursor from the previous page, or None for the first page
+        projection (dict|list): Fields to return (all fields if None)
+        database (Database): Database handle to use instead of the module's own
     
     Returns:
-        list: List of sessions for the user
+        dict: {"sessions": [...], "next_cursor": str or None when this is the last page}
     """
-    return list(db.sessions.find({"user_id": user_id}))
+    return _find_page({"user_id": user_id}, limit, cursor, projection, database)
+
+def iter_user_sessions(user_id, projection=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream all of a user's sessions, newest first, in batches (for batch jobs).
+    
+    Args:
+        user_id (str): ID of the user
+        projection (dict|list): Fields to return (all fields if None)
+        batch_size (int): Sessions fetched per query
+    
+    Yields:
+        dict: One session at a time
+    """
+    return _stream({"user_id": user_id}, projection, batch_size)
 
 def create_user(name, email):
     """
@@ -150,7 +289,7 @@ def create_user(name, email):
         "email": email,
         "created_at": datetime.utcnow()
     }
-    result = db.users.insert_one(user)
+    result = _db().users.insert_one(user)
     return str(result.inserted_id)
 
 def get_user(user_id):
@@ -163,7 +302,7 @@ def get_user(user_id):
     Returns:
         dict or None: User data, or None if not found
     """
-    return db.users.find_one({"_id": ObjectId(user_id)})
+    return _db().users.find_one({"_id": ObjectId(user_id)})
 
 def update_question_feedback(session_id, question_index, feedback):
     """
@@ -174,25 +313,53 @@ def update_question_feedback(session_id, question_index, feedback):
         question_index (int): Index of the question
         feedback (dict): Feedback for the question
     """
-    db.sessions.update_one(
+    _db().sessions.update_one(
         {"_id": ObjectId(session_id), "questions.index": question_index},
         {"$set": {"questions.$.feedback": feedback}}
     )
 
-def get_active_sessions():
+def get_active_sessions(limit=DEFAULT_PAGE_SIZE, cursor=None, projection=None):
     """
-    Get all active sessions.
+    Get one page of active sessions, newest first.
+    
+    Args:
+        limit (int): Page size (capped at MAX_PAGE_SIZE)
+        cursor (str): next_cursor from the previous page, or None for the first page
+        projection (dict|list): Fields to return (all fields if None)
     
     Returns:
-        list: List of active sessions
+        dict: {"sessions": [...], "next_cursor": str or None}
     """
-    return list(db.sessions.find({"status": "active"}))
+    return _find_page({"status": "active"}, limit, cursor, projection)
 
-def get_completed_sessions():
+def get_completed_sessions(limit=DEFAULT_PAGE_SIZE, cursor=None, projection=None):
     """
-    Get all completed sessions.
+    Get one page of completed sessions, newest first.
+    
+    Args:
+        limit (int): Page size (capped at MAX_PAGE_SIZE)
+        cursor (str): next_cursor from the previous page, or None for the first page
+        projection (dict|list): Fields to return (all fields if None)
     
     Returns:
-        list: List of completed sessions
+        dict: {"sessions": [...], "next_cursor": str or None}
+    """
+    return _find_page({"status": "completed"}, limit, cursor, projection)
+
+def iter_active_sessions(projection=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream all active sessions in batches (for batch jobs).
+    
+    Yields:
+        dict: One session at a time
+    """
+    return _stream({"status": "active"}, projection, batch_size)
+
+def iter_completed_sessions(projection=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream all completed sessions in batches (for batch jobs).
+    
+    Yields:
+        dict: One session at a time
     """
-    return list(db.sessions.find({"status": "completed"}))
+    return _stream({"status": "completed"}, projection, batch_size)
@@ -5,7 +5,7 @@ This script tests all database functions to ensure proper connection and functio
 """
 
 from db_service import (
-    create_user, get_user, create_session, get_session, 
+    connect, create_user, get_user, create_session, get_session, 
     get_next_question, save_answer, save_feedback, 
     get_user_sessions, update_question_feedback
 )
@@ -16,6 +16,7 @@ def test_database_connection():
     """Test basic database connection."""
     print("🔍 Testing database connection...")
     try:
+        connect()
         from db_service import client
         # Test connection by pinging the database
         client.admin.command('ping')
@@ -138,8 +139,9 @@ def test_user_sessions(user_id):
     """Test retrieving user sessions."""
     print("\n📊 Testing user sessions retrieval...")
     try:
-        sessions = get_user_sessions(user_id)
-        print(f"✅ Found {len(sessions)} sessions for user")
+        page = get_user_sessions(user_id, projection=["role", "company", "status"])
+        sessions = page["sessions"]
+        print(f"✅ Found {len(sessions)} sessions for user (more: {page['next_cursor'] is not None})")
         
         for i, session in enumerate(sessions):
             print(f"   Session {i+1}: {session['role']} at {session['company']} ({session['status']})")
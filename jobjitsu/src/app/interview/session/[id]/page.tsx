@@ -16,6 +16,14 @@ import { useSession } from "@supabase/auth-helpers-react";
 import { Mic, MicOff } from "lucide-react"; 
 import { useSpeechRecognition } from "@/hooks/useSpeechRecognition";
 
+// Utility to play audio streamed from a backend audio endpoint
+function playAudioFromUrl(path: string) {
+  const audio = new Audio(apiService.resolveAudioUrl(path));
+  audio.play().catch((err) => {
+    console.error("Audio playback error:", err);
+  });
+}
+
 // Utility to play audio from base64 string
 function playAudioFromBase64(base64String: string) {
   const audioSrc = `data:audio/mp3;base64,${base64String}`;
@@ -32,13 +40,13 @@ type Message = {
   feedback?: any;
 };
 
-// Add type for nextQuestion to include audio_b64
+// Add type for nextQuestion to include audio_url
 type NextQuestion = {
   question_number: number;
   question: string;
   is_last_question: boolean;
   is_complete?: boolean;
-  audio_b64?: string;
+  audio_url?: string;
 };
 
 async function fetchNextQuestion(id: string, session: any) {
@@ -52,7 +60,7 @@ async function submitAnswer({ id, questionNumber, userAnswerText, session }: { i
 
 type FollowupResult = {
   follow_up: string;
-  audio_b64?: string;
+  audio_url?: string;
 };
 
 async function fetchFollowup(id: string, session: any): Promise<FollowupResult> {
@@ -123,11 +131,11 @@ export default function SessionPage({ params }: { params: Promise<{ id: string }
         console.log("All 3 questions completed, asking follow-up question...");
         setIsFollowupPhase(true);
         try {
-          const { follow_up, audio_b64 } = await fetchFollowup(id, session);
-          console.log("Follow-up received:", follow_up, !!audio_b64 ? "with audio" : "no audio");
+          const { follow_up, audio_url } = await fetchFollowup(id, session);
+          console.log("Follow-up received:", follow_up, !!audio_url ? "with audio" : "no audio");
           setMessages((m) => [...m, { role: "recruiter", text: follow_up, voiceUrl: null }]);
-          if (audio_b64) {
-            playAudioFromBase64(audio_b64);
+          if (audio_url) {
+            playAudioFromUrl(audio_url);
           }
         } catch (error) {
           console.error("Error fetching followup:", error);
@@ -190,11 +198,11 @@ export default function SessionPage({ params }: { params: Promise<{ id: string }
   }, [nextQuestion, questionCount]);
 
   useEffect(() => {
-    if (nextQuestion && nextQuestion.audio_b64) {
+    if (nextQuestion && nextQuestion.audio_url) {
       console.log("Playing audio for question...");
-      playAudioFromBase64(nextQuestion.audio_b64);
+      playAudioFromUrl(nextQuestion.audio_url);
     } else if (nextQuestion) {
-      console.log("No audio_b64 found in nextQuestion");
+      console.log("No audio_url found in nextQuestion");
     }
   }, [nextQuestion]);
 
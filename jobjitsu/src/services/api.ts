@@ -79,7 +79,12 @@ class ApiService {
     }
   }
 
-  async getNextQuestion(sessionId: string, session?: any): Promise<{question_number: number, question: string, is_last_question: boolean, is_complete?: boolean}> {
+  // Audio endpoints return paths like /api/session/{id}/question/1/audio
+  resolveAudioUrl(path: string): string {
+    return new URL(path, BACKEND_URL).toString();
+  }
+
+  async getNextQuestion(sessionId: string, session?: any): Promise<{question_number: number, question: string, is_last_question: boolean, is_complete?: boolean, audio_url?: string}> {
     try {
       const headers = await this.getAuthHeaders(session);
       
@@ -119,7 +124,7 @@ class ApiService {
     }
   }
 
-  async getFollowup(sessionId: string, session?: any): Promise<{ follow_up: string; audio_b64?: string }> {
+  async getFollowup(sessionId: string, session?: any): Promise<{ follow_up: string; audio_url?: string }> {
     try {
       const headers = await this.getAuthHeaders(session);
       
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: base64-in-JSON audio vs. the streaming audio endpoint.
+
+A local stub imitates ElevenLabs: the regular endpoint answers once the whole
+clip is "synthesized", the /stream endpoint sends each chunk as soon as it is
+ready. For each delivery path the script reports time to first byte the
+client could receive and the peak Python heap allocated while producing the
+response (tracemalloc).
+
+Usage: python benchmarks/bench_audio_delivery.py [--chunks 40] [--chunk-kb 8] [--chunk-delay 0.02]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubTTSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, chunks, chunk_size, chunk_delay):
+        super().__init__(("127.0.0.1", 0), StubTTSHandler)
+        self.chunks = chunks
+        self.chunk = b"\xff\xfb" + os.urandom(chunk_size - 2)
+        self.chunk_delay = chunk_delay
+
+
+class StubTTSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        if self.path.endswith("/stream"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for _ in range(server.chunks):
+                time.sleep(server.chunk_delay)
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(server.chunk), server.chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(server.chunk_delay * server.chunks)
+            body = server.chunk * server.chunks
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def base64_json(elevenlabs_service, text):
+    """The old /next path: synthesize fully, then base64 the clip into a JSON body."""
+    start = time.perf_counter()
+    audio = await elevenlabs_service.text_to_speech(text)
+    audio_b64 = base64.b64encode(audio).decode("utf-8")
+    body = json.dumps({"question": text, "audio_b64": audio_b64}).encode()
+    ttfb = time.perf_counter() - start
+    return ttfb, time.perf_counter() - start, len(body)
+
+
+async def streamed(elevenlabs_service, text):
+    """The new audio endpoint: relay upstream chunks as they arrive."""
+    start = time.perf_counter()
+    stream = await elevenlabs_service.open_speech_stream(text)
+    ttfb = None
+    total = 0
+    async for chunk in stream:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        total += len(chunk)
+    return ttfb, time.perf_counter() - start, total
+
+
+async def measure(label, func, elevenlabs_service, text):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    ttfb, total, size = await func(elevenlabs_service, text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<18} ttfb={ttfb * 1000:8.1f}ms  total={total * 1000:8.1f}ms  bytes_sent={size:9d}  peak_heap={peak / 1024:8.1f}KiB")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-kb", type=int, default=8)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = StubTTSServer(args.chunks, args.chunk_kb * 1024, args.chunk_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["ELEVENLABS_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+    os.environ["ELEVENLABS_HTTP2"] = "false"
+    os.environ["TTS_CACHE_ENABLED"] = "false"
+    os.chdir(tempfile.mkdtemp())  # keep any debug output out of the repo
+    from services import elevenlabs_service
+
+    await elevenlabs_service.start_client()
+    text = "Tell me about a project you are proud of."
+    # Warm the connection pool so both paths reuse a connection
+    await streamed(elevenlabs_service, text)
+
+    print(f"clip: {args.chunks} x {args.chunk_kb}KiB chunks, {args.chunk_delay * 1000:.0f}ms per chunk")
+    await measure("base64 in JSON", base64_json, elevenlabs_service, text)
+    await measure("streaming", streamed, elevenlabs_service, text)
+    await elevenlabs_service.close_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: remote Supabase token check vs. local JWT verification.
+
+Signs an HS256 access token the way Supabase does and times verify_token for
+the remote get_user path (against a local stub of /auth/v1/user with
+configurable latency), a cold local signature check, and a warm cache hit.
+
+Usage: python benchmarks/bench_auth_verify.py [--iterations 2000] [--remote-latency 0.08]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SECRET = "bench-jwt-secret-with-enough-length-0123456789"
+USER_ID = "8d0f8a44-3b52-4e05-9b36-5e6e8f8b7f11"
+
+
+class StubAuthHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.08
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = json.dumps({
+            "id": USER_ID, "aud": "authenticated", "role": "authenticated",
+            "email": "bench@example.com", "app_metadata": {}, "user_metadata": {},
+            "created_at": "2024-01-01T00:00:00Z",
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_token(jwt, exp_offset=3600, sub=USER_ID):
+    now = int(time.time())
+    return jwt.encode({
+        "sub": sub, "aud": "authenticated", "role": "authenticated",
+        "email": "bench@example.com", "iat": now, "exp": now + exp_offset,
+    }, SECRET, algorithm="HS256")
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1e6
+    p99 = samples[max(int(len(samples) * 0.99) - 1, 0)] * 1e6
+    print(f"{label:<22} n={len(samples):5d}  p50={p50:10.1f}us  p99={p99:10.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--remote-iterations", type=int, default=20)
+    parser.add_argument("--remote-latency", type=float, default=0.08)
+    args = parser.parse_args()
+
+    StubAuthHandler.latency = args.remote_latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAuthHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    from jose import jwt
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    # supabase-py only accepts JWT-shaped API keys
+    os.environ["SUPABASE_SERVICE_KEY"] = jwt.encode({"role": "service_role"}, SECRET, algorithm="HS256")
+    os.environ["SUPABASE_JWT_SECRET"] = SECRET
+    from services import auth_service
+
+    remote = []
+    for i in range(args.remote_iterations):
+        token = make_token(jwt, sub=f"{USER_ID[:-4]}{i:04d}")
+        start = time.perf_counter()
+        assert auth_service._verify_remotely(token) is not None
+        remote.append(time.perf_counter() - start)
+
+    cold = []
+    for i in range(args.iterations):
+        token = make_token(jwt, exp_offset=3600 + i)
+        start = time.perf_counter()
+        assert auth_service.verify_token(token) is not None
+        cold.append(time.perf_counter() - start)
+
+    token = make_token(jwt)
+    auth_service.verify_token(token)
+    warm = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        assert auth_service.verify_token(token) is not None
+        warm.append(time.perf_counter() - start)
+
+    report("remote get_user", remote)
+    report("local verify (cold)", cold)
+    report("local verify (cached)", warm)
+    print(auth_service.token_cache_stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to first feedback text, POST /feedback vs. /feedback/stream.
+
+Serves the real app with uvicorn on a local port (httpx's in-process ASGI
+transport buffers whole responses, which would hide streaming), backed by an
+in-memory mongomock database and a fake Gemini model. The fake produces the
+first chunk after --first-token seconds and then --chunks chunks every
+--chunk-interval seconds, as a streamed call, or returns the same text all at
+once after the full generation time, as a regular call. Reports p50 time to
+the first bit of feedback text the user can read and time to the final score.
+
+Usage: python benchmarks/bench_feedback_ttft.py [--runs 5] [--first-token 0.6] [--chunks 40] [--chunk-interval 0.08]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+import uvicorn
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from main import app
+from models.session import session_schema
+from services import answer_grading, gemini_service
+from services.auth_guard import get_current_user
+from services.database import get_async_db
+
+WORDS = ("You communicated your project work clearly and gave concrete examples of the impact you had. "
+         "To improve, structure answers with situation, task, action and result, and quantify outcomes. ").split()
+
+
+def make_fake_model(first_token, chunks, chunk_interval):
+    words_per_chunk = 6
+    text = " ".join(WORDS[i % len(WORDS)] for i in range(chunks * words_per_chunk))
+
+    class _Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class FakeGenerativeModel:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, prompt, stream=False):
+            if not stream:
+                time.sleep(first_token + chunks * chunk_interval)
+                return _Chunk(json.dumps({"score": 8, "description": text}))
+            return self._stream()
+
+        def _stream(self):
+            time.sleep(first_token)
+            words = text.split()
+            for i in range(0, len(words), words_per_chunk):
+                yield _Chunk(" ".join(words[i:i + words_per_chunk]) + " ")
+                time.sleep(chunk_interval)
+            yield _Chunk("\nScore: 8/10")
+
+    return FakeGenerativeModel
+
+
+async def new_session(db):
+    session = session_schema()
+    session.update({"user_id": "bench-user", "role": "Software Engineer", "company": "Google",
+                    "created_at": datetime.utcnow(), "status": "in_progress"})
+    session["questions"] = {}
+    for i in (1, 2, 3):
+        session["questions"][f"question{i}"] = f"Question {i}?"
+        session["questions"][f"answer{i}"] = f"A thoughtful answer to question {i}."
+    return str((await db.sessions.insert_one(session)).inserted_id)
+
+
+async def blocking(client, session_id):
+    start = time.perf_counter()
+    response = await client.post(f"/api/session/{session_id}/feedback")
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+async def streamed(client, session_id):
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", f"/api/session/{session_id}/feedback/stream") as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event == "delta" and first is None:
+                first = time.perf_counter() - start
+            elif line.startswith("data: ") and event == "done":
+                return first, time.perf_counter() - start
+            elif event == "error":
+                raise RuntimeError(line)
+    raise RuntimeError("stream ended without a done event")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token", type=float, default=0.6)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-interval", type=float, default=0.08)
+    args = parser.parse_args()
+
+    gemini_service.genai.GenerativeModel = make_fake_model(args.first_token, args.chunks, args.chunk_interval)
+    gemini_service.init_models()
+    # Compare against the single whole-transcript call, which is what the stream replaces
+    answer_grading.INCREMENTAL_FEEDBACK_ENABLED = False
+    db = AsyncMongoMockClient().bench_feedback
+    app.dependency_overrides[get_async_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user=SimpleNamespace(id="bench-user"))
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    print(f"fake Gemini: first chunk after {args.first_token}s, {args.chunks} chunks every {args.chunk_interval}s; "
+          f"{args.runs} runs each")
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        for label, call in (("POST /feedback", blocking), ("POST /feedback/stream (SSE)", streamed)):
+            firsts, totals = [], []
+            for _ in range(args.runs):
+                session_id = await new_session(db)
+                first, total = await call(client, session_id)
+                firsts.append(first)
+                totals.append(total)
+                stored = await db.sessions.find_one({"_id": ObjectId(session_id)})
+                assert stored["feedback"]["score"] == 8, f"feedback was not persisted: {stored['feedback']}"
+            print(f"{label:<30} first text p50={statistics.median(firsts) * 1000:7.0f}ms  "
+                  f"score p50={statistics.median(totals) * 1000:7.0f}ms")
+
+    server.should_exit = True
+    await serving
+    app.dependency_overrides.clear()
+    gemini_service.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
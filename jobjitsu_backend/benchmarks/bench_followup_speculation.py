@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: how long the user waits for the follow-up, with and without speculation.
+
+Walks interviews through the real endpoints in-process (mongomock database,
+fake Gemini model taking --gemini-latency seconds, local stub TTS server
+taking --tts-latency seconds). After the third answer the client waits
+--think-time seconds (UI transition, the user pressing "continue"), then
+calls POST /followup and fetches its audio. Reports the p50 wait for the
+follow-up text and for text plus audio, with speculation off and on.
+
+Usage: python benchmarks/bench_followup_speculation.py [--interviews 5] [--think-time 1.0]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+AUDIO = b"\xff\xfb" + os.urandom(16 * 1024)
+
+
+def start_stub_tts(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(AUDIO)))
+            self.end_headers()
+            self.wfile.write(AUDIO)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_fake_model(latency):
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    class FakeGenerativeModel:
+        calls = 0
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, prompt, **kwargs):
+            FakeGenerativeModel.calls += 1
+            time.sleep(latency)
+            if "exchange so far" in prompt:
+                return _Response(f'{{"followup_question": "What did you learn from that? ({FakeGenerativeModel.calls})"}}')
+            return _Response('{"question1": "Tell me about yourself?", "question2": "Why us?", "question3": "What are you building?"}')
+
+    return FakeGenerativeModel
+
+
+async def interview(client, think_time, n):
+    response = await client.post("/api/session/start", params={"role": "Engineer", "company": f"Company {n}"})
+    session_id = response.json()["session_id"]
+    for i in (1, 2, 3):
+        response = await client.post(f"/api/session/{session_id}/answer",
+                                     params={"question_number": i, "answer": f"Answer {i} of interview {n}"})
+        assert response.status_code == 200, response.text
+    await asyncio.sleep(think_time)
+
+    start = time.perf_counter()
+    response = await client.post(f"/api/session/{session_id}/followup")
+    assert response.status_code == 200, response.text
+    text_wait = time.perf_counter() - start
+    audio = await client.get(response.json()["audio_url"])
+    assert audio.status_code == 200 and audio.content, audio.text
+    return text_wait, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interviews", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=1.0)
+    parser.add_argument("--gemini-latency", type=float, default=1.5)
+    parser.add_argument("--tts-latency", type=float, default=0.8)
+    args = parser.parse_args()
+
+    stub = start_stub_tts(args.tts_latency)
+    os.environ["ELEVENLABS_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+    os.environ["ELEVENLABS_HTTP2"] = "false"
+    os.environ["ELEVENLABS_API_KEY"] = "bench"
+    os.environ["TTS_CACHE_DIR"] = ""
+
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+    from main import app
+    import routers.session as session_router
+    from services import followup_speculation, gemini_service, question_bank
+    from services.auth_guard import get_current_user
+    from services.database import get_async_db
+
+    gemini_service.genai.GenerativeModel = make_fake_model(args.gemini_latency)
+    gemini_service.init_models()
+    question_bank.QUESTION_BANK_ENABLED = False
+    session_router.prefetch_question_audio = lambda *a: None
+    db = AsyncMongoMockClient().bench_followup
+    app.dependency_overrides[get_async_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user=SimpleNamespace(id="bench-user"))
+
+    print(f"Gemini {args.gemini_latency}s, TTS {args.tts_latency}s, {args.think_time}s between the last answer "
+          f"and /followup, {args.interviews} interviews each")
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        for enabled in (False, True):
+            followup_speculation.FOLLOWUP_SPECULATION_ENABLED = enabled
+            followup_speculation.stats.update(dict.fromkeys(followup_speculation.stats, 0))
+            waits = [await interview(client, args.think_time, n + 100 * enabled) for n in range(args.interviews)]
+            label = "speculation on (after)" if enabled else "speculation off (before)"
+            print(f"{label:<26} follow-up text p50={statistics.median(w[0] for w in waits) * 1000:7.0f}ms  "
+                  f"text + audio p50={statistics.median(w[1] for w in waits) * 1000:7.0f}ms")
+    print(f"speculation stats (on): {followup_speculation.stats}")
+
+    app.dependency_overrides.clear()
+    gemini_service.shutdown_executor()
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
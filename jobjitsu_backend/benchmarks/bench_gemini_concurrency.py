@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blocking vs. executor-backed Gemini calls.
+
+Starts a local fake model server that sleeps for a fixed latency before
+answering, points gemini_service at it, and fires N concurrent calls through
+both the old synchronous path and the new async path. Reports wall time, the
+peak number of requests the fake server saw in flight, and the worst event
+loop stall observed by a heartbeat task.
+
+Usage: python benchmarks/bench_gemini_concurrency.py [--calls 16] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import gemini_service
+
+
+class FakeModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency):
+        super().__init__(("127.0.0.1", 0), FakeModelHandler)
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        time.sleep(server.latency)
+        with server.lock:
+            server.in_flight -= 1
+        body = json.dumps({"text": json.dumps({
+            "question1": "Tell me about yourself?", "answer1": "",
+            "question2": "Why us?", "answer2": "",
+            "question3": "What are you building?", "answer3": ""
+        })}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_fake_model(url):
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    class FakeGenerativeModel:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, prompt, **kwargs):
+            req = urllib.request.Request(url, data=json.dumps({"prompt": prompt}).encode(), method="POST")
+            with urllib.request.urlopen(req) as resp:
+                return _Response(json.loads(resp.read())["text"])
+
+    return FakeGenerativeModel
+
+
+async def heartbeat(stop, interval=0.01):
+    """Track the longest gap between scheduled wakeups (event loop stall)."""
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst
+
+
+async def run(label, call, calls, server):
+    server.peak_in_flight = 0
+    stop = asyncio.Event()
+    hb = asyncio.create_task(heartbeat(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall = await hb
+    print(f"{label:<28} wall={elapsed:6.2f}s  peak_in_flight={server.peak_in_flight:3d}  max_loop_stall={stall * 1000:7.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = FakeModelServer(args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    gemini_service.genai.GenerativeModel = make_fake_model(f"http://127.0.0.1:{server.server_port}/generate")
+
+    print(f"{args.calls} calls, {args.latency}s fake model latency, GEMINI_MAX_CONCURRENCY={gemini_service.GEMINI_MAX_CONCURRENCY}")
+
+    async def blocking_call():
+        # What the handlers did before: a sync call made straight from async code.
+        gemini_service.generate_questions("Software Engineer", "Google")
+
+    async def async_call():
+        await gemini_service.generate_questions_async("Software Engineer", "Google")
+
+    await run("sync call in async handler", blocking_call, args.calls, server)
+    await run("generate_questions_async", async_call, args.calls, server)
+
+    server.shutdown()
+    gemini_service.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parsing Gemini responses with the structured-output fast path vs.
+the regex repair chain the handlers used to run on every response.
+
+Times both on the same representative feedback and questions payloads
+(no network involved) and prints the per-call CPU cost.
+
+Usage: python benchmarks/bench_gemini_parsing.py [--iterations 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import gemini_service
+
+QUESTIONS = json.dumps({
+    "question1": "Hi, I'm Sarah from Google! Tell me a bit about yourself?",
+    "question2": "What draws you to software engineering at Google?",
+    "question3": "Are you working on any projects related to distributed systems?",
+})
+FEEDBACK = json.dumps({
+    "score": 7,
+    "description": "Overall you communicated clearly and showed genuine interest. " * 20,
+})
+
+
+def timed(label, func, text, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    per_call = (time.perf_counter() - start) / iterations
+    print(f"{label:<34} {per_call * 1e6:8.1f}us/call")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    timed("questions: structured fast path", lambda t: gemini_service._questions_from(json.loads(t)), QUESTIONS, args.iterations)
+    timed("questions: regex repair chain", gemini_service._repair_questions, QUESTIONS, args.iterations)
+    timed("feedback: structured fast path", lambda t: gemini_service._feedback_from(json.loads(t)), FEEDBACK, args.iterations)
+    timed("feedback: regex repair chain", gemini_service._repair_feedback, FEEDBACK, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
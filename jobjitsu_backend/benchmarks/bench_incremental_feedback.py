@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: POST /feedback latency with one whole-transcript call vs. incremental grading.
+
+Walks interviews through the real endpoints in-process (mongomock database,
+fake Gemini model). Each fake call sleeps for a time set per prompt type:
+--feedback-latency for the single whole-transcript feedback call (long
+output), --grade-latency for grading one answer and --summary-latency for
+the short summary. The client pauses --answer-interval seconds between
+answers (the user speaking) and calls /feedback right after the follow-up
+answer, so that answer's grade is always still in flight. Reports p50
+/feedback latency with incremental grading off and on.
+
+Usage: python benchmarks/bench_incremental_feedback.py [--interviews 5] [--answer-interval 1.0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from main import app
+import routers.session as session_router
+from services import answer_grading, followup_speculation, gemini_service, question_bank
+from services.auth_guard import get_current_user
+from services.database import get_async_db
+
+
+def make_fake_model(latencies):
+    responses = {
+        "questions": {"question1": "Tell me about yourself?", "question2": "Why us?", "question3": "What are you building?"},
+        "followup": {"followup_question": "What did you learn from that?"},
+        "feedback": {"score": 7, "description": "Overall good. " * 80},
+        "grade": {"score": 7, "description": "Clear and specific; add a measurable result."},
+        "feedback_summary": {"summary": "A confident conversation with concrete examples."},
+    }
+    kinds = {spec.system_instruction: kind for kind, spec in gemini_service.PROMPTS.items()}
+
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    class FakeGenerativeModel:
+        def __init__(self, model_name, system_instruction=None, **kwargs):
+            self.kind = kinds[system_instruction]
+
+        def generate_content(self, prompt, **kwargs):
+            time.sleep(latencies.get(self.kind, 0.5))
+            return _Response(json.dumps(responses.get(self.kind, {})))
+
+    return FakeGenerativeModel
+
+
+async def interview(client, db, answer_interval, n):
+    response = await client.post("/api/session/start", params={"role": "Engineer", "company": f"Company {n}"})
+    session_id = response.json()["session_id"]
+    for i in (1, 2, 3):
+        await asyncio.sleep(answer_interval)
+        response = await client.post(f"/api/session/{session_id}/answer",
+                                     params={"question_number": i, "answer": f"Answer {i} of interview {n}"})
+        assert response.status_code == 200, response.text
+    response = await client.post(f"/api/session/{session_id}/followup")
+    assert response.status_code == 200, response.text
+    await asyncio.sleep(answer_interval)
+    response = await client.post(f"/api/session/{session_id}/followup-answer", params={"answer": "I learned a lot."})
+    assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    response = await client.post(f"/api/session/{session_id}/feedback")
+    assert response.status_code == 200, response.text
+    elapsed = time.perf_counter() - start
+    stored = await db.sessions.find_one({"_id": ObjectId(session_id)})
+    graded = sum(1 for i in (1, 2, 3) if "feedback" + str(i) in stored["questions"])
+    return elapsed, graded
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interviews", type=int, default=5)
+    parser.add_argument("--answer-interval", type=float, default=1.0)
+    parser.add_argument("--feedback-latency", type=float, default=4.0)
+    parser.add_argument("--grade-latency", type=float, default=1.2)
+    parser.add_argument("--summary-latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    gemini_service.genai.GenerativeModel = make_fake_model({
+        "questions": 0.5, "followup": 0.5, "feedback": args.feedback_latency,
+        "grade": args.grade_latency, "feedback_summary": args.summary_latency,
+    })
+    gemini_service.init_models()
+    question_bank.QUESTION_BANK_ENABLED = False
+    followup_speculation.FOLLOWUP_SPECULATION_ENABLED = False
+    session_router.prefetch_question_audio = lambda *a: None
+    db = AsyncMongoMockClient().bench_incremental_feedback
+    app.dependency_overrides[get_async_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user=SimpleNamespace(id="bench-user"))
+
+    print(f"fake Gemini: whole-transcript feedback {args.feedback_latency}s, grade {args.grade_latency}s, "
+          f"summary {args.summary_latency}s; {args.answer_interval}s between answers, {args.interviews} interviews each")
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        for enabled in (False, True):
+            answer_grading.INCREMENTAL_FEEDBACK_ENABLED = enabled
+            answer_grading.stats.update(dict.fromkeys(answer_grading.stats, 0))
+            results = [await interview(client, db, args.answer_interval, n + 100 * enabled) for n in range(args.interviews)]
+            label = "incremental on (after)" if enabled else "one call (before)"
+            print(f"{label:<24} /feedback p50={statistics.median(r[0] for r in results) * 1000:7.0f}ms  "
+                  f"questions graded before /feedback: {min(r[1] for r in results)}/3")
+    print(f"grading stats (on): {answer_grading.stats}")
+
+    app.dependency_overrides.clear()
+    gemini_service.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
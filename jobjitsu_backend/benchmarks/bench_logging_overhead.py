@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request logging overhead, print() vs. the queued logging setup.
+
+Replays the log statements one /session/start request used to make (every
+print, including the dir(current_user) and full session document dumps)
+against the calls that replaced them, with stdout pointed at a real file.
+"after" is measured with the default INFO level (debug calls are skipped
+before any formatting) and with DEBUG enabled for routers.session; writes
+happen on the listener thread, so the request-path cost is the enqueue.
+Also times the RequestIdMiddleware on a trivial ASGI app.
+
+Usage: python benchmarks/bench_logging_overhead.py [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import logging_setup
+from models.session import session_schema
+
+log = logging.getLogger("routers.session")
+
+
+def fake_request():
+    current_user = SimpleNamespace(user=SimpleNamespace(id="5f0c6c9e-user", email="user@example.com",
+                                                        app_metadata={"provider": "google"}))
+    session = session_schema()
+    session.update({"user_id": current_user.user.id, "role": "Software Engineer", "company": "Google",
+                    "created_at": datetime.utcnow()})
+    session["questions"] = {
+        "question1": "Tell me about a time you had to debug a production incident under pressure." * 2, "answer1": "",
+        "question2": "How would you design a rate limiter for a public API used by millions of clients?" * 2, "answer2": "",
+        "question3": "Describe a project where you had to balance technical debt against delivery dates." * 2, "answer3": "",
+    }
+    return current_user, session, "6650f0c2a1b2c3d4e5f60718"
+
+
+def before(current_user, new_session, session_id):
+    user_id = current_user.user.id
+    print(f"Starting session for user: {current_user}")
+    print(f"Current user object: {current_user}")
+    print(f"Current user type: {type(current_user)}")
+    print(f"Current user attributes: {dir(current_user) if hasattr(current_user, '__dict__') else 'No attributes'}")
+    print(f"Found user ID via current_user.user.id: {user_id}")
+    print(f"Session being created with user_id: {user_id}")
+    print(f"Questions: {new_session['questions']}")
+    print(f"New session: {new_session}")
+    print(f"First question text: {new_session['questions']['question1']}")
+    print(f"About to insert session to database: {new_session}")
+    print(f"Session inserted with ID: {session_id} for user_id: {user_id}")
+
+
+def after(current_user, new_session, session_id):
+    log.debug("Starting session for user: %s", current_user)
+    log.debug("Questions: %s", new_session["questions"])
+    log.info("Session %s started for user %s (%s / %s)", session_id, current_user.user.id,
+             new_session["company"], new_session["role"])
+
+
+def time_per_call(func, args, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        func(*args)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def time_middleware(requests):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/health", "headers": []}
+    results = {}
+    for label, handler in (("no middleware", app), ("RequestIdMiddleware", logging_setup.RequestIdMiddleware(app))):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await handler(dict(scope), receive, send)
+        results[label] = (time.perf_counter() - start) / requests * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    request = fake_request()
+
+    real_stdout = sys.stdout
+    with tempfile.TemporaryFile("w") as sink:
+        sys.stdout = sink
+        try:
+            print_us = time_per_call(before, request, args.requests)
+            logging_setup.configure_logging(stream=sink)
+            info_us = time_per_call(after, request, args.requests)
+            logging.getLogger("routers.session").setLevel(logging.DEBUG)
+            debug_us = time_per_call(after, request, args.requests)
+            logging_setup.shutdown_logging()
+        finally:
+            sys.stdout = real_stdout
+        written = sink.tell()
+    middleware = asyncio.run(time_middleware(args.requests))
+
+    print(f"{args.requests} simulated /session/start requests ({written / 1e6:.1f} MB of log output)")
+    print(f"{'before: print()':<34} {print_us:8.1f} us/request")
+    print(f"{'after: logging, INFO (default)':<34} {info_us:8.1f} us/request")
+    print(f"{'after: logging, DEBUG enabled':<34} {debug_us:8.1f} us/request")
+    for label, us in middleware.items():
+        print(f"{'ASGI ' + label:<34} {us:8.1f} us/request")
+    print(f"records dropped: {logging_setup.stats['dropped']}")
+
+
+if __name__ == "__main__":
+    main()
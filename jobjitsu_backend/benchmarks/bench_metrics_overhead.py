@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of the /metrics instrumentation on the hot path.
+
+Times the primitives (counter increment, histogram observation, an
+observe_upstream block) on one thread and on 8 threads at once, then the
+MetricsMiddleware on a trivial ASGI app routed against the real app's route
+table (the route template lookup included), and one /metrics render.
+
+Usage: python benchmarks/bench_metrics_overhead.py [--iterations 200000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from main import app
+from services import metrics
+
+
+def per_call_ns(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def threaded(func, iterations, threads=8):
+    """Run func from several threads at once; returns ns per call and whether no update was lost."""
+    counter = metrics.Counter("bench_threaded_total", "threaded check").labels()
+    barrier = threading.Barrier(threads)
+
+    def work():
+        barrier.wait()
+        for _ in range(iterations):
+            func()
+            counter.inc()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * threads) * 1e9, counter.totals()[0] == iterations * threads
+
+
+async def time_middleware(requests):
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scopes = {
+        "first route": {"type": "http", "method": "GET", "path": "/api/auth/me", "headers": []},
+        "session route": {"type": "http", "method": "POST", "path": "/api/session/6650f0c2a1b2c3d4e5f60718/answer", "headers": []},
+    }
+    results = {}
+    for label, scope in scopes.items():
+        for name, handler in (("no middleware", endpoint), ("MetricsMiddleware", metrics.MetricsMiddleware(endpoint, app.routes))):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await handler(dict(scope), receive, send)
+            results[f"{name}, {label}"] = (time.perf_counter() - start) / requests * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    counter = metrics.upstream_errors.labels("bench", "op")
+    histogram = metrics.upstream_duration.labels("bench", "op")
+
+    def upstream_block():
+        with metrics.observe_upstream("bench", "op"):
+            pass
+
+    print(f"{'counter inc, 1 thread':<40} {per_call_ns(counter.inc, args.iterations):8.0f} ns")
+    print(f"{'histogram observe, 1 thread':<40} {per_call_ns(lambda: histogram.observe(0.042), args.iterations):8.0f} ns")
+    print(f"{'observe_upstream block, 1 thread':<40} {per_call_ns(upstream_block, args.iterations):8.0f} ns")
+    ns, exact = threaded(lambda: histogram.observe(0.042), args.iterations // 8)
+    print(f"{'histogram observe, 8 threads':<40} {ns:8.0f} ns  (no lost updates: {exact})")
+
+    for label, us in asyncio.run(time_middleware(args.iterations // 20)).items():
+        print(f"{label:<40} {us * 1000:8.0f} ns/request")
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"{'/metrics render':<40} {(time.perf_counter() - start) * 1000:8.2f} ms ({len(text.splitlines())} lines)")
+
+
+if __name__ == "__main__":
+    main()
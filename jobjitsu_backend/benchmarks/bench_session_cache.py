@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-step interview latency with and without the session cache.
+
+Walks interviews through the real endpoints in-process against an in-memory
+mongomock database whose every collection call sleeps --mongo-rtt seconds
+(the network round trip to the cluster). Gemini, ElevenLabs and background
+work are stubbed out so only the database time is measured. Reports p50 per
+step with SESSION_CACHE_ENABLED off and on, and the cache hit rate.
+
+Usage: python benchmarks/bench_session_cache.py [--interviews 20] [--mongo-rtt 0.004]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from main import app
+import routers.session as session_router
+from services import answer_grading, question_bank, session_cache
+from services.auth_guard import get_current_user
+from services.database import get_async_db
+from services.gemini_service import InterviewQuestions, FollowUp, Feedback
+
+STEPS = ("next", "answer", "followup", "followup-answer", "feedback")
+
+
+class SlowCollection:
+    """Collection proxy that adds a fixed round-trip time to every call."""
+
+    def __init__(self, collection, rtt):
+        self._collection = collection
+        self._rtt = rtt
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr) or name in ("find", "aggregate"):
+            return attr
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(self._rtt)
+            return await attr(*args, **kwargs)
+        return call
+
+
+class SlowDatabase:
+    def __init__(self, rtt):
+        self._db = AsyncMongoMockClient().bench_session_cache
+        self.sessions = SlowCollection(self._db.sessions, rtt)
+        self.user_stats = SlowCollection(self._db.user_stats, rtt)
+        self.question_bank = SlowCollection(self._db.question_bank, rtt)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+async def _questions(role, company, coalesce=True):
+    return InterviewQuestions("Q1?", "Q2?", "Q3?")
+
+
+async def _followup(qa_pairs):
+    return FollowUp("Tell me more?")
+
+
+async def _feedback(qa_pairs):
+    return Feedback(8, "Solid answers.")
+
+
+async def interview(client, n, timings):
+    async def step(name, method, path, **params):
+        start = time.perf_counter()
+        response = await client.request(method, f"/api{path}", params=params)
+        timings[name].append(time.perf_counter() - start)
+        assert response.status_code == 200, f"{name}: {response.text}"
+        return response.json()
+
+    response = await client.post("/api/session/start", params={"role": "Engineer", "company": f"Company {n}"})
+    session_id = response.json()["session_id"]
+    for i in (1, 2, 3):
+        await step("next", "GET", f"/session/{session_id}/next")
+        await step("answer", "POST", f"/session/{session_id}/answer", question_number=i, answer=f"Answer {i}")
+    await step("followup", "POST", f"/session/{session_id}/followup")
+    await step("followup-answer", "POST", f"/session/{session_id}/followup-answer", answer="More detail")
+    await step("feedback", "POST", f"/session/{session_id}/feedback")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interviews", type=int, default=20)
+    parser.add_argument("--mongo-rtt", type=float, default=0.004)
+    args = parser.parse_args()
+
+    session_router.generate_questions_async = _questions
+    session_router.generate_followup_async = _followup
+    session_router.prefetch_question_audio = lambda *a: None
+    session_router.speculate_followup = lambda *a: None
+    session_router.grade_answer = lambda *a: None
+    session_router.grade_followup_answer = lambda *a: None
+    answer_grading.INCREMENTAL_FEEDBACK_ENABLED = False
+    answer_grading.generate_feedback_async = _feedback
+    question_bank.QUESTION_BANK_ENABLED = False
+    db = SlowDatabase(args.mongo_rtt)
+    app.dependency_overrides[get_async_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user=SimpleNamespace(id="bench-user"))
+
+    print(f"MongoDB round trip {args.mongo_rtt * 1000:.1f}ms, {args.interviews} interviews each")
+    results = {}
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        for enabled in (False, True):
+            session_cache.SESSION_CACHE_ENABLED = enabled
+            session_cache.cache.clear()
+            timings = {name: [] for name in STEPS}
+            for n in range(args.interviews):
+                await interview(client, n + 1000 * enabled, timings)
+            results[enabled] = {name: statistics.median(values) * 1000 for name, values in timings.items()}
+
+    print(f"{'step':<18}{'cache off':>11}{'cache on':>11}")
+    for name in STEPS:
+        print(f"{name:<18}{results[False][name]:9.1f}ms{results[True][name]:9.1f}ms")
+    print(f"session cache: {session_cache.cache.stats()}")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
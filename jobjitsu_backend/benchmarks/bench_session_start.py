@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: POST /session/start latency with and without the question bank.
+
+Drives the real endpoint in-process (httpx against the ASGI app) with an
+in-memory mongomock database and a fake Gemini model that takes --latency
+seconds per call. The workload is skewed like real traffic: most sessions
+hit a handful of popular (company, role) pairs, the rest are long-tail
+one-offs. Reports p50/p99 session-start latency and the total number of
+Gemini calls (request path plus background refresh), first with the bank
+disabled, then with it enabled and its refresher running in the background.
+
+Usage: python benchmarks/bench_session_start.py [--sessions 300] [--concurrency 10] [--latency 1.0]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from main import app
+import routers.session as session_router
+from services import gemini_service, question_bank
+from services.auth_guard import get_current_user
+from services.database import get_async_db
+
+POPULAR = [("Google", "Software Engineer"), ("Amazon", "Data Analyst"), ("Meta", "Product Manager"),
+           ("Microsoft", "SWE"), ("Tesla", "Mechanical Engineer")]
+
+
+def make_fake_model(latency):
+    class _Response:
+        text = '{"question1": "Tell me about yourself?", "question2": "Why us?", "question3": "What are you building?"}'
+
+    class FakeGenerativeModel:
+        calls = 0
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, prompt, **kwargs):
+            FakeGenerativeModel.calls += 1
+            time.sleep(latency)
+            return _Response()
+
+    return FakeGenerativeModel
+
+
+def workload(sessions, seed=7):
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(sessions):
+        if rng.random() < 0.85:
+            pairs.append(rng.choice(POPULAR))
+        else:
+            pairs.append((f"Startup {i}", "Engineer"))
+    return pairs
+
+
+async def run(label, pairs, concurrency, fake_model):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    start_calls = fake_model.calls
+
+    async def one(client, company, role):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/session/start", params={"role": role, "company": company})
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        await asyncio.gather(*(one(client, company, role) for company, role in pairs))
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} p50={statistics.median(latencies) * 1000:8.1f}ms  p99={p99 * 1000:8.1f}ms  "
+          f"gemini_calls={fake_model.calls - start_calls}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake_model = make_fake_model(args.latency)
+    gemini_service.genai.GenerativeModel = fake_model
+    gemini_service.init_models()
+    session_router.prefetch_question_audio = lambda *a: None
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user=SimpleNamespace(id="bench-user"))
+    pairs = workload(args.sessions)
+    print(f"{args.sessions} session starts, concurrency {args.concurrency}, {args.latency}s fake Gemini latency")
+
+    db = AsyncMongoMockClient().bench_before
+    app.dependency_overrides[get_async_db] = lambda: db
+    question_bank.QUESTION_BANK_ENABLED = False
+    await run("bank disabled (before)", pairs, args.concurrency, fake_model)
+
+    db = AsyncMongoMockClient().bench_after
+    app.dependency_overrides[get_async_db] = lambda: db
+    question_bank.QUESTION_BANK_ENABLED = True
+    # Popular pairs have been seen before; the refresher keeps them stocked.
+    for company, role in POPULAR:
+        for _ in range(question_bank.QUESTION_BANK_HOT_MIN_REQUESTS):
+            question_bank.hot_keys.record(company, role)
+    question_bank.refresher.interval = 0.5
+    await question_bank.refresher.refresh_once(question_bank.QuestionBank(db))
+    question_bank.refresher.start(db)
+    await run("bank enabled (after)", pairs, args.concurrency, fake_model)
+    await question_bank.refresher.stop()
+    print(f"bank stats: {question_bank.bank_stats()}")
+
+    app.dependency_overrides.clear()
+    gemini_service.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request httpx client vs. the shared ElevenLabs client.
+
+Runs a local stub TTS server (optionally over TLS with a throwaway
+self-signed certificate) and times sequential synthesis calls made the old
+way, with a new AsyncClient per call, against calls through the pooled client
+from elevenlabs_service.
+
+Usage: python benchmarks/bench_tts_client.py [--calls 50] [--tls]
+"""
+
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+AUDIO = b"\xff\xfb" + os.urandom(24 * 1024)
+
+
+class StubTTSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(AUDIO)))
+        self.end_headers()
+        self.wfile.write(AUDIO)
+
+    def log_message(self, *args):
+        pass
+
+
+def self_signed_context(tmpdir):
+    """Build a server SSL context from a throwaway self-signed certificate.
+
+    The certificate is also exported through SSL_CERT_FILE so httpx clients
+    trust it without any benchmark-specific client settings.
+    """
+    import datetime
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(tmpdir, "cert.pem")
+    key_path = os.path.join(tmpdir, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption()))
+    os.environ["SSL_CERT_FILE"] = cert_path
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    return ctx
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1000
+    p95 = samples[int(len(samples) * 0.95) - 1] * 1000
+    print(f"{label:<24} p50={p50:7.2f}ms  p95={p95:7.2f}ms  mean={statistics.mean(samples) * 1000:7.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--tls", action="store_true", help="serve the stub over HTTPS")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubTTSHandler)
+    server.daemon_threads = True
+    scheme = "http"
+    if args.tls:
+        server.socket = self_signed_context(tempfile.mkdtemp()).wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["ELEVENLABS_BASE_URL"] = f"{scheme}://localhost:{server.server_port}"
+    os.environ["ELEVENLABS_HTTP2"] = "false"  # the stdlib stub only speaks HTTP/1.1
+    from services import elevenlabs_service
+
+    path = f"/v1/text-to-speech/{elevenlabs_service.VOICE_ID}"
+    payload = {"text": "Tell me about yourself.", "model_id": "eleven_multilingual_v2"}
+
+    per_request = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(base_url=elevenlabs_service.ELEVENLABS_BASE_URL, timeout=30.0) as client:
+            response = await client.post(path, json=payload)
+        response.raise_for_status()
+        per_request.append(time.perf_counter() - start)
+
+    shared = []
+    client = await elevenlabs_service.start_client()
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        response = await client.post(path, json=payload)
+        response.raise_for_status()
+        shared.append(time.perf_counter() - start)
+    await elevenlabs_service.close_client()
+
+    print(f"{args.calls} sequential calls to {elevenlabs_service.ELEVENLABS_BASE_URL}, {len(AUDIO)} byte clips")
+    report("client per request", per_request)
+    report("shared pooled client", shared)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
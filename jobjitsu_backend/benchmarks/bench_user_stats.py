@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /user/stats computed in Python vs. with server-side aggregation.
+
+Seeds a user with N full-size sessions (questions, answers, feedback text)
+and times the old approach (load every session, loop in Python) against
+services.user_stats.compute_user_stats and the pre-aggregated user_stats
+point read plus the recent-sessions query, reporting latency and the peak
+Python heap used per call.
+
+Usage: python benchmarks/bench_user_stats.py [--sessions 10000] [--mongo-uri URI]
+Without --mongo-uri the in-memory mongomock stand-in is used; it evaluates
+aggregations in Python, so only a real mongod shows the server-side savings.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.user_stats import UserStatsStore, compute_user_stats, format_recent_session, format_user_stats
+
+USER_ID = "bench-heavy-user"
+
+
+async def legacy_user_stats(db, user_id):
+    """The previous implementation: every session document pulled into Python."""
+    user_sessions = await db.sessions.find({"user_id": user_id}).sort("created_at", -1).to_list(length=None)
+    scores = []
+    recent_sessions = []
+    for session in user_sessions:
+        fb = session.get('feedback')
+        if fb and isinstance(fb, dict):
+            score = fb.get('score', 0)
+            if isinstance(score, (int, float)) and score > 0:
+                scores.append(score)
+        if len(recent_sessions) < 10:
+            recent_sessions.append(format_recent_session(session))
+    return {
+        "totalSessions": len(user_sessions),
+        "averageScore": round((sum(scores) / len(scores)) if scores else 0, 1),
+        "bestScore": max(scores) if scores else 0,
+        "recentSessions": recent_sessions,
+    }
+
+
+def make_session(i, now):
+    return {
+        "user_id": USER_ID,
+        "role": random.choice(["Software Engineer", "Data Analyst", "Product Manager"]),
+        "company": random.choice(["Google", "Amazon", "Meta", "Tesla"]),
+        "questions": {
+            **{f"question{q}": "Tell me about a time you worked through a hard problem? " * 3 for q in (1, 2, 3)},
+            **{f"answer{q}": "I led a project where we rebuilt the data pipeline end to end. " * 12 for q in (1, 2, 3)},
+        },
+        "follow_up_question": "What would you do differently next time?",
+        "follow_up_answer": "I would invest earlier in monitoring and testing. " * 8,
+        "feedback": {"score": random.randint(1, 10), "description": "Overall strong answers with clear structure. " * 40},
+        "created_at": now - timedelta(minutes=i),
+    }
+
+
+async def measure(label, func, db, runs):
+    latencies = []
+    peak = 0
+    result = None
+    for _ in range(runs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = await func(db, USER_ID)
+        latencies.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{label:<26} p50={statistics.median(latencies) * 1000:9.1f}ms  peak_heap={peak / 1024 / 1024:8.2f}MiB")
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mongo-uri", default=os.getenv("LOADTEST_MONGO_URI"))
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        db = AsyncIOMotorClient(args.mongo_uri)["jobjitsu_bench_stats"]
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        db = AsyncMongoMockClient()["jobjitsu_bench_stats"]
+
+    await db.sessions.delete_many({"user_id": USER_ID})
+    await db.sessions.create_index([("user_id", 1), ("created_at", -1)])
+    now = datetime.utcnow()
+    for offset in range(0, args.sessions, 1000):
+        await db.sessions.insert_many([make_session(i, now) for i in range(offset, min(offset + 1000, args.sessions))])
+
+    print(f"user with {args.sessions} sessions, backend={args.mongo_uri or 'mongomock'}")
+    old = await measure("python loop (legacy)", legacy_user_stats, db, args.runs)
+    new = await measure("aggregation pipeline", compute_user_stats, db, args.runs)
+    assert old["totalSessions"] == new["totalSessions"]
+    assert old["averageScore"] == new["averageScore"] and old["bestScore"] == new["bestScore"]
+    assert [s["_id"] for s in old["recentSessions"]] == [s["_id"] for s in new["recentSessions"]]
+
+    store = UserStatsStore(db)
+    await store.rebuild_user(USER_ID)
+
+    async def point_read(db, user_id):
+        stats, recent = await asyncio.gather(store.get(user_id), store.recent_sessions(user_id))
+        return format_user_stats(stats, recent)
+
+    stored = await measure("user_stats + recent query", point_read, db, args.runs)
+    assert stored["totalSessions"] == old["totalSessions"] and stored["averageScore"] == old["averageScore"]
+    assert [s["_id"] for s in old["recentSessions"]] == [s["_id"] for s in stored["recentSessions"]]
+
+    if args.mongo_uri:
+        await db.sessions.delete_many({"user_id": USER_ID})
+        await db.user_stats.delete_one({"_id": USER_ID})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Load test for the async session repository.
+
+Drives N concurrent interview sessions through SessionRepository (create,
+get, three answers, follow-up, follow-up answer, feedback) and reports
+throughput, per-operation latency and the worst event loop stall. With
+--sync the same flow runs through blocking PyMongo calls made from
+coroutines, the way the handlers used to work.
+
+Uses a real server when --mongo-uri is given (e.g. a local mongod at
+mongodb://localhost:27017). Otherwise it falls back to the in-memory mongomock
+stand-in, with --rtt milliseconds of simulated network round trip added to
+every call (awaited in async mode, slept in sync mode) since mongomock itself
+never waits on I/O.
+
+Usage: python benchmarks/load_sessions.py [--sessions 200] [--mongo-uri URI] [--rtt 2] [--sync]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.session_repository import SessionRepository
+
+
+class BlockingRepository(SessionRepository):
+    """The old access pattern: sync PyMongo calls inside async handlers."""
+
+    async def create(self, session):
+        return str(self.collection.insert_one(session).inserted_id)
+
+    async def get(self, session_id, projection=None):
+        from services.session_repository import to_object_id
+        return self.collection.find_one({"_id": to_object_id(session_id)}, projection)
+
+    async def _set(self, session_id, fields):
+        from services.session_repository import to_object_id
+        return self.collection.update_one({"_id": to_object_id(session_id)}, {"$set": fields}).matched_count > 0
+
+
+class SimulatedLatency:
+    """Wrap a mongomock collection so each call costs one network round trip."""
+
+    def __init__(self, collection, rtt, blocking):
+        self._collection = collection
+        self._rtt = rtt
+        self._blocking = blocking
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+        if self._blocking:
+            def call(*args, **kwargs):
+                time.sleep(self._rtt)
+                return method(*args, **kwargs)
+        else:
+            async def call(*args, **kwargs):
+                await asyncio.sleep(self._rtt)
+                return await method(*args, **kwargs)
+        return call
+
+
+async def interview(repo, latencies):
+    async def timed(name, coro):
+        start = time.perf_counter()
+        result = await coro
+        latencies.setdefault(name, []).append(time.perf_counter() - start)
+        return result
+
+    session_id = await timed("create", repo.create({
+        "user_id": "load-test", "role": "Software Engineer", "company": "Google",
+        "questions": {f"{k}{i}": ("Question?" if k == "question" else "") for i in (1, 2, 3) for k in ("question", "answer")},
+        "created_at": datetime.utcnow(),
+    }))
+    for i in (1, 2, 3):
+        await timed("get", repo.get(session_id, {"questions": 1}))
+        await timed("save_answer", repo.save_answer(session_id, i, "An answer " * 20))
+    await timed("save_followup", repo.save_followup(session_id, "Tell me more?"))
+    await timed("save_followup_answer", repo.save_followup_answer(session_id, "Sure " * 20))
+    await timed("save_feedback", repo.save_feedback(session_id, {"score": 7, "description": "Nice " * 50}))
+
+
+async def heartbeat(stop, interval=0.005):
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst
+
+
+def make_collection(args):
+    if args.mongo_uri:
+        if args.sync:
+            from pymongo import MongoClient
+            return MongoClient(args.mongo_uri, maxPoolSize=args.pool)["jobjitsu_loadtest"].sessions
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(args.mongo_uri, maxPoolSize=args.pool)["jobjitsu_loadtest"].sessions
+    if args.sync:
+        import mongomock
+        collection = mongomock.MongoClient().jobjitsu_loadtest.sessions
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        collection = AsyncMongoMockClient().jobjitsu_loadtest.sessions
+    return SimulatedLatency(collection, args.rtt / 1000, blocking=args.sync)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--mongo-uri", default=os.getenv("LOADTEST_MONGO_URI"))
+    parser.add_argument("--pool", type=int, default=50)
+    parser.add_argument("--rtt", type=float, default=2.0, help="simulated round trip (ms) for the mongomock backend")
+    parser.add_argument("--sync", action="store_true", help="use blocking PyMongo calls (old behaviour)")
+    args = parser.parse_args()
+
+    collection = make_collection(args)
+    repo = BlockingRepository(collection) if args.sync else SessionRepository(collection)
+    latencies = {}
+
+    stop = asyncio.Event()
+    hb = asyncio.create_task(heartbeat(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(interview(repo, latencies) for _ in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall = await hb
+
+    ops = sum(len(v) for v in latencies.values())
+    backend = args.mongo_uri or f"mongomock+{args.rtt:g}ms rtt"
+    mode = "sync pymongo" if args.sync else "async repository"
+    print(f"{args.sessions} concurrent sessions, {mode}, backend={backend}")
+    print(f"  wall={elapsed:.2f}s  sessions/s={args.sessions / elapsed:.1f}  ops/s={ops / elapsed:.1f}  max_loop_stall={stall * 1000:.1f}ms")
+    for name, samples in latencies.items():
+        samples.sort()
+        p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+        print(f"  {name:<22} p50={statistics.median(samples) * 1000:8.2f}ms  p99={p99 * 1000:8.2f}ms")
+
+    if args.mongo_uri:
+        result = collection.drop()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Simulation: the adaptive upstream concurrency limiter under a traffic spike.
+
+Runs a local fake TTS upstream with injected latency and a fixed capacity:
+up to --capacity concurrent requests are served in --latency seconds, beyond
+that every request slows down proportionally (the upstream is sharing its
+workers), and beyond 2x capacity it answers 429 with Retry-After. Load is
+open-loop: --base-rate requests/s, then --spike-rate for --spike seconds,
+then back to base. Each request goes through elevenlabs_service's real
+streaming path, first with the limiter effectively disabled, then with the
+adaptive limiter (starting from a deliberately too high limit). Reports
+successes, requests shed with Overloaded (the API's fast 503), upstream
+429s, p50/p99 latency of successful requests and the limit over time.
+Gemini calls go through the same AdaptiveLimiter class.
+
+Usage: python benchmarks/sim_adaptive_limiter.py [--capacity 8] [--latency 0.2] [--spike-rate 120]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+CHUNK = b"\xff\xfb" + os.urandom(4 * 1024)
+
+
+class FakeUpstream:
+    def __init__(self, capacity, latency):
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with upstream.lock:
+                    if upstream.active >= 2 * upstream.capacity:
+                        upstream.rejected += 1
+                        overloaded = True
+                    else:
+                        upstream.active += 1
+                        overloaded = False
+                        active = upstream.active
+                if overloaded:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                try:
+                    time.sleep(upstream.latency * max(1.0, active / upstream.capacity))
+                    self.send_response(200)
+                    self.send_header("Content-Type", "audio/mpeg")
+                    self.send_header("Content-Length", str(len(CHUNK) * 4))
+                    self.end_headers()
+                    for _ in range(4):
+                        self.wfile.write(CHUNK)
+                finally:
+                    with upstream.lock:
+                        upstream.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def schedule(base_rate, spike_rate, warmup, spike, cooldown):
+    """Arrival offsets (seconds) for a base / spike / base open-loop load."""
+    times, t = [], 0.0
+    for rate, duration in ((base_rate, warmup), (spike_rate, spike), (base_rate, cooldown)):
+        end = t + duration
+        while t < end:
+            times.append(t)
+            t += 1.0 / rate
+        t = end
+    return times
+
+
+async def run(label, elevenlabs_service, arrivals):
+    outcomes = {"ok": 0, "shed": 0, "upstream_429": 0, "error": 0}
+    latencies = []
+    rejected = []
+    trajectory = []
+    limiter = elevenlabs_service.limiter
+
+    async def one(i, offset):
+        await asyncio.sleep(offset)
+        start = time.perf_counter()
+        try:
+            stream = await elevenlabs_service.open_speech_stream(f"simulated clip {label} {i}")
+            async for _ in stream:
+                pass
+        except elevenlabs_service.Overloaded:
+            outcomes["shed"] += 1
+            rejected.append(time.perf_counter() - start)
+            return
+        except httpx.HTTPStatusError as e:
+            outcomes["upstream_429" if e.response.status_code == 429 else "error"] += 1
+            rejected.append(time.perf_counter() - start)
+            return
+        except Exception:
+            outcomes["error"] += 1
+            return
+        outcomes["ok"] += 1
+        latencies.append(time.perf_counter() - start)
+
+    async def sample():
+        while True:
+            trajectory.append(limiter.limit)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, offset) for i, offset in enumerate(arrivals)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000 if latencies else math.nan
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else math.nan
+    print(f"{label:<18} ok={outcomes['ok']:4d}  shed(503)={outcomes['shed']:4d}  upstream_429={outcomes['upstream_429']:4d}  "
+          f"errors={outcomes['error']:3d}  p50={p50:8.1f}ms  p99={p99:8.1f}ms  wall={elapsed:5.1f}s")
+    if rejected:
+        print(f"{'':<18} rejected (503 or 429) after p50={statistics.median(rejected) * 1000:.1f}ms")
+    print(f"{'':<18} limit every 0.5s: {' '.join(f'{limit:.0f}' for limit in trajectory)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--capacity", type=int, default=8, help="upstream concurrency served at base latency")
+    parser.add_argument("--latency", type=float, default=0.2, help="upstream base latency in seconds")
+    parser.add_argument("--base-rate", type=float, default=20.0)
+    parser.add_argument("--spike-rate", type=float, default=120.0)
+    parser.add_argument("--spike", type=float, default=4.0, help="spike duration in seconds")
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(args.capacity, args.latency)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), upstream.handler())
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["ELEVENLABS_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["ELEVENLABS_HTTP2"] = "false"
+    os.environ["ELEVENLABS_API_KEY"] = "sim"
+    os.environ["ELEVENLABS_MAX_CONNECTIONS"] = "400"
+    os.environ["ELEVENLABS_MAX_KEEPALIVE"] = "400"
+    os.environ["TTS_CACHE_ENABLED"] = "false"
+    from services import elevenlabs_service
+    from services.concurrency_limiter import AdaptiveLimiter
+
+    # A fixed service time target: latency above 2x the fake's base means it is queueing
+    target = args.latency * 2
+    arrivals = schedule(args.base_rate, args.spike_rate, 2.0, args.spike, 3.0)
+    print(f"fake upstream: capacity {args.capacity}, {args.latency * 1000:.0f}ms base latency, 429 above "
+          f"{2 * args.capacity} concurrent; load {args.base_rate:.0f}/s -> {args.spike_rate:.0f}/s for {args.spike:.0f}s "
+          f"({len(arrivals)} requests)")
+
+    elevenlabs_service.limiter = AdaptiveLimiter("unlimited", max_limit=10_000, min_limit=10_000, max_queue=10_000,
+                                                 queue_timeout=60, latency_target=math.inf)
+    await run("no limiter", elevenlabs_service, arrivals)
+    rejected = upstream.rejected
+
+    await elevenlabs_service.close_client()
+    elevenlabs_service.limiter = AdaptiveLimiter("adaptive", max_limit=64, max_queue=2 * args.capacity,
+                                                 queue_timeout=1.0, latency_target=target)
+    await run("adaptive limiter", elevenlabs_service, arrivals)
+    print(f"{'':<18} limiter stats: {elevenlabs_service.limiter.stats()}")
+    print(f"upstream 429s: no limiter={rejected}  adaptive={upstream.rejected - rejected}")
+
+    await elevenlabs_service.close_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
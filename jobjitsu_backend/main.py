@@ -1,18 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from routers import auth, session
-import os
+from services import gemini_service, elevenlabs_service, tts_cache, session_tasks, database, indexes, question_bank, single_flight, concurrency_limiter, followup_speculation, answer_grading, session_cache, metrics
+from services.debug_audio_sink import sink as debug_audio_sink
+from services.auth_service import token_cache_stats
+from services.logging_setup import configure_logging, RequestIdMiddleware, stats as logging_stats
+from services.metrics import MetricsMiddleware
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
-print(f"MONGO_URI loaded: {os.getenv('MONGO_URI')}")
-print(f"DB_NAME loaded: {os.getenv('DB_NAME')}")
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.connect()
+    await indexes.bootstrap(database.async_db)
+    gemini_service.init_models()
+    await elevenlabs_service.start_client()
+    session_tasks.registry.start()
+    debug_audio_sink.start()
+    question_bank.refresher.start(database.async_db)
+    yield
+    await question_bank.refresher.stop()
+    await session_tasks.registry.stop()
+    await debug_audio_sink.stop()
+    await elevenlabs_service.close_client()
+    gemini_service.shutdown_executor()
+    database.close()
 
 app = FastAPI(
     title="JobJitsu API",
     description="Backend API for JobJitsu interview practice platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -26,12 +50,25 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"],
 ) 
+# Per-route latency and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+# Outermost, so every log record of a request (and its background tasks) carries its ID
+app.add_middleware(RequestIdMiddleware)
 
 
 # Include routers
 app.include_router(auth.router, prefix="/api", tags=["Authentication"])
 app.include_router(session.router, prefix="/api", tags=["Sessions"])
 
+@app.exception_handler(concurrency_limiter.Overloaded)
+async def overloaded_handler(request, exc: concurrency_limiter.Overloaded):
+    """An upstream limiter shed the call: fail fast and tell the client when to retry."""
+    return JSONResponse(
+        {"detail": f"Service busy ({exc.upstream}), please retry shortly"},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @app.get("/")
 async def root():
     return {"message": "JobJitsu API is running", "version": "1.0.0"}
@@ -40,6 +77,35 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: the database must answer a ping."""
+    ready = await run_in_threadpool(database.ping)
+    body = {"status": "ready" if ready else "unavailable", "mongo_pool": database.pool_stats()}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of request, upstream and payload metrics."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "tts": tts_cache.cache.stats(),
+        "sessions": session_cache.cache.stats(),
+        "session_tasks": session_tasks.registry.stats(),
+        "debug_audio": debug_audio_sink.stats(),
+        "auth_tokens": token_cache_stats(),
+        "gemini_parsing": gemini_service.parse_stats(),
+        "question_bank": question_bank.bank_stats(),
+        "single_flight": single_flight.stats(),
+        "limiters": concurrency_limiter.stats(),
+        "followup_speculation": followup_speculation.stats,
+        "answer_grading": answer_grading.stats,
+        "logging": logging_stats,
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
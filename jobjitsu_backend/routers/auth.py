@@ -1,39 +1,25 @@
 from unittest import result
-from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi import APIRouter, HTTPException, Header, Depends, Query
 from services.auth_service import signup_user, login_user, verify_token
 from services.auth_guard import get_current_user
-import sys
-import os
-from dotenv import load_dotenv
-from pymongo import MongoClient
-
-# Load environment variables before importing db_service
-load_dotenv()
-
-# Initialize database connection directly
-mongo_uri = os.getenv("MONGO_URI")
-db_name = os.getenv("DB_NAME")
-
-if mongo_uri and db_name:
-    client = MongoClient(mongo_uri)
-    db = client[db_name]
-    print(f"Database connected: {db_name}")
-else:
-    print("MongoDB credentials not found")
-    db = None
+from services.database import get_db, db_service
+from services.user_stats import UserStatsStore, get_user_stats_store, format_user_stats
 
 from datetime import datetime
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.post("/auth/signup")
-def signup(email: str, password: str):
-    print(f"Attempting to signup user with email: {email}")
+def signup(email: str, password: str, db=Depends(get_db)):
     # Check if user already exists in MongoDB
     existing_user = db.users.find_one({"email": email})
     if existing_user:
-        print("User already exists in DB, attempting login...")
+        log.info("Signup for an existing user, logging in instead")
         login_result = login_user(email, password)
         if not login_result or getattr(login_result, "session", None) is None:
             raise HTTPException(status_code=401, detail="Login failed for existing user")
@@ -46,7 +32,6 @@ def signup(email: str, password: str):
         }
     # If not, proceed with signup
     result = signup_user(email, password)
-    print(f"Signup result: {result}")
     if not result or getattr(result, "user", None) is None:
         raise HTTPException(status_code=400, detail="Signup failed")
 
@@ -84,12 +69,9 @@ def verify(authorization: str = Header(None)):
     return {"message": "Token valid", "user": user}
 
 @router.post("/auth/sync-user")
-def sync_user(user_data: dict):
+def sync_user(user_data: dict, db=Depends(get_db)):
     """Sync OAuth user data from frontend to MongoDB"""
     try:
-        print(f"Database object: {db}")
-        print(f"MongoDB URI: {os.getenv('MONGO_URI')}")
-        print(f"DB Name: {os.getenv('DB_NAME')}")
         
         user_id = user_data.get("id")
         email = user_data.get("email")
@@ -100,9 +82,6 @@ def sync_user(user_data: dict):
         if not user_id or not email:
             raise HTTPException(status_code=400, detail="Missing required user data")
         
-        if db is None:
-            raise HTTPException(status_code=500, detail="Database not configured")
-        
         # Check if user already exists
         existing_user = db.users.find_one({"email": email})
         
@@ -142,12 +121,9 @@ def sync_user(user_data: dict):
 
 
 @router.get("/user/stats")
-def get_user_stats(current_user=Depends(get_current_user)):
+async def get_user_stats(current_user=Depends(get_current_user), stats_store: UserStatsStore = Depends(get_user_stats_store)):
     """Get user statistics and recent sessions"""
     try:
-        if db is None:
-            raise HTTPException(status_code=500, detail="Database not configured")
-
         # Extract user ID from current_user
         user_id = None
         if hasattr(current_user, 'user') and hasattr(current_user.user, 'id'):
@@ -160,52 +136,63 @@ def get_user_stats(current_user=Depends(get_current_user)):
         if not user_id:
             raise HTTPException(status_code=400, detail="User ID not found")
 
-        # Get all sessions for this user
-        sessions_collection = db.sessions
-        user_sessions = list(sessions_collection.find({"user_id": user_id}).sort("created_at", -1))
-
-        # Calculate statistics
-        total_sessions = len(user_sessions)
-        scores = []
-        recent_sessions = []
-
-        for session in user_sessions:
-            # Extract feedback score if available
-            fb = session.get('feedback')
-            if fb and isinstance(fb, dict):
-                score = fb.get('score', 0)
-                if isinstance(score, (int, float)) and score > 0:
-                    scores.append(score)
-
-            # Prepare session data for recent sessions (limit to 10)
-            if len(recent_sessions) < 10:
-                entry = {
-                    "_id": str(session.get('_id')),
-                    "user_id": session.get('user_id'),
-                    "role": session.get('role', 'Unknown'),
-                    "company": session.get('company', 'Unknown'),
-                    "created_at": (session.get('created_at') or datetime.utcnow()).isoformat(),
-                    "follow_up_question": session.get('follow_up_question'),
-                    "follow_up_answer": session.get('follow_up_answer')
-                }
-
-                if fb:
-                    if isinstance(fb, dict):
-                        entry['feedback'] = fb
-                    else:
-                        entry['feedback'] = {"score": 0, "description": str(fb)}
-
-                recent_sessions.append(entry)
-
-        average_score = (sum(scores) / len(scores)) if scores else 0
-        best_score = max(scores) if scores else 0
+        stats, recent = await asyncio.gather(stats_store.get(user_id), stats_store.recent_sessions(user_id))
+        return format_user_stats(stats, recent)
 
-        return {
-            "totalSessions": total_sessions,
-            "averageScore": round(average_score, 1),
-            "bestScore": best_score,
-            "recentSessions": recent_sessions
-        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get user stats: {str(e)}")
+
+
+# Fields a client may ask /user/sessions for; the default leaves out the
+# question/answer transcripts, which are most of each document's size.
+SESSION_LIST_FIELDS = {"user_id", "role", "company", "status", "created_at", "questions",
+                       "follow_up_question", "follow_up_answer", "feedback"}
+DEFAULT_SESSION_LIST_FIELDS = ["role", "company", "status", "created_at", "feedback"]
+
+
+def _serialize_session(session: dict) -> dict:
+    session = dict(session)
+    session["_id"] = str(session["_id"])
+    if isinstance(session.get("created_at"), datetime):
+        session["created_at"] = session["created_at"].isoformat()
+    return session
+
+
+@router.get("/user/sessions")
+def list_user_sessions(
+    cursor: str = None,
+    limit: int = Query(db_service.DEFAULT_PAGE_SIZE, ge=1, le=db_service.MAX_PAGE_SIZE),
+    fields: str = None,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Page through the user's sessions, newest first. Pass next_cursor back as cursor."""
+    user_id = None
+    if hasattr(current_user, 'user') and hasattr(current_user.user, 'id'):
+        user_id = current_user.user.id
+    elif hasattr(current_user, 'id'):
+        user_id = current_user.id
+    elif hasattr(current_user, 'user_id'):
+        user_id = current_user.user_id
+    if not user_id:
+        raise HTTPException(status_code=400, detail="User ID not found")
+
+    projection = DEFAULT_SESSION_LIST_FIELDS
+    if fields:
+        projection = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = sorted(set(projection) - SESSION_LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
 
+    try:
+        page = db_service.get_user_sessions(user_id, limit=limit, cursor=cursor, projection=projection, database=db)
+    except db_service.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get user stats: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to list sessions: {str(e)}")
+    return {
+        "sessions": [_serialize_session(s) for s in page["sessions"]],
+        "next_cursor": page["next_cursor"],
+    }
@@ -1,46 +1,53 @@
-import base64
+import asyncio
+import functools
 import json
 import re
-from fastapi import APIRouter, Depends, HTTPException
-from flask_login import current_user
-from services.elevenlabs_service import text_to_speech
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from services.elevenlabs_service import text_to_speech, open_speech_stream
+from services.audio_prefetch import prefetch_question_audio, ready_question_audio, release_question_audio, discard_session_audio, ready_followup_audio
+from services.followup_speculation import speculate_followup, speculative_followup, qa_pairs_from
+from services.answer_grading import grade_answer, grade_followup_answer, session_feedback, session_grades, combine
 from services.auth_guard import get_current_user
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from interviewHubDB.db_service import db
-from services.gemini_service import generate_questions, generate_followup, generate_feedback
+from services.session_repository import SessionRepository, get_session_repository, to_object_id
+from services.user_stats import UserStatsStore, get_user_stats_store
+from services.question_bank import QuestionBank, get_question_bank
+from services.gemini_service import generate_questions_async, generate_followup_async, GeminiParseError, open_feedback_stream, parse_streamed_feedback
+from services.concurrency_limiter import Overloaded
+from services.single_flight import SingleFlight
 from models.session import session_schema
 from datetime import datetime
-from bson import ObjectId
-import re
+import logging
+
+log = logging.getLogger(__name__)
 
 router = APIRouter()
-sessions = db.sessions if db is not None else None
 
-@router.post("/session/start")
-async def start_session(role: str, company: str, current_user=Depends(get_current_user)):
-    print(f"Starting session for user: {current_user}")
-    if sessions is None:
-        raise HTTPException(status_code=500, detail="Database not configured")
+# Concurrent starts for the same pair on a bank miss share one Gemini call,
+# and only that shared call stores the new set, so the bank gets one copy.
+_new_question_sets = SingleFlight("new_question_sets")
+
+async def _generate_and_bank(bank: QuestionBank, role: str, company: str):
+    questions = await generate_questions_async(role, company)
+    await bank.add(company, role, questions, uses=1)
+    return questions
 
-    print(f"Current user object: {current_user}")
-    print(f"Current user type: {type(current_user)}")
-    print(f"Current user attributes: {dir(current_user) if hasattr(current_user, '__dict__') else 'No attributes'}")
+@router.post("/session/start")
+async def start_session(role: str, company: str, current_user=Depends(get_current_user), repo: SessionRepository = Depends(get_session_repository), stats_store: UserStatsStore = Depends(get_user_stats_store), bank: QuestionBank = Depends(get_question_bank)):
+    log.debug("Starting session for user: %s", current_user)
 
     # Try different ways to get the user ID
     user_id = None
     if hasattr(current_user, 'user') and hasattr(current_user.user, 'id'):
         user_id = current_user.user.id
-        print(f"Found user ID via current_user.user.id: {user_id}")
     elif hasattr(current_user, 'id'):
         user_id = current_user.id
-        print(f"Found user ID via current_user.id: {user_id}")
     elif hasattr(current_user, 'user_id'):
         user_id = current_user.user_id
-        print(f"Found user ID via current_user.user_id: {user_id}")
     else:
-        print("Could not find user ID in current_user object")
+        log.warning("Could not find user ID in current_user object")
 
     new_session = session_schema()
     new_session.update({
@@ -50,43 +57,21 @@ async def start_session(role: str, company: str, current_user=Depends(get_curren
         "created_at": datetime.utcnow()
     })
 
-    print(f"Session being created with user_id: {user_id}")
-
     try:
-        questions_list = generate_questions(role, company)
-        print(questions_list)
-        # Convert list to the JSON structure you showed
-        # questions_dict = {}
-        # for i, question in enumerate(questions_list[:3], 1):  # Limit to 3 questions
-        #     questions_dict[f"question{i}"] = question
-        #     questions_dict[f"answer{i}"] = ""  # Initialize empty answers
-
-        # new_session["questions"] = questions_dict
-        json_match = re.search(r"\{.*\}", questions_list, re.DOTALL)
-        if not json_match:
-            raise ValueError("No JSON object found in Gemini output.")
-
-        clean_output = json_match.group(0).strip()
-
-        # 2️⃣ Fix missing commas between key-value pairs
-        # e.g. turns: "skill?"\n  "answer3" into "skill?",\n  "answer3"
-        clean_output = re.sub(r'"\s*([\r\n]+)\s*"', '", "', clean_output)
-
-        # 3️⃣ Ensure JSON keys and values are properly separated by commas
-        clean_output = re.sub(r'"\s*"answer', '", "answer', clean_output)
-
-        questions_dict = json.loads(clean_output)
-        print(f"Questions dict: {questions_dict}")
-
-        new_session["questions"] = questions_dict
-        print(f"New session: {new_session}")
-
-        # Get the first question for text-to-speech
-        first_question_text = questions_dict.get('question1', "Hello, let's start the interview.")
-        print(f"First question text: {first_question_text}")
-        #audio_content = await text_to_speech(first_question_text)
+        # Serve a pre-generated set when the bank has one; otherwise ask Gemini
+        # and keep the result so the next candidate for this pair is instant.
+        questions = await bank.take(company, role)
+        if questions is None:
+            questions = await _new_question_sets.do(
+                (company, role), functools.partial(_generate_and_bank, bank, role, company))
+        log.debug("Questions: %s", questions)
+
+        new_session["questions"] = questions.as_session_questions()
+    except Overloaded:
+        # Shed with a 503 rather than starting every session on the mock questions
+        raise
     except Exception as e:
-        print(f"Error generating questions or audio: {e}")
+        log.warning("Error generating questions, using fallback questions: %s", e)
         # Fallback to mock questions if Gemini fails
         questions_dict = {
             "question1": f"Tell me about yourself and why you're interested in the {role} position at {company}.",
@@ -97,24 +82,21 @@ async def start_session(role: str, company: str, current_user=Depends(get_curren
             "answer3": ""
         }
         new_session["questions"] = questions_dict
-        audio_content = None
 
-    print(f"About to insert session to database: {new_session}")
-    result = sessions.insert_one(new_session)
-    session_id = str(result.inserted_id)
-    print(f"Session inserted with ID: {session_id}")
+    session_id = await repo.create(new_session)
+    log.info("Session %s started for user %s (%s / %s)", session_id, user_id, company, role)
+    await stats_store.record_session_started(new_session)
 
-    # Verify the session was saved correctly
-    saved_session = sessions.find_one({"_id": result.inserted_id})
-    print(f"Saved session user_id: {saved_session.get('user_id') if saved_session else 'Session not found'}")
+    # Synthesize all question audio in the background so /next can return it right away
+    prefetch_question_audio(session_id, new_session["questions"])
 
     return {"message": "Session started", "session_id": session_id, "questions": new_session["questions"]}
 
 @router.get("/session/{session_id}/next")
-async def get_next_question(session_id: str):
+async def get_next_question(session_id: str, request: Request, repo: SessionRepository = Depends(get_session_repository)):
     """Get the next unanswered question from the session"""
     try:
-        session = sessions.find_one({"_id": ObjectId(session_id)})
+        session = await repo.get(session_id, {"questions": 1})
         if session is None:
             raise HTTPException(status_code=404, detail="Session not found")
 
@@ -127,19 +109,11 @@ async def get_next_question(session_id: str):
 
             if question_key in questions and questions.get(answer_key, "").strip() == "":
                 question_text = questions[question_key]
-                print(f"[AUDIO DEBUG] Generating audio for question: {question_text}")
-                try:
-                    audio_content = await text_to_speech(question_text)
-                    audio_b64 = base64.b64encode(audio_content).decode("utf-8") if audio_content else None
-                    print(f"[AUDIO DEBUG] audio_b64 length: {len(audio_b64) if audio_b64 else 0}")
-                except Exception as audio_err:
-                    print(f"[AUDIO DEBUG] Error generating audio: {audio_err}")
-                    audio_b64 = None
                 return {
                     "question_number": i,
                     "question": question_text,
                     "is_last_question": i == 3,  # Assuming 3 total questions
-                    "audio_b64": audio_b64
+                    "audio_url": request.app.url_path_for("get_question_audio", session_id=session_id, question_number=str(i))
                 }
 
         # If all questions are answered
@@ -148,244 +122,260 @@ async def get_next_question(session_id: str):
             "is_complete": True
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error getting next question: {e}")
+        log.exception("Error getting next question for session %s", session_id)
         raise HTTPException(status_code=500, detail=f"Error retrieving next question: {str(e)}")
 
+@router.get("/session/{session_id}/question/{question_number}/audio", name="get_question_audio")
+async def get_question_audio(session_id: str, question_number: int, request: Request, repo: SessionRepository = Depends(get_session_repository)):
+    """Audio for one of the session's questions, streamed from ElevenLabs unless already synthesized"""
+    if question_number not in (1, 2, 3):
+        raise HTTPException(status_code=404, detail="Question not found")
+    session = await _find_session_or_404(repo, session_id, {"questions": 1})
+    question_text = session.get("questions", {}).get(f"question{question_number}")
+    if not question_text:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    audio = await ready_question_audio(session_id, question_number, question_text)
+    response = await _audio_response(request, question_text, audio)
+    release_question_audio(session_id, question_number)
+    return response
+
+@router.get("/session/{session_id}/followup/audio", name="get_followup_audio")
+async def get_followup_audio(session_id: str, request: Request, repo: SessionRepository = Depends(get_session_repository)):
+    """Audio for the session's follow-up question"""
+    session = await _find_session_or_404(repo, session_id, {"follow_up_question": 1})
+    followup_question = session.get("follow_up_question")
+    if not followup_question:
+        raise HTTPException(status_code=404, detail="No follow-up question yet")
+
+    audio = await ready_followup_audio(session_id, followup_question)
+    return await _audio_response(request, followup_question, audio)
+
+async def _find_session_or_404(repo: SessionRepository, session_id: str, projection: dict):
+    if to_object_id(session_id) is None:
+        raise HTTPException(status_code=400, detail="Invalid session ID format")
+    session = await repo.get(session_id, projection)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+def _parse_range(range_header: str, size: int):
+    """Parse a single 'bytes=start-end' range into inclusive offsets, or raise 416."""
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header)
+    if not match or (match.group(1) == "" and match.group(2) == ""):
+        raise HTTPException(status_code=416, detail="Invalid range", headers={"Content-Range": f"bytes */{size}"})
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+async def _audio_response(request: Request, text: str, audio):
+    """
+    Serve audio bytes with range support, or stream a fresh synthesis.
+
+    Media elements usually open with 'Range: bytes=0-', which is answered with
+    the live stream as a plain 200. Seeks into audio that is not synthesized
+    yet wait for the full clip so the requested bytes can be sliced out.
+    """
+    range_header = request.headers.get("range")
+    live_ok = range_header is None or re.fullmatch(r"\s*bytes=0-\s*", range_header) is not None
+
+    if audio is None and live_ok:
+        try:
+            stream = await open_speech_stream(text)
+        except Overloaded:
+            raise
+        except Exception as e:
+            log.warning("Error opening audio stream: %s", e)
+            raise HTTPException(status_code=502, detail="Audio synthesis failed")
+        # Closing the stream afterwards frees its ElevenLabs slot even if the body was never sent
+        return StreamingResponse(stream, media_type="audio/mpeg", headers={"Accept-Ranges": "bytes", "Cache-Control": "no-store"},
+                                 background=BackgroundTask(stream.aclose))
+
+    if audio is None:
+        audio = await text_to_speech(text)  # Overloaded propagates: 503 with Retry-After
+        if not audio:
+            raise HTTPException(status_code=502, detail="Audio synthesis failed")
+
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "private, max-age=3600"}
+    if range_header is None:
+        return Response(content=audio, media_type="audio/mpeg", headers=headers)
+    start, end = _parse_range(range_header, len(audio))
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+    return Response(content=audio[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+
 @router.post("/session/{session_id}/answer")
-def submit_answer(session_id: str, question_number: int, answer: str):
+async def submit_answer(session_id: str, question_number: int, answer: str, repo: SessionRepository = Depends(get_session_repository)):
     """Submit an answer for a specific question number"""
     try:
-        session = sessions.find_one({"_id": ObjectId(session_id)})
-        if session is None:
-            raise HTTPException(status_code=404, detail="Session not found")
-
         # Update the specific answer in the questions structure
-        answer_key = f"answer{question_number}"
-        sessions.update_one(
-            {"_id": ObjectId(session_id)},
-            {"$set": {f"questions.{answer_key}": answer}}
-        )
+        updated_session = await repo.save_answer(session_id, question_number, answer, {"questions": 1})
+        if updated_session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
 
+        # Grade this answer now, and with every answer in, start generating the
+        # follow-up before it is asked for
+        questions = updated_session.get("questions") or {}
+        grade_answer(repo, session_id, question_number, questions.get(f"question{question_number}"), answer)
+        speculate_followup(repo, session_id, questions)
         return {"message": "Answer saved"}
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error saving answer: {e}")
+        log.exception("Error saving answer for session %s", session_id)
         raise HTTPException(status_code=500, detail=f"Error saving answer: {str(e)}")
 
 @router.post("/session/{session_id}/followup")
-async def followup(session_id: str, current_user=Depends(get_current_user)):
-    print(f"Follow-up request for session_id: {session_id}")
-    try:
-        session_object_id = ObjectId(session_id)
-        print(f"Converted to ObjectId: {session_object_id}")
-    except Exception as e:
-        print(f"Error converting session_id to ObjectId: {e}")
+async def followup(session_id: str, request: Request, current_user=Depends(get_current_user), repo: SessionRepository = Depends(get_session_repository)):
+    log.debug("Follow-up request for session %s", session_id)
+    if to_object_id(session_id) is None:
         raise HTTPException(status_code=400, detail="Invalid session ID format")
 
-    session = sessions.find_one({"_id": session_object_id})
+    session = await repo.get(session_id, {"questions": 1, "speculative_followup": 1})
     if session is None:
-        print(f"Session not found in database for ID: {session_id}")
         raise HTTPException(status_code=404, detail="Session not found")
 
-    print(f"Found session: {session.get('_id')}")
-    print(f"Session questions: {session.get('questions', {})}")
-
     # Extract Q&A pairs from the questions object
-    questions = session.get("questions", {})
-    qa_pairs = []
-    for i in range(1, 4):  # Assuming max 3 questions
-        question_key = f"question{i}"
-        answer_key = f"answer{i}"
-        if question_key in questions and answer_key in questions:
-            qa_pairs.append((questions[question_key], questions[answer_key]))
-
-    print(f"QA pairs for followup: {qa_pairs}")
-    followup_response = generate_followup(qa_pairs)
-    print(f"Followup response: {followup_response}")
-
-    # Parse the JSON response to extract just the question
-    try:
-        cleaned = re.sub(r"^```(?:json)?|```$", "", followup_response.strip(), flags=re.MULTILINE)
-
-        # 2️⃣ Extract the JSON portion only, in case Gemini added extra text
-        match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-        if not match:
-            raise ValueError("No valid JSON object found in Gemini response.")
-        cleaned_json = match.group(0)
-        followup_data = json.loads(cleaned_json)
-        followup_question = followup_data.get("followup_question", "That's interesting! Can you tell me more?")
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"Error parsing followup response: {e}")
-        followup_question = "That's interesting! Can you tell me more?"
-
-     # Generate TTS audio for the follow-up question
-    audio_b64 = None
-    try:
-        from services.elevenlabs_service import text_to_speech
-        audio_content = None
-        if followup_question and isinstance(followup_question, str) and len(followup_question) < 1000:
-            audio_content = await text_to_speech(followup_question)
-        if audio_content:
-            audio_b64 = base64.b64encode(audio_content).decode("utf-8")
-            print(f"[AUDIO DEBUG] Follow-up audio_b64 length: {len(audio_b64)}")
-        else:
-            print("[AUDIO DEBUG] No audio content generated for follow-up.")
-    except Exception as audio_err:
-        print(f"[AUDIO DEBUG] Error generating audio for follow-up: {audio_err}")
-        audio_b64 = None
+    qa_pairs = qa_pairs_from(session.get("questions", {}))
+    log.debug("QA pairs for followup: %s", qa_pairs)
 
-    # Store the follow-up question in the session
-    print(f"Storing follow-up question: {followup_question}")
-    result = sessions.update_one({"_id": session_object_id}, {"$set": {"follow_up_question": followup_question, "follow_up_answer": ""}})
-    print(f"Database update result: {result.modified_count} documents modified")
+    # Usually generated already, when the last answer was submitted
+    followup_question = await speculative_followup(session_id, session, qa_pairs)
+    if followup_question is None:
+        try:
+            followup = await generate_followup_async(qa_pairs)
+            log.debug("Followup response: %s", followup)
+            followup_question = followup.question
+        except GeminiParseError as e:
+            log.warning("Error parsing followup response, using canned follow-up: %s", e)
+            followup_question = "That's interesting! Can you tell me more?"
 
-    # Verify the update
-    updated_session = sessions.find_one({"_id": session_object_id})
-    print(f"Updated session follow-up fields: follow_up_question={updated_session.get('follow_up_question')}, follow_up_answer={updated_session.get('follow_up_answer')}")
+    # Store the follow-up question in the session
+    updated_session = await repo.save_followup(session_id, followup_question, {"follow_up_question": 1, "follow_up_answer": 1})
+    if updated_session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
 
-    return {"follow_up": followup_question, "audio_b64": audio_b64}
+    return {"follow_up": followup_question, "audio_url": request.app.url_path_for("get_followup_audio", session_id=session_id)}
 
 @router.post("/session/{session_id}/followup-answer")
-def submit_followup_answer(session_id: str, answer: str, current_user=Depends(get_current_user)):
+async def submit_followup_answer(session_id: str, answer: str, current_user=Depends(get_current_user), repo: SessionRepository = Depends(get_session_repository)):
     """Submit the follow-up answer"""
     try:
-        print(f"Follow-up answer request for session_id: {session_id}")
-        try:
-            session_object_id = ObjectId(session_id)
-            print(f"Converted to ObjectId: {session_object_id}")
-        except Exception as e:
-            print(f"Error converting session_id to ObjectId: {e}")
+        log.debug("Follow-up answer for session %s", session_id)
+        if to_object_id(session_id) is None:
             raise HTTPException(status_code=400, detail="Invalid session ID format")
 
-        session = sessions.find_one({"_id": session_object_id})
-        if session is None:
-            print(f"Session not found in database for ID: {session_id}")
-            raise HTTPException(status_code=404, detail="Session not found")
-
         # Update the follow-up answer in the session
-        print(f"Storing follow-up answer: {answer}")
-        result = sessions.update_one(
-            {"_id": session_object_id},
-            {"$set": {"follow_up_answer": answer}}
-        )
-        print(f"Follow-up answer update result: {result.modified_count} documents modified")
+        updated_session = await repo.save_followup_answer(session_id, answer, {"follow_up_question": 1, "follow_up_answer": 1})
+        if updated_session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
 
-        # Verify the update
-        updated_session = sessions.find_one({"_id": session_object_id})
-        print(f"Updated session follow-up answer: {updated_session.get('follow_up_answer')}")
+        grade_followup_answer(repo, session_id, updated_session.get("follow_up_question"), answer)
 
         return {"message": "Follow-up answer saved"}
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error saving follow-up answer: {e}")
+        log.exception("Error saving follow-up answer for session %s", session_id)
         raise HTTPException(status_code=500, detail=f"Error saving follow-up answer: {str(e)}")
     
 @router.post("/session/{session_id}/feedback")
 
-async def feedback(session_id: str, current_user=Depends(get_current_user)):
-    session = sessions.find_one({"_id": ObjectId(session_id)})
+async def feedback(session_id: str, current_user=Depends(get_current_user), repo: SessionRepository = Depends(get_session_repository), stats_store: UserStatsStore = Depends(get_user_stats_store)):
+    session, qa_pairs = await _feedback_transcript(repo, session_id)
+    # Answers were graded as they came in; this adds the missing grades and a summary
+    feedback_result = await session_feedback(session_id, session, qa_pairs)
+    feedback_data = feedback_result.as_dict()
+
+    # SKIP TTS for feedback: do not generate audio for feedback
+    audio_b64 = None  # Always None, never call TTS for feedback
+
+    await _store_feedback(repo, stats_store, session_id, session, feedback_data)
+    return {"feedback": feedback_data["description"], "score": feedback_data["score"], "audio_b64": audio_b64}
+
+@router.post("/session/{session_id}/feedback/stream")
+async def feedback_stream(session_id: str, current_user=Depends(get_current_user), repo: SessionRepository = Depends(get_session_repository), stats_store: UserStatsStore = Depends(get_user_stats_store)):
+    """
+    Streaming variant of /feedback as Server-Sent Events: "delta" events carry
+    the description as Gemini generates it, then one "done" event carries the
+    parsed {feedback, score} once it has been saved (or an "error" event).
+    With incremental grading the streamed text is the summary and, as in
+    /feedback, the per-answer grades follow it and their mean is the score.
+    """
+    session, qa_pairs = await _feedback_transcript(repo, session_id)
+    started = time.perf_counter()
+    deltas = await open_feedback_stream(qa_pairs)
+
+    async def events():
+        parts = []
+        first_token = None
+        grading = asyncio.ensure_future(session_grades(session_id, session))  # runs alongside the stream
+        try:
+            async for delta in deltas:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                parts.append(delta)
+                yield _sse("delta", {"text": delta})
+            feedback = parse_streamed_feedback("".join(parts))
+            try:
+                graded = await grading
+            except Exception as e:
+                log.warning("Grades for session %s unavailable, keeping the streamed score: %s", session_id, e)
+                graded = None
+            if graded:
+                feedback = combine(feedback.description, graded)
+            feedback_data = feedback.as_dict()
+            await _store_feedback(repo, stats_store, session_id, session, feedback_data)
+        except Exception as e:
+            log.exception("Feedback stream failed for session %s", session_id)
+            yield _sse("error", {"detail": f"Feedback generation failed: {e}"})
+            return
+        finally:
+            grading.cancel()
+        log.info("Feedback stream for session %s: first token after %.0fms, done after %.0fms",
+                 session_id, (first_token or 0) * 1000, (time.perf_counter() - started) * 1000)
+        yield _sse("done", {"feedback": feedback_data["description"], "score": feedback_data["score"]})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+                             background=BackgroundTask(deltas.aclose))
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _feedback_transcript(repo: SessionRepository, session_id: str):
+    """The session fields feedback needs, and its Q&A pairs including the follow-up."""
+    session = await repo.get(session_id, {
+        "questions": 1, "follow_up_question": 1, "follow_up_answer": 1, "follow_up_feedback": 1,
+        "user_id": 1, "role": 1, "company": 1, "created_at": 1, "feedback": 1,
+    }, read_through=True)  # grades and the follow-up answer may have been written by another worker
     if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Extract Q&A pairs from the questions object
-    questions = session.get("questions", {})
-    qa_pairs = []
-    for i in range(1, 4):  # Assuming max 3 questions
-        question_key = f"question{i}"
-        answer_key = f"answer{i}"
-        if question_key in questions and answer_key in questions:
-            qa_pairs.append((questions[question_key], questions[answer_key]))
+    qa_pairs = qa_pairs_from(session.get("questions", {}))
 
     # Add follow-up Q&A if it exists
     if session.get("follow_up_question") and session.get("follow_up_answer"):
         qa_pairs.append((session["follow_up_question"], session["follow_up_answer"]))
 
-    print(f"QA pairs for feedback: {qa_pairs}")
-    feedback_response = generate_feedback(qa_pairs)
-    print(f"Feedback response: {feedback_response}")
-
-
-    # Parse the JSON response to extract score and description (robust)
-    try: 
-        raw = feedback_response.strip()
-        # 1) Strip markdown code fences if present
-        raw = re.sub(r"^```(?:json)?\n?|```$", "", raw, flags=re.MULTILINE).strip()
-        # 2) Extract first JSON object
-        json_match = re.search(r"\{[\s\S]*\}", raw)
-        feedback_data: dict
-        if json_match:
-            candidate = json_match.group(0).strip()
-            try:
-                feedback_data = json.loads(candidate)
-            except json.JSONDecodeError:
-                # 3) Sometimes the JSON is double-encoded as a string; try to unescape
-                unescaped = candidate.encode('utf-8').decode('unicode_escape')
-                feedback_data = json.loads(unescaped)
-        else:
-            # No JSON object found; fall back to score extraction
-            feedback_data = {
-                "score": extract_score(raw) or 5,
-                "description": re.search(r'"description":\s*"([^"]*(?:"[^"]*)*)"', raw, re.DOTALL).group(1) if re.search(r'"description":\s*"([^"]*(?:"[^"]*)*)"', raw, re.DOTALL) else raw
-            }
-
-        # 4) If description itself still contains a JSON block, parse nested
-        desc = feedback_data.get("description")
-        if isinstance(desc, str):
-            desc_stripped = re.sub(r"^```(?:json)?\n?|```$", "", desc, flags=re.MULTILINE).strip()
-            nested_match = re.search(r"\{[\s\S]*\}", desc_stripped)
-            if nested_match:
-                try:
-                    nested = json.loads(nested_match.group(0))
-                    if isinstance(nested, dict):
-                        feedback_data["description"] = nested.get("description", desc_stripped)
-                        if isinstance(nested.get("score"), (int, float)):
-                            feedback_data["score"] = nested["score"]
-                except Exception:
-                    pass
-
-        # Normalize types
-        if not isinstance(feedback_data.get("score"), (int, float)):
-            extracted = extract_score(json.dumps(feedback_data))
-            feedback_data["score"] = extracted or 5
-        if not isinstance(feedback_data.get("description"), str):
-            feedback_data["description"] = str(feedback_data.get("description", ""))
-
-    except Exception as e:
-        print(f"Error parsing feedback response (robust): {e}")
-        print(f"Raw feedback response: {feedback_response}")
-        feedback_data = {
-            "score": extract_score(feedback_response) or 5,
-            "description": re.search(r'"description":\s*"([^"]*(?:"[^"]*)*)"', raw, re.DOTALL).group(1) if re.search(r'"description":\s*"([^"]*(?:"[^"]*)*)"', raw, re.DOTALL) else raw
-        }
-
-    # SKIP TTS for feedback: do not generate audio for feedback
-    audio_b64 = None  # Always None, never call TTS for feedback
+    log.debug("QA pairs for feedback: %s", qa_pairs)
+    return session, qa_pairs
 
-    # Store the parsed feedback in the session
-    sessions.update_one(
-        {"_id": ObjectId(session_id)},
-        {"$set": {"feedback": feedback_data}}
+async def _store_feedback(repo: SessionRepository, stats_store: UserStatsStore, session_id: str, session: dict, feedback_data: dict):
+    # Store the parsed feedback in the session and fold the score into user_stats
+    await asyncio.gather(
+        repo.save_feedback(session_id, feedback_data),
+        stats_store.record_feedback(session, feedback_data),
     )
-
-    print(f"Returning feedback: description={feedback_data.get('description', 'NO DESCRIPTION')}, score={feedback_data.get('score', 'NO SCORE')}, audio_b64={'present' if audio_b64 else 'absent'}")
-    print(f"Feedback data type: {type(feedback_data.get('description'))}")
-    print(f"Feedback data content: {feedback_data.get('description')[:200]}...")
-    return {"feedback": feedback_data["description"], "score": feedback_data["score"], "audio_b64": audio_b64}
-
-def extract_score(feedback_text: str) -> float:
-    """Extract numerical score from feedback text"""
-    # Look for patterns like "8.5/10", "Score: 7", etc.
-    score_patterns = [
-        r'(\d+(?:\.\d+)?)/10',
-        r'Score:\s*(\d+(?:\.\d+)?)',
-        r'score[:\s]*(\d+(?:\.\d+)?)',
-        r'(\d+(?:\.\d+)?)\s*out\s*of\s*10',
-        r'["\']?score["\']?[:\s]*(\d+(?:\.\d+)?)'
-    ]
- 
-    for pattern in score_patterns:
-        match = re.search(pattern, feedback_text, re.IGNORECASE)
-        if match:
-            return float(match.group(1))
-
-    # Default score if no pattern found
-    return 5.0
+    discard_session_audio(session_id)
+    log.info("Feedback for session %s: score=%s, %d chars", session_id, feedback_data["score"], len(feedback_data["description"]))
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from services.gemini_service import Feedback, GeminiParseError, generate_grade_async, generate_feedback_summary_async, generate_feedback_async
+from services.session_tasks import registry
+
+log = logging.getLogger(__name__)
+
+# Incremental grading. Each answer is graded in a background task as soon as
+# it is submitted, and the grade is stored next to the answer (questions.feedbackN,
+# or follow_up_feedback), the per-question layout db_service.update_question_feedback
+# uses. POST /feedback then only grades what is still missing (joining a task
+# that is still running) and makes one short summary call on top. Saving an
+# answer clears its grade, and a grade is only stored while the answer it was
+# built from is still current.
+INCREMENTAL_FEEDBACK_ENABLED = os.getenv("INCREMENTAL_FEEDBACK_ENABLED", "true").lower() in ("1", "true", "yes")
+QUESTION_COUNT = 3
+
+stats = {"started": 0, "stored": 0, "precomputed": 0, "joined": 0, "inline": 0, "failed": 0}
+
+
+@dataclass(frozen=True)
+class _Target:
+    label: str
+    slot: str
+    answer_field: str
+    feedback_field: str
+
+
+def _question_target(question_number: int) -> _Target:
+    return _Target(f"Question {question_number}", f"grade:question{question_number}",
+                   f"questions.answer{question_number}", f"questions.feedback{question_number}")
+
+
+FOLLOWUP_TARGET = _Target("Follow-up", "grade:followup", "follow_up_answer", "follow_up_feedback")
+
+
+def grade_answer(repo, session_id: str, question_number: int, question: str, answer: str):
+    """Called after an answer is saved: grade it in the background."""
+    _spawn(repo, session_id, _question_target(question_number), question, answer)
+
+
+def grade_followup_answer(repo, session_id: str, question: str, answer: str):
+    """Called after the follow-up answer is saved: grade it in the background."""
+    _spawn(repo, session_id, FOLLOWUP_TARGET, question, answer)
+
+
+def _spawn(repo, session_id: str, target: _Target, question: str, answer: str):
+    if not INCREMENTAL_FEEDBACK_ENABLED:
+        return
+    if not question or not str(answer or "").strip():
+        registry.cancel(session_id, target.slot)
+        return
+    stats["started"] += 1
+    registry.spawn(session_id, target.slot, _grade(repo, session_id, target, question, answer))
+
+
+async def _grade(repo, session_id: str, target: _Target, question: str, answer: str):
+    try:
+        grade = await generate_grade_async(question, answer)
+    except Exception as e:
+        stats["failed"] += 1
+        log.warning("Grading %s for session %s failed: %s", target.label, session_id, e)
+        raise
+    if await repo.save_answer_feedback(session_id, target.answer_field, answer, target.feedback_field, grade.as_dict()):
+        stats["stored"] += 1
+    return answer, grade
+
+
+def _answers(session: dict) -> list:
+    """(target, question, answer, stored grade) for every answered question, follow-up last."""
+    questions = session.get("questions") or {}
+    answers = []
+    for i in range(1, QUESTION_COUNT + 1):
+        if f"question{i}" in questions and f"answer{i}" in questions:
+            answers.append((_question_target(i), questions[f"question{i}"], questions[f"answer{i}"],
+                            questions.get(f"feedback{i}")))
+    if session.get("follow_up_question") and session.get("follow_up_answer"):
+        answers.append((FOLLOWUP_TARGET, session["follow_up_question"], session["follow_up_answer"],
+                        session.get("follow_up_feedback")))
+    return answers
+
+
+async def _grade_for(session_id: str, target: _Target, question: str, answer: str, stored) -> Feedback:
+    if isinstance(stored, dict) and stored.get("score") is not None and isinstance(stored.get("description"), str):
+        stats["precomputed"] += 1
+        return Feedback(stored["score"], stored["description"])
+
+    task = registry.get(session_id, target.slot)
+    if task is not None:
+        try:
+            graded_answer, grade = await asyncio.shield(task)
+            if graded_answer == answer:
+                stats["joined"] += 1
+                return grade
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        except Exception as e:
+            log.warning("Background grade of %s for session %s failed: %s", target.label, session_id, e)
+    stats["inline"] += 1
+    return await generate_grade_async(question, answer)
+
+
+def combine(summary: str, graded: list) -> Feedback:
+    """Overall feedback: the summary (if any), then each answer's grade; the score is the mean."""
+    mean = round(sum(grade.score for _, _, grade in graded) / len(graded), 1)
+    sections = [summary] if summary else []
+    for label, question, grade in graded:
+        sections.append(f"{label} ({grade.score}/10): {question}\n{grade.description}")
+    return Feedback(int(mean) if mean.is_integer() else mean, "\n\n".join(sections))
+
+
+async def _grades(session_id: str, answers: list) -> list:
+    return await asyncio.gather(*(_grade_for(session_id, *entry) for entry in answers))
+
+
+async def session_grades(session_id: str, session: dict):
+    """
+    (label, question, grade) for every answer, from the same stored or
+    in-flight grades /feedback uses; None when incremental grading is off or
+    nothing was answered. For the streamed feedback, whose score must match.
+    """
+    answers = _answers(session)
+    if not INCREMENTAL_FEEDBACK_ENABLED or not answers:
+        return None
+    grades = await _grades(session_id, answers)
+    return [(target.label, question, grade) for (target, question, _, _), grade in zip(answers, grades)]
+
+
+async def session_feedback(session_id: str, session: dict, qa_pairs: list) -> Feedback:
+    """
+    Final feedback for a session: precomputed per-answer grades plus a summary
+    call, or the single whole-transcript call when incremental grading is off.
+    """
+    answers = _answers(session)
+    if not INCREMENTAL_FEEDBACK_ENABLED or not answers:
+        return await generate_feedback_async(qa_pairs)
+
+    grades = await _grades(session_id, answers)
+    try:
+        summary = await generate_feedback_summary_async(
+            [(question, answer, grade) for (_, question, answer, _), grade in zip(answers, grades)])
+    except GeminiParseError as e:
+        # e.g. cut off at the token limit; the grades alone are still the feedback
+        log.warning("Feedback summary for session %s unusable, returning the grades only: %s", session_id, e)
+        summary = ""
+    return combine(summary, [(target.label, question, grade) for (target, question, _, _), grade in zip(answers, grades)])
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from services.elevenlabs_service import text_to_speech, cached_speech
+from services.session_tasks import registry
+
+log = logging.getLogger(__name__)
+
+QUESTION_COUNT = 3
+FOLLOWUP_AUDIO_SLOT = "audio:followup"
+
+
+def _slot(question_number: int) -> str:
+    return f"audio:question{question_number}"
+
+
+def prefetch_question_audio(session_id: str, questions: dict):
+    """Start synthesizing audio for question1..question3 concurrently in the background."""
+    for i in range(1, QUESTION_COUNT + 1):
+        text = questions.get(f"question{i}")
+        if text:
+            registry.spawn(session_id, _slot(i), text_to_speech(text))
+
+
+async def prefetched_question_audio(session_id: str, question_number: int):
+    """
+    Return prefetched audio for a question, joining the task if it is still running.
+
+    The task is shielded so a client disconnecting does not cancel synthesis
+    that a retry may still pick up. Returns None when nothing was prefetched
+    (e.g. after a restart) or the prefetch failed.
+    """
+    task = registry.get(session_id, _slot(question_number))
+    if task is None:
+        return None
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if not task.cancelled():
+            raise
+    except Exception as e:
+        log.warning("Prefetch for question %s failed: %s", question_number, e)
+    return None
+
+
+async def ready_question_audio(session_id: str, question_number: int, question_text: str):
+    """Audio that can be served without a new synthesis: prefetched or cached, else None."""
+    audio = await prefetched_question_audio(session_id, question_number)
+    if audio:
+        return audio
+    return await cached_speech(question_text)
+
+
+async def _spoken(text: str):
+    return text, await text_to_speech(text)
+
+
+def prefetch_followup_audio(session_id: str, text: str):
+    """Start synthesizing a (speculated) follow-up question in the background."""
+    registry.spawn(session_id, FOLLOWUP_AUDIO_SLOT, _spoken(text))
+
+
+async def ready_followup_audio(session_id: str, text: str):
+    """Prefetched audio for this follow-up text (joining a running synthesis), or cached audio, else None."""
+    task = registry.get(session_id, FOLLOWUP_AUDIO_SLOT)
+    if task is not None:
+        try:
+            spoken, audio = await asyncio.shield(task)
+            if spoken == text and audio:
+                return audio
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        except Exception as e:
+            log.warning("Follow-up audio prefetch failed: %s", e)
+    return await cached_speech(text)
+
+
+def release_question_audio(session_id: str, question_number: int):
+    """Drop the stored audio for a question once it has been delivered."""
+    registry.pop(session_id, _slot(question_number))
+
+
+def discard_session_audio(session_id: str):
+    """Cancel pending synthesis and release audio for a finished or abandoned session."""
+    registry.discard(session_id)
@@ -1,39 +1,252 @@
 from supabase import create_client
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import httpx
+from jose import jwt, JWTError
 from dotenv import load_dotenv
+from services import metrics
 
 # Load environment variables
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 # Initialize Supabase client with error handling
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 
 if not supabase_url or not supabase_key:
-    print("Warning: Supabase credentials not found. OAuth will not work without proper configuration.")
+    log.warning("Supabase credentials not found. OAuth will not work without proper configuration.")
     supabase = None
 else:
     supabase = create_client(supabase_url, supabase_key)
 
+# Local JWT verification. Tokens are checked against the project's JWT secret
+# (HS256) or its JWKS (asymmetric signing keys); the remote get_user call is
+# only made when neither can decide, e.g. no secret configured.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json" if supabase_url else None
+)
+JWKS_CACHE_SECONDS = float(os.getenv("JWKS_CACHE_SECONDS", "600"))
+# Tokens with a kid the JWKS does not list trigger at most one refetch per window
+JWKS_REFETCH_MIN_SECONDS = float(os.getenv("JWKS_REFETCH_MIN_SECONDS", "30"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_MAX_TTL = float(os.getenv("TOKEN_CACHE_MAX_TTL", "300"))
+
+
+@dataclass
+class TokenUser:
+    """User claims from a verified access token, shaped like supabase's User."""
+    id: str
+    email: str = None
+    role: str = None
+    aud: str = None
+    app_metadata: dict = field(default_factory=dict)
+    user_metadata: dict = field(default_factory=dict)
+
+
+@dataclass
+class TokenUserResponse:
+    """Mirrors supabase's UserResponse so callers can keep using current_user.user.id."""
+    user: TokenUser
+
+
+class _Undecided(Exception):
+    """The token could not be checked locally; ask Supabase."""
+
+
+class _TokenCache:
+    """LRU of verified tokens; each entry expires no later than the token's exp."""
+
+    def __init__(self, max_entries: int, max_ttl: float):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        now = time.time()
+        with self._lock:
+            item = self._items.get(token)
+            if item is None or item[1] <= now:
+                if item is not None:
+                    del self._items[token]
+                self.misses += 1
+                return None
+            self._items.move_to_end(token)
+            self.hits += 1
+            return item[0]
+
+    def put(self, token: str, user, exp):
+        now = time.time()
+        expires_at = now + self.max_ttl
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._items[token] = (user, expires_at)
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+_token_cache = _TokenCache(TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_MAX_TTL)
+_jwks = {"keys": {}, "fetched_at": 0.0, "attempted_at": 0.0, "fetching": False}
+_jwks_lock = threading.Lock()
+verification_stats = {"local": 0, "remote": 0, "rejected": 0}
+
+
+def _jwks_key(kid: str):
+    """
+    Signing key for kid from the (cached) JWKS. The set is refetched when it
+    is older than JWKS_CACHE_SECONDS or lacks kid, by one caller at a time,
+    outside the lock and at most once per JWKS_REFETCH_MIN_SECONDS, so a
+    stream of tokens with unknown kids cannot hammer the endpoint or stall
+    every other verification behind it.
+    """
+    if not SUPABASE_JWKS_URL or not kid:
+        raise _Undecided()
+    now = time.time()
+    with _jwks_lock:
+        key = _jwks["keys"].get(kid)
+        fetch = ((key is None or now - _jwks["fetched_at"] >= JWKS_CACHE_SECONDS)
+                 and not _jwks["fetching"] and now - _jwks["attempted_at"] >= JWKS_REFETCH_MIN_SECONDS)
+        if fetch:
+            _jwks["fetching"] = True
+            _jwks["attempted_at"] = now
+    if fetch:
+        keys = None
+        try:
+            response = httpx.get(SUPABASE_JWKS_URL, timeout=5.0)
+            response.raise_for_status()
+            keys = {k["kid"]: k for k in response.json().get("keys", []) if "kid" in k}
+        except Exception as e:
+            log.warning("Failed to fetch JWKS from %s: %s", SUPABASE_JWKS_URL, e)
+        finally:
+            with _jwks_lock:
+                _jwks["fetching"] = False
+                if keys is not None:
+                    _jwks["keys"] = keys
+                    _jwks["fetched_at"] = time.time()
+                key = _jwks["keys"].get(kid)
+    if key is None:
+        raise _Undecided()
+    return key
+
+
+def _verify_locally(token: str):
+    """
+    Return the token's claims, None if it is definitely invalid (bad signature,
+    expired, wrong audience), or raise _Undecided when it cannot be checked here.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        return None
+    alg = header.get("alg")
+    if alg == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            raise _Undecided()
+        key = SUPABASE_JWT_SECRET
+    elif alg in ("RS256", "ES256"):
+        key = _jwks_key(header.get("kid"))
+    else:
+        raise _Undecided()
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[alg],
+            audience=SUPABASE_JWT_AUDIENCE,
+            options={"require_aud": True, "require_exp": True, "require_sub": True},
+        )
+    except JWTError:
+        return None
+
+
+def _user_from_claims(claims: dict) -> TokenUserResponse:
+    return TokenUserResponse(user=TokenUser(
+        id=claims["sub"],
+        email=claims.get("email"),
+        role=claims.get("role"),
+        aud=claims.get("aud"),
+        app_metadata=claims.get("app_metadata") or {},
+        user_metadata=claims.get("user_metadata") or {},
+    ))
+
 def signup_user(email: str, password: str):
     if not supabase:
         return {"error": "Supabase not configured"}
-    print(f"Signing up user with email: {email}")
-    response = supabase.auth.sign_up({"email": email, "password": password})
-    print(f"response received.")
+    with metrics.observe_upstream("supabase", "sign_up"):
+        response = supabase.auth.sign_up({"email": email, "password": password})
     return response
 
 def login_user(email: str, password: str):
     if not supabase:
         return {"error": "Supabase not configured"}
-    response = supabase.auth.sign_in_with_password({"email": email, "password": password})
+    with metrics.observe_upstream("supabase", "sign_in"):
+        response = supabase.auth.sign_in_with_password({"email": email, "password": password})
     return response
 
-def verify_token(token: str):
+def _verify_remotely(token: str):
     if not supabase:
         return None
     try:
-        user = supabase.auth.get_user(token)
+        with metrics.observe_upstream("supabase", "get_user"):
+            user = supabase.auth.get_user(token)
         return user
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+def verify_token(token: str):
+    """
+    Verify an access token, returning the user or None.
+
+    Verified tokens are cached until their exp (capped at TOKEN_CACHE_MAX_TTL),
+    so repeat requests skip both signature checks and network calls. Local
+    verification cannot see server-side logouts; the cap bounds how long a
+    revoked token keeps working.
+    """
+    if not token:
+        return None
+    user = _token_cache.get(token)
+    if user is not None:
+        return user
+    try:
+        claims = _verify_locally(token)
+    except _Undecided:
+        user = _verify_remotely(token)
+        if user is None:
+            verification_stats["rejected"] += 1
+            return None
+        verification_stats["remote"] += 1
+        try:
+            exp = jwt.get_unverified_claims(token).get("exp")
+        except JWTError:
+            exp = None
+        _token_cache.put(token, user, exp)
+        return user
+    if claims is None or not claims.get("sub"):
+        verification_stats["rejected"] += 1
+        return None
+    verification_stats["local"] += 1
+    user = _user_from_claims(claims)
+    _token_cache.put(token, user, claims.get("exp"))
+    return user
+
+def token_cache_stats() -> dict:
+    return {
+        "hits": _token_cache.hits,
+        "misses": _token_cache.misses,
+        "entries": len(_token_cache._items),
+        **verification_stats,
+    }
\ No newline at end of file
@@ -0,0 +1,239 @@
+import asyncio
+import collections
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from services import metrics
+
+log = logging.getLogger(__name__)
+
+# Adaptive (AIMD) concurrency limits for upstream APIs. Each upstream gets a
+# limiter whose limit grows by ~1 per round of fast, successful calls and is
+# cut multiplicatively when calls come back slow, rate limited (429) or time
+# out. Callers beyond the limit wait in a bounded queue; when that is full, or
+# a caller waits too long, the request is shed right away with Overloaded,
+# which main.py turns into a 503 with Retry-After instead of letting it pile
+# onto an upstream that is already struggling.
+
+
+class Overloaded(Exception):
+    """Raised instead of calling an upstream that is at capacity."""
+
+    def __init__(self, upstream: str, retry_after: int):
+        super().__init__(f"{upstream} is overloaded, retry in {retry_after}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class Permit:
+    """One admitted call. Report how it went, then release (slot() does both)."""
+
+    __slots__ = ("limiter", "loop", "started", "latency", "overload", "retry_after", "released")
+
+    def __init__(self, limiter, started: float):
+        self.limiter = limiter
+        self.loop = asyncio.get_running_loop()
+        self.started = started
+        self.latency = None
+        self.overload = False
+        self.retry_after = None
+        self.released = False
+
+    def mark_response(self):
+        """Record latency now (e.g. when a streamed response's headers arrive)."""
+        if self.latency is None:
+            self.latency = time.monotonic() - self.started
+
+    def overloaded(self, retry_after: float = None):
+        """The upstream pushed back (429, 503, timeout)."""
+        self.overload = True
+        self.retry_after = retry_after
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.mark_response()
+            self.limiter._release(self)
+
+    def __del__(self):
+        # Last resort for a permit nobody released (a bug): garbage collection
+        # may run on any thread, so log it and hand the release to the loop.
+        if not self.released:
+            log.warning("%s permit garbage-collected without being released", self.limiter.name)
+            try:
+                self.loop.call_soon_threadsafe(self.release)
+            except RuntimeError:
+                pass  # the loop is closed; nothing left to wake
+
+
+class HeldStream:
+    """
+    Async iterator over chunks that holds a permit until it is exhausted or
+    closed. Once iteration starts, the chunks generator owns the permit and
+    releases it when its work is really done. aclose() releases it if
+    iteration never started (a generator that was never started skips its
+    finally), so pass it as the StreamingResponse's background task.
+    """
+
+    def __init__(self, chunks, permit: Permit):
+        self.chunks = chunks
+        self.permit = permit
+        self.started = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.started = True
+        return await self.chunks.__anext__()
+
+    async def aclose(self):
+        try:
+            await self.chunks.aclose()
+        finally:
+            if not self.started:
+                self.permit.release()
+
+
+class AdaptiveLimiter:
+    def __init__(self, name: str, max_limit: int, min_limit: int = 1, max_queue: int = 32,
+                 queue_timeout: float = 10.0, latency_target: float = 5.0, backoff: float = 0.5):
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters = collections.deque()
+        self._last_decrease = 0.0
+        self._retry_hint_until = 0.0
+        self._latency_ewma = None
+        self.completed = 0
+        self.shed = 0
+        self.overload_signals = 0
+        self.decreases = 0
+        _limiters.append(self)
+
+    def _capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: upstream's hint, else the expected queue drain time."""
+        now = time.monotonic()
+        estimate = (len(self._waiters) + 1) / self._capacity() * (self._latency_ewma or 1.0)
+        return max(1, min(60, math.ceil(max(self._retry_hint_until - now, estimate))))
+
+    def _shed(self):
+        self.shed += 1
+        raise Overloaded(self.name, self.retry_after())
+
+    async def acquire(self) -> Permit:
+        if self.in_flight < self._capacity() and not self._waiters:
+            self.in_flight += 1
+            return Permit(self, time.monotonic())
+        if len(self._waiters) >= self.max_queue:
+            self._shed()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self._shed()
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as we were cancelled; hand it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._discard(waiter)
+            raise
+        return Permit(self, time.monotonic())
+
+    @asynccontextmanager
+    async def slot(self):
+        permit = await self.acquire()
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+    def _discard(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self._capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _release(self, permit: Permit):
+        self.in_flight -= 1
+        self.completed += 1
+        latency = permit.latency
+        self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+
+        if permit.overload:
+            self.overload_signals += 1
+            if permit.retry_after:
+                self._retry_hint_until = max(self._retry_hint_until, time.monotonic() + permit.retry_after)
+            self._decrease(permit)
+        elif latency > self.latency_target:
+            self._decrease(permit)
+        else:
+            # Additive increase: about +1 once a full limit's worth of calls succeeded
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def _decrease(self, permit: Permit):
+        # Calls already in flight when the limit was cut report the old
+        # overload too; only the first signal per round cuts the limit.
+        if permit.started < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._last_decrease = time.monotonic()
+        self.decreases += 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "completed": self.completed,
+            "shed": self.shed,
+            "overload_signals": self.overload_signals,
+            "decreases": self.decreases,
+            "latency_ewma": round(self._latency_ewma, 3) if self._latency_ewma is not None else None,
+        }
+
+
+_limiters = []
+
+
+def stats() -> dict:
+    """Counters for every limiter, keyed by upstream name."""
+    return {limiter.name: limiter.stats() for limiter in _limiters}
+
+
+def _limiter_metrics():
+    families = (
+        ("upstream_concurrency_limit", "gauge", "Current adaptive concurrency limit.", "limit"),
+        ("upstream_concurrency_in_flight", "gauge", "Calls holding a limiter slot.", "in_flight"),
+        ("upstream_concurrency_queued", "gauge", "Calls waiting for a limiter slot.", "queued"),
+        ("upstream_shed_total", "counter", "Calls shed with Overloaded (503) by the limiter.", "shed"),
+    )
+    snapshot = stats()
+    return [(name, kind, documentation, [({"upstream": upstream}, values[key]) for upstream, values in snapshot.items()])
+            for name, kind, documentation, key in families]
+
+
+metrics.register_collector(_limiter_metrics)
@@ -0,0 +1,202 @@
+import os
+import logging
+import sys
+import threading
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from services import metrics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from interviewHubDB import db_service
+
+load_dotenv()
+
+log = logging.getLogger(__name__)
+
+# One client per worker, created in the FastAPI lifespan. Async code uses the
+# Motor client; sync code (interviewHubDB.db_service, sync handlers) uses the
+# PyMongo client Motor wraps, so everything shares a single connection pool.
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = os.getenv("DB_NAME")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Counts pool events so saturation (checkouts waiting on a full pool) is visible."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkout_failures = 0
+        self.checkout_timeouts = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.checkout_timeouts += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "open_connections": self.open_connections,
+            "checked_out": self.checked_out,
+            "max_checked_out": self.max_checked_out,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "checkout_failures": self.checkout_failures,
+            "checkout_timeouts": self.checkout_timeouts,
+            "pool_clears": self.pool_clears,
+        }
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Per-command latency and failures for every MongoDB call, as upstream "mongodb" metrics."""
+
+    # Anything else (handshakes, admin commands) is grouped as "other"
+    COMMANDS = frozenset(("find", "insert", "update", "delete", "findAndModify", "aggregate",
+                          "count", "getMore", "createIndexes", "explain", "ping"))
+
+    def _operation(self, event) -> str:
+        return event.command_name if event.command_name in self.COMMANDS else "other"
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.upstream_duration.labels("mongodb", self._operation(event)).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        operation = self._operation(event)
+        metrics.upstream_duration.labels("mongodb", operation).observe(event.duration_micros / 1e6)
+        metrics.record_failure("mongodb", operation)
+
+
+pool_monitor = PoolMonitor()
+command_metrics = CommandMetrics()
+async_client = None
+async_db = None
+client = None
+db = None
+
+
+def connect():
+    """Create the shared client (called from the app lifespan)."""
+    global async_client, async_db, client, db
+    if client is not None:
+        return db
+    if not MONGO_URI or not DB_NAME:
+        log.warning("MongoDB credentials not found. Database operations will not work.")
+        return None
+    async_client = AsyncIOMotorClient(
+        MONGO_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[pool_monitor, command_metrics],
+    )
+    async_db = async_client[DB_NAME]
+    client = async_client.delegate
+    db = client[DB_NAME]
+    db_service.bind(client, db)
+    log.info("Database connected: %s", DB_NAME)
+    return db
+
+
+def close():
+    global async_client, async_db, client, db
+    if async_client is not None:
+        async_client.close()
+    async_client = None
+    async_db = None
+    client = None
+    db = None
+    db_service.bind(None, None)
+
+
+def get_db():
+    """FastAPI dependency returning the shared (sync) database handle."""
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    return db
+
+
+def get_async_db():
+    """FastAPI dependency returning the shared Motor database handle."""
+    if async_db is None:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    return async_db
+
+
+def ping() -> bool:
+    """Readiness check: True when the cluster answers a ping."""
+    if client is None:
+        return False
+    try:
+        client.admin.command("ping")
+        return True
+    except Exception as e:
+        log.warning("MongoDB ping failed: %s", e)
+        return False
+
+
+def pool_stats() -> dict:
+    return pool_monitor.stats()
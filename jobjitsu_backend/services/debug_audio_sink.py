@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+# Opt-in capture of synthesized audio for debugging. Off by default; when
+# TTS_DEBUG_AUDIO_DIR is set, clips are queued and written by a background
+# task so request handlers never touch the disk. The queue is bounded (clips
+# are dropped when it is full) and the directory is pruned to the newest
+# files within the size/count caps.
+TTS_DEBUG_AUDIO_DIR = os.getenv("TTS_DEBUG_AUDIO_DIR", "")
+TTS_DEBUG_AUDIO_QUEUE_SIZE = int(os.getenv("TTS_DEBUG_AUDIO_QUEUE_SIZE", "32"))
+TTS_DEBUG_AUDIO_MAX_FILES = int(os.getenv("TTS_DEBUG_AUDIO_MAX_FILES", "50"))
+TTS_DEBUG_AUDIO_MAX_BYTES = int(os.getenv("TTS_DEBUG_AUDIO_MAX_BYTES", str(50 * 1024 * 1024)))
+
+
+class DebugAudioSink:
+    def __init__(self, directory: str, queue_size: int, max_files: int, max_bytes: int):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.queue_size = queue_size
+        self.written = 0
+        self.dropped = 0
+        self._queue = None
+        self._writer = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def start(self):
+        if not self.enabled or self._writer is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._writer = asyncio.create_task(self._write_loop(), name="debug-audio-sink")
+
+    async def stop(self):
+        if self._writer is None:
+            return
+        # Let queued clips flush, then stop the writer
+        await self._queue.join()
+        self._writer.cancel()
+        self._writer = None
+        self._queue = None
+
+    def submit(self, audio: bytes, label: str = "tts"):
+        """Queue a clip for writing; never blocks and never raises."""
+        if self._queue is None or not audio:
+            return
+        name = f"{label}_{datetime.utcnow():%Y%m%dT%H%M%S%f}_{uuid.uuid4().hex[:8]}.mp3"
+        try:
+            self._queue.put_nowait((name, audio))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _write_loop(self):
+        while True:
+            name, audio = await self._queue.get()
+            try:
+                await asyncio.to_thread(self._write, name, audio)
+                self.written += 1
+            except OSError as e:
+                log.warning("Debug audio sink failed to write %s: %s", name, e)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, name: str, audio: bytes):
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(audio)
+        self._prune()
+
+    def _prune(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+        total = 0
+        for index, (_, size, path) in enumerate(entries):
+            total += size
+            if index >= self.max_files or total > self.max_bytes:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+sink = DebugAudioSink(TTS_DEBUG_AUDIO_DIR, TTS_DEBUG_AUDIO_QUEUE_SIZE, TTS_DEBUG_AUDIO_MAX_FILES, TTS_DEBUG_AUDIO_MAX_BYTES)
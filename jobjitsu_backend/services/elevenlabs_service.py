@@ -1,99 +1,249 @@
 import os
+import functools
+import logging
 import httpx
 from dotenv import load_dotenv
 import time
-import json
-import traceback
-from datetime import datetime
+from services.tts_cache import cache as tts_cache, cache_key
+from services.debug_audio_sink import sink as debug_audio_sink
+from services.single_flight import SingleFlight
+from services.concurrency_limiter import AdaptiveLimiter, HeldStream, Overloaded
+from services import metrics
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
 # Choose a voice ID from ElevenLabs' voice library
 VOICE_ID = "XW70ikSsadUbinwLMZ5w" # Example voice 
+MODEL_ID = "eleven_multilingual_v2"  # or 'eleven_turbo_v2_5' for lower latency
+VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.5
+}
+
+# Connection pool settings for the shared HTTP client
+ELEVENLABS_HTTP2 = os.getenv("ELEVENLABS_HTTP2", "true").lower() in ("1", "true", "yes")
+ELEVENLABS_MAX_CONNECTIONS = int(os.getenv("ELEVENLABS_MAX_CONNECTIONS", "20"))
+ELEVENLABS_MAX_KEEPALIVE = int(os.getenv("ELEVENLABS_MAX_KEEPALIVE", "10"))
+ELEVENLABS_KEEPALIVE_EXPIRY = float(os.getenv("ELEVENLABS_KEEPALIVE_EXPIRY", "60"))
+ELEVENLABS_TIMEOUT = float(os.getenv("ELEVENLABS_TIMEOUT", "30"))
+ELEVENLABS_CONNECT_TIMEOUT = float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT", "5"))
+
+# Adaptive concurrency limit in front of the connection pool; see
+# services/concurrency_limiter.py. Latency is time to the response headers.
+limiter = AdaptiveLimiter(
+    "elevenlabs",
+    max_limit=ELEVENLABS_MAX_CONNECTIONS,
+    min_limit=int(os.getenv("ELEVENLABS_MIN_CONCURRENCY", "1")),
+    max_queue=int(os.getenv("ELEVENLABS_QUEUE_SIZE", "64")),
+    queue_timeout=float(os.getenv("ELEVENLABS_QUEUE_TIMEOUT_SECONDS", "5")),
+    latency_target=float(os.getenv("ELEVENLABS_LATENCY_TARGET_SECONDS", "5")),
+)
+
+_client = None
+
+
+def _build_client():
+    http2 = ELEVENLABS_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401  (httpx needs the h2 package for HTTP/2)
+        except ImportError:
+            log.warning("h2 not installed, ElevenLabs client falling back to HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        base_url=ELEVENLABS_BASE_URL,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=ELEVENLABS_MAX_CONNECTIONS,
+            max_keepalive_connections=ELEVENLABS_MAX_KEEPALIVE,
+            keepalive_expiry=ELEVENLABS_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(ELEVENLABS_TIMEOUT, connect=ELEVENLABS_CONNECT_TIMEOUT),
+    )
+
+
+async def start_client():
+    """Create the process-wide ElevenLabs client (called from the app lifespan)."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+async def close_client():
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client():
+    """Return the shared client, creating it lazily outside of the app lifespan."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+def _retry_after(response):
+    """Seconds from a Retry-After header, if the upstream sent a numeric one."""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _report(slot, response, operation: str):
+    if response.status_code in (429, 503):
+        slot.overloaded(_retry_after(response))
+    if response.status_code >= 400:
+        metrics.record_failure("elevenlabs", operation, response.status_code == 429)
+
+
+def _request_body(text: str) -> dict:
+    return {
+        "text": text,
+        "model_id": MODEL_ID,
+        "voice_settings": VOICE_SETTINGS
+    }
 
 
+async def cached_speech(text: str):
+    """Return already-synthesized audio for text from the cache, without calling ElevenLabs."""
+    if not text or not isinstance(text, str):
+        return None
+    return await tts_cache.get(cache_key(VOICE_ID, MODEL_ID, VOICE_SETTINGS, text))
+
+
+async def open_speech_stream(text: str):
+    """
+    Start a streaming synthesis against ElevenLabs' /stream endpoint.
+
+    The upstream status is checked before returning, so errors surface as
+    exceptions while the caller can still pick an HTTP status (Overloaded when
+    the limiter sheds the call). Returns a HeldStream of MP3 chunks, which
+    must be iterated to the end or aclose()d to free the limiter slot; a
+    fully relayed clip is also written to the TTS cache so later requests
+    (including range requests) are served from it.
+    """
+    url = f"/v1/text-to-speech/{VOICE_ID}/stream"
+    headers = {
+        "xi-api-key": ELEVENLABS_API_KEY,
+        "Content-Type": "application/json"
+    }
+    client = get_client()
+    request = client.build_request("POST", url, headers=headers, json=_request_body(text))
+    # The slot is held until the relay finishes, so streams count against the limit
+    slot = await limiter.acquire()
+    response = None
+    try:
+        with metrics.observe_upstream("elevenlabs", "stream"):  # time to the response headers
+            response = await client.send(request, stream=True)
+        slot.mark_response()
+        _report(slot, response, "stream")
+        response.raise_for_status()
+    except BaseException as e:
+        if isinstance(e, httpx.TimeoutException):
+            slot.overloaded()
+        if response is not None:
+            await response.aclose()
+        slot.release()
+        raise
+    return HeldStream(_relay_stream(response, cache_key(VOICE_ID, MODEL_ID, VOICE_SETTINGS, text), slot), slot)
+
+
+async def _relay_stream(response, key: str, slot):
+    chunks = [] if tts_cache.enabled else None
+    size = 0
+    try:
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if chunks is not None:
+                chunks.append(chunk)
+            yield chunk
+    finally:
+        slot.release()
+        await response.aclose()
+    # Only reached when the client consumed the whole stream
+    metrics.tts_audio_bytes.labels("stream").observe(size)
+    if chunks is not None:
+        audio = b"".join(chunks)
+        await tts_cache.put(key, audio)
+        debug_audio_sink.submit(audio, label="tts_stream")
+
 
 async def text_to_speech(text: str):
     """
     Calls the ElevenLabs API to convert text to speech.
-    Returns the audio content as bytes.
-    Includes detailed logs for debugging and reliability.
+    Returns the audio content as bytes, or None if synthesis failed. Raises
+    Overloaded when the limiter sheds the call, so callers can answer 503.
     """
     if not text or not isinstance(text, str):
-        print(f"[{datetime.utcnow()}] ❌ text_to_speech() - Invalid input text: {text}")
+        log.warning("text_to_speech() called with invalid text: %r", text)
         return None
 
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}"
+    key = cache_key(VOICE_ID, MODEL_ID, VOICE_SETTINGS, text)
+    cached = await tts_cache.get(key)
+    if cached is not None:
+        log.debug("TTS cache hit (%d bytes)", len(cached))
+        return cached
+
+    # Concurrent requests for the same clip share one synthesis
+    return await _flights.do(key, functools.partial(_synthesize, text, key))
+
+
+_flights = SingleFlight("tts")
+
+
+async def _synthesize(text: str, key: str):
+    url = f"/v1/text-to-speech/{VOICE_ID}"
     headers = {
         "xi-api-key": ELEVENLABS_API_KEY,
         "Content-Type": "application/json"
     }
-    data = {
-        "text": text,
-        "model_id": "eleven_multilingual_v2",  # or 'eleven_turbo_v2_5' for lower latency
-        "voice_settings": {
-            "stability": 0.5,
-            "similarity_boost": 0.5
-        }
-    }
-
-    print(f"\n[{datetime.utcnow()}] 🎙️ text_to_speech() called")
-    print(f"  ▶️ Text length: {len(text)} characters")
-    print(f"  ▶️ Using voice ID: {VOICE_ID}")
-    print(f"  ▶️ Model: {data['model_id']}")
-    print(f"  ▶️ Endpoint: {url}")
+    data = _request_body(text)
 
-    start_time = time.time()
+    log.debug("Synthesizing %d characters with voice %s, model %s", len(text), VOICE_ID, MODEL_ID)
+    start_time = time.perf_counter()
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, headers=headers, json=data)
-
-        duration = round(time.time() - start_time, 2)
-
-        # Log status and timing
-        print(f"  ⏱️ API call completed in {duration}s")
-        print(f"  📡 Response status: {response.status_code}")
+        async with limiter.slot() as slot:
+            try:
+                with metrics.observe_upstream("elevenlabs", "synthesize"):
+                    response = await get_client().post(url, headers=headers, json=data)
+            except httpx.TimeoutException:
+                slot.overloaded()
+                raise
+            _report(slot, response, "synthesize")
 
         # Raise if status is not OK
         response.raise_for_status()
 
-        # Log headers
-        content_type = response.headers.get("Content-Type", "unknown")
-        content_length = response.headers.get("Content-Length", "unknown")
-        print(f"  📦 Content-Type: {content_type}")
-        print(f"  🔊 Audio size: {content_length} bytes")
-
-        # Optionally save file locally (for debugging)
-        debug_audio_path = "debug_tts_output.mp3"
-        with open(debug_audio_path, "wb") as f:
-            f.write(response.content)
-        print(f"  💾 Audio written to {debug_audio_path}")
+        # Optionally capture the clip for debugging (off unless TTS_DEBUG_AUDIO_DIR is set)
+        debug_audio_sink.submit(response.content)
 
-        print(f"[{datetime.utcnow()}] ✅ text_to_speech() completed successfully\n")
+        await tts_cache.put(key, response.content)
+        metrics.tts_audio_bytes.labels("full").observe(len(response.content))
 
+        log.info("TTS synthesized %d bytes in %.2fs", len(response.content), time.perf_counter() - start_time)
         return response.content
 
+    except Overloaded as e:
+        log.warning("ElevenLabs call shed: %s", e)
+        raise
+
     except httpx.RequestError as e:
-        print(f"[{datetime.utcnow()}] 🚨 Network error contacting ElevenLabs API:")
-        print(f"  URL: {url}")
-        print(f"  Error: {e}")
-        print(traceback.format_exc())
+        log.warning("Network error contacting ElevenLabs at %s%s: %r", ELEVENLABS_BASE_URL, url, e)
 
     except httpx.HTTPStatusError as e:
-        print(f"[{datetime.utcnow()}] ⚠️ ElevenLabs returned HTTP error {e.response.status_code}")
-        try:
-            error_json = e.response.json()
-            print(f"  🔍 Error body: {json.dumps(error_json, indent=2)}")
-        except Exception:
-            print(f"  ⚠️ Non-JSON error response: {e.response.text}")
-        print(traceback.format_exc())
-
-    except Exception as e:
-        print(f"[{datetime.utcnow()}] ❌ Unexpected error in text_to_speech()")
-        print(f"  Error: {e}")
-        print(traceback.format_exc())
-
-    print(f"[{datetime.utcnow()}] ❗ Returning None due to error\n")
-    return None
\ No newline at end of file
+        log.warning("ElevenLabs returned HTTP %d: %s", e.response.status_code, e.response.text[:500])
+
+    except Exception:
+        log.exception("Unexpected error in text_to_speech()")
+
+    return None
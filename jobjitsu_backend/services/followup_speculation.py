@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from services.audio_prefetch import prefetch_followup_audio
+from services.gemini_service import generate_followup_async
+from services.session_tasks import registry
+
+log = logging.getLogger(__name__)
+
+# Speculative follow-up generation. Once all three answers are in, the
+# follow-up question (and its audio) is generated in the background and stored
+# on the session as speculative_followup, keyed by a hash of the answers it
+# was built from. POST /followup then uses the stored result, joins the task
+# if it is still running, and only calls Gemini itself when neither matches
+# the current answers. Saving an answer clears the stored result and replaces
+# the running task, so an edited answer never gets a stale follow-up.
+FOLLOWUP_SPECULATION_ENABLED = os.getenv("FOLLOWUP_SPECULATION_ENABLED", "true").lower() in ("1", "true", "yes")
+QUESTION_COUNT = 3
+FOLLOWUP_SLOT = "followup"
+
+stats = {"started": 0, "stored": 0, "hits": 0, "misses": 0, "failed": 0}
+
+
+def qa_pairs_from(questions: dict) -> list:
+    """(question, answer) pairs in order, for the questions present on the session."""
+    qa_pairs = []
+    for i in range(1, QUESTION_COUNT + 1):
+        question_key = f"question{i}"
+        answer_key = f"answer{i}"
+        if question_key in questions and answer_key in questions:
+            qa_pairs.append((questions[question_key], questions[answer_key]))
+    return qa_pairs
+
+
+def answers_key(qa_pairs: list) -> str:
+    return hashlib.sha256(json.dumps(qa_pairs).encode("utf-8")).hexdigest()[:32]
+
+
+def _all_answered(questions: dict) -> bool:
+    return all(str(questions.get(f"answer{i}") or "").strip() for i in range(1, QUESTION_COUNT + 1))
+
+
+def speculate_followup(repo, session_id: str, questions: dict):
+    """Called after an answer is saved: (re)start speculation, or drop it if an answer is missing."""
+    if not FOLLOWUP_SPECULATION_ENABLED or not isinstance(questions, dict):
+        return
+    if not _all_answered(questions):
+        registry.cancel(session_id, FOLLOWUP_SLOT)
+        return
+    qa_pairs = qa_pairs_from(questions)
+    stats["started"] += 1
+    registry.spawn(session_id, FOLLOWUP_SLOT, _speculate(repo, session_id, qa_pairs))
+
+
+async def _speculate(repo, session_id: str, qa_pairs: list):
+    key = answers_key(qa_pairs)
+    try:
+        question = (await generate_followup_async(qa_pairs)).question
+    except Exception:
+        stats["failed"] += 1
+        raise
+    prefetch_followup_audio(session_id, question)
+    answers = [answer for _, answer in qa_pairs]
+    if await repo.save_speculative_followup(session_id, answers, {"question": question, "answers_key": key}):
+        stats["stored"] += 1
+    return key, question
+
+
+async def speculative_followup(session_id: str, session: dict, qa_pairs: list):
+    """The speculated follow-up for exactly these answers (joining the task if running), or None."""
+    key = answers_key(qa_pairs)
+    stored = session.get("speculative_followup") or {}
+    if stored.get("answers_key") == key and stored.get("question"):
+        stats["hits"] += 1
+        registry.pop(session_id, FOLLOWUP_SLOT)
+        return stored["question"]
+
+    task = registry.get(session_id, FOLLOWUP_SLOT)
+    if task is not None:
+        try:
+            task_key, question = await asyncio.shield(task)
+            if task_key == key:
+                stats["hits"] += 1
+                registry.pop(session_id, FOLLOWUP_SLOT)
+                return question
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        except Exception as e:
+            log.warning("Speculative follow-up for session %s failed: %s", session_id, e)
+    stats["misses"] += 1
+    return None
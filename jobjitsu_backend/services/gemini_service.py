@@ -1,74 +1,608 @@
 import google.generativeai as genai
+import asyncio
+import functools
+import json
+import logging
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from google.api_core import exceptions as google_exceptions
+from services import metrics
+from services.concurrency_limiter import AdaptiveLimiter, HeldStream
+from services.single_flight import SingleFlight
+
+log = logging.getLogger(__name__)
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-def generate_questions(role: str, company: str):
-    prompt = f"""
-        You are a friendly recruiter, with a womens name, representing the company "{company}" for the role "{role}".
-        You are chatting with a student at a career fair — this is a casual, conversational exchange,
-        not a formal interview.
+# The google-generativeai client is synchronous, so calls made from async
+# handlers run on this bounded pool instead of the event loop. Its size is the
+# maximum number of Gemini requests a worker keeps in flight at once; extra
+# calls wait in the executor queue.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+_executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY, thread_name_prefix="gemini")
 
-        Generate exactly 3 realistic questions that a recruiter might ask during this kind of casual
-        career fair conversation. Keep the tone warm, natural, and engaging.
+# Adaptive limit below GEMINI_MAX_CONCURRENCY: it backs off on 429s and calls
+# slower than GEMINI_LATENCY_TARGET_SECONDS. Callers over the limit queue (at
+# most GEMINI_QUEUE_SIZE, for up to GEMINI_QUEUE_TIMEOUT_SECONDS) and are shed
+# with Overloaded (a 503) beyond that.
+limiter = AdaptiveLimiter(
+    "gemini",
+    max_limit=GEMINI_MAX_CONCURRENCY,
+    min_limit=int(os.getenv("GEMINI_MIN_CONCURRENCY", "1")),
+    max_queue=int(os.getenv("GEMINI_QUEUE_SIZE", "32")),
+    queue_timeout=float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "10")),
+    latency_target=float(os.getenv("GEMINI_LATENCY_TARGET_SECONDS", "8")),
+)
 
-        Respond **only** in valid JSON format. Do not include any text, comments, or explanations outside of the JSON.
 
-        The JSON must follow this exact structure:
+@dataclass
+class InterviewQuestions:
+    question1: str
+    question2: str
+    question3: str
 
-        {{
-        "question1": "Hi, my name is Bob! Tell me about yourself?",
-        "answer1": "",
-        "question2": "What interests you most about our company?",
-        "answer2": "",
-        "question3": "Are you currently working on any projects related to this field?",
-        "answer3": ""
-        }}
-    """
+    def as_session_questions(self) -> dict:
+        """The questions/answers layout stored on a session document."""
+        return {
+            "question1": self.question1, "answer1": "",
+            "question2": self.question2, "answer2": "",
+            "question3": self.question3, "answer3": "",
+        }
+
+
+@dataclass
+class FollowUp:
+    question: str
+
+
+@dataclass
+class Feedback:
+    score: float
+    description: str
+
+    def as_dict(self) -> dict:
+        return {"score": self.score, "description": self.description}
+
+
+class GeminiParseError(ValueError):
+    """Gemini's response could not be turned into the expected object."""
+
+
+# Gemini is asked for JSON matching these schemas (structured output), so a
+# response normally parses with a single json.loads. The regex repair chains
+# below only run when that fails; parse_counts records how often.
+QUESTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {f"question{i}": {"type": "string"} for i in (1, 2, 3)},
+    "required": ["question1", "question2", "question3"],
+}
+FOLLOWUP_SCHEMA = {
+    "type": "object",
+    "properties": {"followup_question": {"type": "string"}},
+    "required": ["followup_question"],
+}
+FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {"score": {"type": "integer"}, "description": {"type": "string"}},
+    "required": ["score", "description"],
+}
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {"summary": {"type": "string"}},
+    "required": ["summary"],
+}
+
+
+parse_counts = {kind: {"structured": 0, "repaired": 0, "failed": 0} for kind in ("questions", "followup", "feedback", "feedback_stream", "grade", "feedback_summary")}
+_parse_counts_lock = threading.Lock()
+
+
+def _count(kind: str, outcome: str):
+    with _parse_counts_lock:
+        parse_counts[kind][outcome] += 1
+
+
+def parse_stats() -> dict:
+    with _parse_counts_lock:
+        return {kind: dict(counts) for kind, counts in parse_counts.items()}
+
+
+def _parse_metrics():
+    samples = [({"kind": kind, "outcome": outcome}, count)
+               for kind, counts in parse_stats().items() for outcome, count in counts.items()]
+    return [("gemini_parse_results_total", "counter",
+             "Gemini responses by parse path: structured JSON, repaired by the fallback parsers, or failed.", samples)]
+
+
+metrics.register_collector(_parse_metrics)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _questions_from(data) -> InterviewQuestions:
+    questions = [data.get(f"question{i}") if isinstance(data, dict) else None for i in (1, 2, 3)]
+    if not all(isinstance(q, str) and q.strip() for q in questions):
+        raise GeminiParseError(f"expected question1..question3 strings, got {data!r}")
+    return InterviewQuestions(*(q.strip() for q in questions))
+
+
+def _followup_from(data) -> FollowUp:
+    question = data.get("followup_question") if isinstance(data, dict) else None
+    if not isinstance(question, str) or not question.strip():
+        raise GeminiParseError(f"expected a followup_question string, got {data!r}")
+    return FollowUp(question.strip())
+
+
+def _feedback_from(data) -> Feedback:
+    if not isinstance(data, dict) or not _is_number(data.get("score")) or not isinstance(data.get("description"), str):
+        raise GeminiParseError(f"expected score and description, got {data!r}")
+    return Feedback(data["score"], data["description"])
+
+
+def _summary_from(data) -> str:
+    summary = data.get("summary") if isinstance(data, dict) else None
+    if not isinstance(summary, str) or not summary.strip():
+        raise GeminiParseError(f"expected a summary string, got {data!r}")
+    return summary.strip()
+
+
+def _parse(kind: str, text: str, build, repair):
+    """Structured fast path, then the regex repair chain as a last resort."""
+    try:
+        result = build(json.loads(text))
+        _count(kind, "structured")
+        return result
+    except (ValueError, TypeError) as e:
+        log.warning("Gemini %s response was not schema-valid JSON (%s); falling back to repair", kind, e)
+    try:
+        result = repair(text)
+    except (ValueError, TypeError, KeyError) as e:
+        _count(kind, "failed")
+        raise GeminiParseError(f"Could not parse Gemini {kind} response: {e}") from e
+    _count(kind, "repaired")
+    return result
+
+
+def _strip_fences(text: str) -> str:
+    return re.sub(r"^```(?:json)?\n?|```$", "", text.strip(), flags=re.MULTILINE).strip()
+
+
+def _repair_questions(text: str) -> InterviewQuestions:
+    json_match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not json_match:
+        raise ValueError("No JSON object found in Gemini output.")
+    clean_output = json_match.group(0).strip()
+    # Fix missing commas between key-value pairs
+    # e.g. turns: "skill?"\n  "answer3" into "skill?",\n  "answer3"
+    clean_output = re.sub(r'"\s*([\r\n]+)\s*"', '", "', clean_output)
+    # Ensure JSON keys and values are properly separated by commas
+    clean_output = re.sub(r'"\s*"answer', '", "answer', clean_output)
+    return _questions_from(json.loads(clean_output))
+
+
+def _repair_followup(text: str) -> FollowUp:
+    # Extract the JSON portion only, in case Gemini added extra text
+    match = re.search(r"\{.*\}", _strip_fences(text), re.DOTALL)
+    if not match:
+        raise ValueError("No valid JSON object found in Gemini response.")
+    return _followup_from(json.loads(match.group(0)))
+
+
+def _description_from_text(raw: str) -> str:
+    match = re.search(r'"description":\s*"([^"]*(?:"[^"]*)*)"', raw, re.DOTALL)
+    return match.group(1) if match else raw
+
+
+def _repair_feedback(text: str) -> Feedback:
+    raw = _strip_fences(text)
+    try:
+        json_match = re.search(r"\{[\s\S]*\}", raw)
+        if json_match:
+            candidate = json_match.group(0).strip()
+            try:
+                feedback_data = json.loads(candidate)
+            except json.JSONDecodeError:
+                # Sometimes the JSON is double-encoded as a string; try to unescape
+                feedback_data = json.loads(candidate.encode('utf-8').decode('unicode_escape'))
+        else:
+            # No JSON object found; fall back to score extraction
+            feedback_data = {"score": extract_score(raw) or 5, "description": _description_from_text(raw)}
+
+        # If description itself still contains a JSON block, parse nested
+        desc = feedback_data.get("description")
+        if isinstance(desc, str):
+            desc_stripped = _strip_fences(desc)
+            nested_match = re.search(r"\{[\s\S]*\}", desc_stripped)
+            if nested_match:
+                try:
+                    nested = json.loads(nested_match.group(0))
+                    if isinstance(nested, dict):
+                        feedback_data["description"] = nested.get("description", desc_stripped)
+                        if _is_number(nested.get("score")):
+                            feedback_data["score"] = nested["score"]
+                except Exception:
+                    pass
+
+        # Normalize types
+        if not _is_number(feedback_data.get("score")):
+            feedback_data["score"] = extract_score(json.dumps(feedback_data)) or 5
+        if not isinstance(feedback_data.get("description"), str):
+            feedback_data["description"] = str(feedback_data.get("description", ""))
+    except Exception as e:
+        log.warning("Error parsing feedback response (robust): %s", e)
+        feedback_data = {"score": extract_score(raw) or 5, "description": _description_from_text(raw)}
+    return Feedback(feedback_data["score"], feedback_data["description"])
+
+
+def _repair_summary(text: str) -> str:
+    # Plain prose instead of JSON is still a usable summary
+    summary = _strip_fences(text).strip()
+    if not summary or summary.startswith("{"):
+        raise GeminiParseError(f"Could not parse summary from Gemini response: {text!r}")
+    return summary
+
+# Prompt templates. The static instructions go to Gemini as the model's
+# system_instruction, fixed when the model is built; each call only renders
+# and sends the short per-request part.
+QUESTIONS_SYSTEM_INSTRUCTION = """
+You are a friendly recruiter, with a womens name, representing a company at a career fair.
+You are chatting with a student — this is a casual, conversational exchange,
+not a formal interview. The company and role are given in each request.
+
+Generate exactly 3 realistic questions that a recruiter might ask during this kind of casual
+career fair conversation. Keep the tone warm, natural, and engaging.
+
+Respond **only** in valid JSON format. Do not include any text, comments, or explanations outside of the JSON.
+
+The JSON must follow this exact structure:
+
+{
+"question1": "Hi, my name is Bob! Tell me about yourself?",
+"question2": "What interests you most about our company?",
+"question3": "Are you currently working on any projects related to this field?"
+}
+""".strip()
+QUESTIONS_TEMPLATE = 'You are representing the company "{company}" for the role "{role}".'
+
+FOLLOWUP_SYSTEM_INSTRUCTION = """
+You are a friendly recruiter continuing a casual conversation with a student at a career fair.
+Each request contains the exchange so far.
+
+Based on their most recent answers, ask ONE short, natural, and engaging follow-up question
+that builds on what they just said. Avoid repeating or rephrasing previous questions,
+and keep it conversational, like you're chatting at your company's booth — not a formal interview.
+
+Respond ONLY in valid JSON format (no extra text or explanations).
+Follow this exact structure:
+
+{
+  "followup_question": "That’s awesome! What inspired you to start that project?"
+}
+""".strip()
+FOLLOWUP_TEMPLATE = "Here is the exchange so far:\n\n{transcript}"
 
-    model = genai.GenerativeModel("gemini-2.0-flash-001")
-    response = model.generate_content(prompt)
+FEEDBACK_SYSTEM_INSTRUCTION = """
+Each request contains a mock interview transcript. Based on it, provide:
+- A numerical score (1–10)
+- Constructive feedback: what went well, what to improve.
+Put it in this json format:
+"score": integer, "description": "<description>"
+Make sure the description is formatted so it gives overall feedback and then a breakdown of each question and answer
+""".strip()
+FEEDBACK_TEMPLATE = "{transcript}"
+
+# The streamed variant is plain text so the description can be shown as it is
+# generated; the score comes last, on its own line, and is parsed at the end.
+FEEDBACK_STREAM_SYSTEM_INSTRUCTION = """
+Each request contains a mock interview transcript. Based on it, write constructive feedback:
+what went well and what to improve. Give overall feedback first, then a breakdown of each
+question and answer. Write plain text, not JSON.
+End with a final line of exactly this form, with a score from 1 to 10:
+Score: <score>/10
+""".strip()
+
+# Incremental grading: each answer is graded on its own as soon as it is
+# submitted, and the final feedback only adds a short summary on top of the
+# per-question grades (see services/answer_grading.py).
+GRADE_SYSTEM_INSTRUCTION = """
+Each request contains one question from a mock interview (a casual career fair conversation
+with a recruiter) and the student's answer to it. Grade that answer on its own:
+- A numerical score (1–10)
+- Two or three sentences of constructive feedback: what went well, what to improve.
+Put it in this json format:
+"score": integer, "description": "<description>"
+""".strip()
+GRADE_TEMPLATE = "Q: {question}\nA: {answer}"
+
+FEEDBACK_SUMMARY_SYSTEM_INSTRUCTION = """
+Each request contains a mock interview transcript in which every answer has already been
+graded, with its score and notes. Write a short overall summary of the interview in three or
+four sentences: the overall impression, the strongest point and the most important thing to
+improve. Do not repeat the per-question breakdown.
+Put it in this json format:
+"summary": "<summary>"
+""".strip()
+
+
+@dataclass(frozen=True)
+class PromptSpec:
+    system_instruction: str
+    template: str
+    schema: dict  # None for free-text output
+    default_max_output_tokens: int
+
+
+PROMPTS = {
+    "questions": PromptSpec(QUESTIONS_SYSTEM_INSTRUCTION, QUESTIONS_TEMPLATE, QUESTIONS_SCHEMA, 512),
+    "followup": PromptSpec(FOLLOWUP_SYSTEM_INSTRUCTION, FOLLOWUP_TEMPLATE, FOLLOWUP_SCHEMA, 256),
+    "feedback": PromptSpec(FEEDBACK_SYSTEM_INSTRUCTION, FEEDBACK_TEMPLATE, FEEDBACK_SCHEMA, 2048),
+    "feedback_stream": PromptSpec(FEEDBACK_STREAM_SYSTEM_INSTRUCTION, FEEDBACK_TEMPLATE, None, 2048),
+    "grade": PromptSpec(GRADE_SYSTEM_INSTRUCTION, GRADE_TEMPLATE, FEEDBACK_SCHEMA, 512),
+    "feedback_summary": PromptSpec(FEEDBACK_SUMMARY_SYSTEM_INSTRUCTION, FEEDBACK_TEMPLATE, SUMMARY_SCHEMA, 384),
+}
+
+# Model settings. GEMINI_MODEL / GEMINI_TEMPERATURE / GEMINI_MAX_OUTPUT_TOKENS
+# apply to every prompt type; GEMINI_<TYPE>_... (e.g. GEMINI_FEEDBACK_TEMPERATURE)
+# overrides one. An unset temperature uses the model's default.
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-001")
+
+
+def _setting(kind: str, name: str, default=None):
+    return os.getenv(f"GEMINI_{kind.upper()}_{name}", os.getenv(f"GEMINI_{name}", default))
+
+
+def model_settings(kind: str) -> dict:
+    temperature = _setting(kind, "TEMPERATURE")
+    return {
+        "model_name": _setting(kind, "MODEL", GEMINI_MODEL),
+        "temperature": float(temperature) if temperature is not None else None,
+        "max_output_tokens": int(_setting(kind, "MAX_OUTPUT_TOKENS", PROMPTS[kind].default_max_output_tokens)),
+    }
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def init_models():
+    """Build one GenerativeModel per prompt type. Called once from the app lifespan."""
+    with _models_lock:
+        if _models:
+            return
+        for kind, spec in PROMPTS.items():
+            settings = model_settings(kind)
+            _models[kind] = genai.GenerativeModel(
+                settings["model_name"],
+                system_instruction=spec.system_instruction,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json" if spec.schema else "text/plain",
+                    response_schema=spec.schema,
+                    temperature=settings["temperature"],
+                    max_output_tokens=settings["max_output_tokens"],
+                ),
+            )
+            log.info("Gemini model ready for %s: %s", kind, settings)
+
+
+_RATE_LIMITED = (google_exceptions.TooManyRequests,)
+
+
+def _generate(kind: str, **fields) -> str:
+    if not _models:
+        init_models()  # scripts and benchmarks that skip the app lifespan
+    prompt = PROMPTS[kind].template.format(**fields)
+    metrics.gemini_prompt_chars.labels(kind).observe(len(prompt))
+    with metrics.observe_upstream("gemini", kind, _RATE_LIMITED):
+        response = _models[kind].generate_content(prompt)
     return response.text
 
-def generate_followup(qa_history: list):
-    joined = "\n".join([f"Q: {q}\nA: {a}" for q, a in qa_history])
-    prompt = f"""
-    You are a friendly recruiter continuing a casual conversation with a student at a career fair.
-    Here is the exchange so far:
 
-    {joined}
+def _transcript(qa_history: list) -> str:
+    return "\n".join([f"Q: {q}\nA: {a}" for q, a in qa_history])
+
+
+def generate_questions(role: str, company: str) -> InterviewQuestions:
+    text = _generate("questions", role=role, company=company)
+    return _parse("questions", text, _questions_from, _repair_questions)
+
+def generate_followup(qa_history: list) -> FollowUp:
+    text = _generate("followup", transcript=_transcript(qa_history))
+    return _parse("followup", text, _followup_from, _repair_followup)
+
+def generate_feedback(qa_history: list) -> Feedback:
+    text = _generate("feedback", transcript=_transcript(qa_history))
+    return _parse("feedback", text, _feedback_from, _repair_feedback)
+
+def generate_grade(question: str, answer: str) -> Feedback:
+    text = _generate("grade", question=question, answer=answer)
+    return _parse("grade", text, _feedback_from, _repair_feedback)
+
+def _graded_transcript(graded: list) -> str:
+    return "\n\n".join(f"Q: {q}\nA: {a}\nScore: {grade.score}/10\nNotes: {grade.description}" for q, a, grade in graded)
+
+def generate_feedback_summary(graded: list) -> str:
+    """Overall summary for (question, answer, Feedback) triples that are already graded."""
+    text = _generate("feedback_summary", transcript=_graded_transcript(graded))
+    return _parse("feedback_summary", text, _summary_from, _repair_summary)
+
+_SCORE_LINE = re.compile(r"\n?[ \t*#]*score[ \t*]*:[ \t*]*(\d+(?:\.\d+)?)(?:[ \t]*/[ \t]*10)?[ \t*.]*\s*$", re.IGNORECASE)
 
-    Based on their most recent answers, ask ONE short, natural, and engaging follow-up question
-    that builds on what they just said. Avoid repeating or rephrasing previous questions,
-    and keep it conversational, like you're chatting at your company's booth — not a formal interview.
 
-    Respond ONLY in valid JSON format (no extra text or explanations).
-    Follow this exact structure:
+def parse_streamed_feedback(text: str) -> Feedback:
+    """Split a finished feedback stream into the description and its trailing "Score: N/10" line."""
+    match = _SCORE_LINE.search(text)
+    if match:
+        _count("feedback_stream", "structured")
+        score = float(match.group(1))
+        return Feedback(int(score) if score.is_integer() else score, text[:match.start()].strip())
+    _count("feedback_stream", "repaired")
+    return Feedback(extract_score(text), text.strip())
 
-    {{
-      "followup_question": "That’s awesome! What inspired you to start that project?",
-      "followup_answer": ""
-    }}
+
+def extract_score(feedback_text: str) -> float:
+    """Extract numerical score from feedback text"""
+    # Look for patterns like "8.5/10", "Score: 7", etc.
+    score_patterns = [
+        r'(\d+(?:\.\d+)?)/10',
+        r'Score:\s*(\d+(?:\.\d+)?)',
+        r'score[:\s]*(\d+(?:\.\d+)?)',
+        r'(\d+(?:\.\d+)?)\s*out\s*of\s*10',
+        r'["\']?score["\']?[:\s]*(\d+(?:\.\d+)?)'
+    ]
+
+    for pattern in score_patterns:
+        match = re.search(pattern, feedback_text, re.IGNORECASE)
+        if match:
+            return float(match.group(1))
+
+    # Default score if no pattern found
+    return 5.0
+
+
+async def _run_in_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    async with limiter.slot() as slot:
+        try:
+            return await loop.run_in_executor(_executor, functools.partial(func, *args))
+        except (google_exceptions.TooManyRequests, google_exceptions.ServiceUnavailable,
+                google_exceptions.DeadlineExceeded):
+            slot.overloaded()
+            raise
+
+# Identical prompts in flight at the same moment (a class starting the same
+# company/role together) share one Gemini call.
+_flights = SingleFlight("gemini")
+
+async def generate_questions_async(role: str, company: str, coalesce: bool = True):
+    """
+    Async variant of generate_questions that does not block the event loop.
+    Pass coalesce=False to force a separate call (e.g. to get a distinct set).
+    """
+    call = functools.partial(_run_in_executor, generate_questions, role, company)
+    if not coalesce:
+        return await call()
+    return await _flights.do(("questions", role, company), call)
+
+async def generate_followup_async(qa_history: list):
+    """Async variant of generate_followup that does not block the event loop."""
+    key = ("followup", tuple(map(tuple, qa_history)))
+    return await _flights.do(key, functools.partial(_run_in_executor, generate_followup, qa_history))
+
+async def generate_feedback_async(qa_history: list):
+    """Async variant of generate_feedback that does not block the event loop."""
+    key = ("feedback", tuple(map(tuple, qa_history)))
+    return await _flights.do(key, functools.partial(_run_in_executor, generate_feedback, qa_history))
+
+async def generate_grade_async(question: str, answer: str):
+    """Async variant of generate_grade that does not block the event loop."""
+    key = ("grade", question, answer)
+    return await _flights.do(key, functools.partial(_run_in_executor, generate_grade, question, answer))
+
+async def generate_feedback_summary_async(graded: list):
+    """Async variant of generate_feedback_summary that does not block the event loop."""
+    return await _run_in_executor(generate_feedback_summary, graded)
+
+_STREAM_END = object()
+
+
+def _chunk_text(chunk) -> str:
     """
-    model = genai.GenerativeModel("gemini-2.0-flash-001")
-    response = model.generate_content(prompt)
-    return response.text.strip()
-
-def generate_feedback(qa_history: list):
-    joined = "\n".join([f"Q: {q}\nA: {a}" for q, a in qa_history])
-    prompt = f"""Based on this mock interview, provide:
-    - A numerical score (1–10)
-    - Constructive feedback: what went well, what to improve.
-    {joined} 
-    put it in this json format:
-    "score": integer, "description": "<description>"
-    Make sure the description is formatted so it gives overall feedback and then a breakdown of each question and answer
+    Text of one streamed chunk. chunk.text raises ValueError for chunks without
+    parts (e.g. the final one carrying only finish_reason), so read the parts.
     """
-    model = genai.GenerativeModel("gemini-2.0-flash-001")
-    response = model.generate_content(prompt)
-    return response.text.strip()
+    candidates = getattr(chunk, "candidates", None)
+    if candidates is None:
+        return getattr(chunk, "text", "") or ""  # objects that only expose .text
+    if not candidates or not candidates[0].content or not candidates[0].content.parts:
+        return ""
+    return "".join(getattr(part, "text", "") or "" for part in candidates[0].content.parts)
+
+
+async def open_feedback_stream(qa_history: list):
+    """
+    Start a streamed feedback generation and return a HeldStream of text
+    deltas (iterate it to the end or aclose() it). The limiter slot is taken
+    up front, so a shed call raises Overloaded here, before the caller has
+    sent any response. Join the deltas and pass them to
+    parse_streamed_feedback once the iterator is exhausted.
+    """
+    slot = await limiter.acquire()
+    return HeldStream(_relay_feedback_stream(_transcript(qa_history), slot), slot)
+
+
+_OVERLOAD_ERRORS = (google_exceptions.TooManyRequests, google_exceptions.ServiceUnavailable,
+                    google_exceptions.DeadlineExceeded)
+
+
+async def _relay_feedback_stream(transcript: str, slot):
+    loop = asyncio.get_running_loop()
+    deltas = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(deltas.put_nowait, item)
+        except RuntimeError:
+            stop.set()  # the event loop is gone
+
+    def finish(error):
+        # On the event loop, once the producer has given its pool thread back
+        if isinstance(error, _OVERLOAD_ERRORS):
+            slot.overloaded()
+        slot.release()
+
+    def produce():
+        # Runs on the Gemini pool; hands each chunk back to the event loop.
+        # The slot is released when this returns, not when the client goes:
+        # Gemini's iterator only notices stop at its next chunk, and until
+        # then this call still occupies a pool thread.
+        error = None
+        try:
+            if not _models:
+                init_models()
+            prompt = PROMPTS["feedback_stream"].template.format(transcript=transcript)
+            metrics.gemini_prompt_chars.labels("feedback_stream").observe(len(prompt))
+            with metrics.observe_upstream("gemini", "feedback_stream", _RATE_LIMITED):
+                response = _models["feedback_stream"].generate_content(prompt, stream=True)
+                for chunk in response:
+                    if stop.is_set():
+                        break
+                    text = _chunk_text(chunk)
+                    if text:
+                        put(text)
+        except Exception as e:
+            error = e
+            put(e)
+        finally:
+            put(_STREAM_END)
+            try:
+                loop.call_soon_threadsafe(finish, error)
+            except RuntimeError:
+                pass  # the event loop is gone
+
+    try:
+        loop.run_in_executor(_executor, produce)
+    except BaseException:
+        slot.release()
+        raise
+    try:
+        while True:
+            item = await deltas.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            slot.mark_response()  # latency to the first token
+            yield item
+    finally:
+        # Client gone or stream done: tell the producer to stop reading chunks
+        stop.set()
 
-def extract_score(feedback_text: str):
-    match = re.search(r"(\d+)", feedback_text)
-    return int(match.group(1)) if match else None
\ No newline at end of file
+def shutdown_executor():
+    """Stop the Gemini worker threads (called from the app lifespan)."""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure
+
+log = logging.getLogger(__name__)
+
+# Indexes backing the hot queries. create_indexes is idempotent, so this runs
+# on every startup; changing an existing index's options needs a manual drop.
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() in ("1", "true", "yes")
+MONGO_PLAN_CHECK = os.getenv("MONGO_PLAN_CHECK", "true").lower() in ("1", "true", "yes")
+
+INDEXES = {
+    "sessions": [
+        # /user/stats and paged session history: user's sessions, newest first;
+        # _id is the keyset tiebreaker
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_id_created_at_id"),
+        # user's sessions filtered by status
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)], name="user_id_status_created_at"),
+        # get_active_sessions / get_completed_sessions pages
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="status_created_at_id"),
+    ],
+    "question_bank": [
+        # start_session claims the least-used fresh set for a (company, role) key
+        IndexModel([("key", ASCENDING), ("uses", ASCENDING), ("created_at", DESCENDING)], name="key_uses_created_at"),
+    ],
+    "users": [
+        # signup and sync-user look users up by email
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+}
+
+# (collection, description, filter, sort) for every query that must be index-backed
+HOT_QUERIES = [
+    ("sessions", "sessions by user, newest first", {"user_id": "__plan_check__"}, [("created_at", DESCENDING)]),
+    ("sessions", "sessions by user and status", {"user_id": "__plan_check__", "status": "active"}, [("created_at", DESCENDING)]),
+    ("sessions", "sessions by status", {"status": "active"}, [("created_at", ASCENDING)]),
+    ("sessions", "session history page", {"user_id": "__plan_check__"}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("sessions", "sessions by status page", {"status": "active"}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("question_bank", "fresh question sets by key", {"key": "__plan_check__", "uses": {"$lt": 1}}, [("uses", ASCENDING), ("created_at", DESCENDING)]),
+    ("users", "user by email", {"email": "__plan_check__"}, None),
+]
+
+
+class QueryPlanError(RuntimeError):
+    """A hot query is not served by an index."""
+
+
+async def ensure_indexes(db):
+    """Create all indexes (no-op for ones that already exist)."""
+    for collection, models in INDEXES.items():
+        names = await db[collection].create_indexes(models)
+        log.info("Indexes ready on %s: %s", collection, ", ".join(names))
+
+
+def _plan_stages(plan):
+    """Every 'stage' name in an explain plan tree, across classic and SBE formats."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def check_query_plans(db):
+    """Explain each hot query and raise QueryPlanError if any winning plan uses COLLSCAN."""
+    failures = []
+    for collection, description, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning)
+        if "COLLSCAN" in stages:
+            failures.append(f"{collection}: {description} -> {' > '.join(stages)}")
+    if failures:
+        raise QueryPlanError("Hot queries fall back to COLLSCAN:\n  " + "\n  ".join(failures))
+    log.info("Query plan check passed for %d hot queries", len(HOT_QUERIES))
+
+
+async def bootstrap(db):
+    """
+    Startup hook: ensure indexes, then verify query plans.
+
+    An unreachable cluster is logged and skipped (/ready reports it). Anything
+    else is raised so the app does not start: a plan check failure, or an
+    index that cannot be built (e.g. duplicate emails for email_unique).
+    """
+    if db is None:
+        return
+    try:
+        if MONGO_ENSURE_INDEXES:
+            await ensure_indexes(db)
+        if MONGO_PLAN_CHECK:
+            await check_query_plans(db)
+    except ConnectionFailure as e:  # includes ServerSelectionTimeoutError
+        log.warning("Index bootstrap skipped, MongoDB unavailable: %s", e)
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services import database
+
+    async def _run():
+        database.connect()
+        await ensure_indexes(database.async_db)
+        await check_query_plans(database.async_db)
+        database.close()
+
+    asyncio.run(_run())
@@ -0,0 +1,301 @@
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+
+# Prometheus-style metrics, served as text by GET /metrics.
+#
+# Recording never takes a lock: every metric child keeps one small list of
+# counts per thread (the event loop, the Gemini pool, Motor's and Supabase's
+# worker threads), created on the thread's first use, and only that thread
+# writes to it. A scrape sums the per-thread lists. Histograms have fixed
+# buckets, so an observation is one bisect and two list increments.
+# Stats other modules already keep (parse outcomes, limiters) are read when
+# /metrics is scraped instead of being counted twice.
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+# From MongoDB point reads (milliseconds) to whole-transcript Gemini calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CHARS_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+BYTES_BUCKETS = (1024, 8192, 32768, 65536, 131072, 262144, 524288, 1048576, 4194304)
+
+_metrics = []
+_collectors = []
+
+
+class _Child:
+    """One labelled series: per-thread lists of counts, summed when scraped."""
+
+    __slots__ = ("_size", "_local", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> list:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = [0] * self._size
+            with self._lock:  # once per thread, not per observation
+                self._shards.append(shard)
+            return shard
+
+    def totals(self) -> list:
+        totals = [0] * self._size
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild(_Child):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount=1):
+        self._shard()[0] += amount
+
+
+class _GaugeChild(_Child):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount=1):
+        self._shard()[0] += amount
+
+    def dec(self, amount=1):
+        self._shard()[0] -= amount
+
+
+class _HistogramChild(_Child):
+    __slots__ = ("_bounds",)
+
+    def __init__(self, bounds: tuple):
+        super().__init__(len(bounds) + 2)  # one count per bucket, +Inf, then the sum
+        self._bounds = bounds
+
+    def observe(self, value):
+        shard = self._shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        _metrics.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield from self._child_samples(dict(zip(self.labelnames, values)), child.totals())
+
+    def _child_samples(self, labels: dict, totals: list):
+        yield self.name, labels, totals[0]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _child_samples(self, labels: dict, totals: list):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), totals):
+            cumulative += count
+            yield f"{self.name}_bucket", {**labels, "le": bound}, cumulative
+        yield f"{self.name}_count", labels, cumulative
+        yield f"{self.name}_sum", labels, totals[-1]
+
+
+def register_collector(collect):
+    """collect() -> [(name, kind, documentation, [(labels, value), ...])], called on every scrape."""
+    _collectors.append(collect)
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = _format_value(value) if isinstance(value, (int, float)) else str(value)
+        value = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _family(lines: list, name: str, kind: str, documentation: str, samples):
+    lines.append(f"# HELP {name} {documentation}")
+    lines.append(f"# TYPE {name} {kind}")
+    for sample_name, labels, value in samples:
+        lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        _family(lines, metric.name, metric.kind, metric.documentation, metric.samples())
+    for collect in _collectors:
+        for name, kind, documentation, values in collect():
+            _family(lines, name, kind, documentation, ((name, labels, value) for labels, value in values))
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+http_requests_in_flight = Gauge("http_requests_in_flight", "Requests being handled, by route.", ("method", "route"))
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte, by route.",
+    ("method", "route", "status"))
+
+# Upstream services (gemini, elevenlabs, supabase, mongodb)
+upstream_duration = Histogram(
+    "upstream_request_duration_seconds", "Latency of calls to upstream services.", ("upstream", "operation"))
+upstream_errors = Counter(
+    "upstream_errors_total", "Failed upstream calls, including rate-limited ones.", ("upstream", "operation"))
+upstream_rate_limited = Counter(
+    "upstream_rate_limited_total", "Upstream calls rejected with 429 / resource exhausted.", ("upstream", "operation"))
+
+# Payload sizes
+gemini_prompt_chars = Histogram(
+    "gemini_prompt_chars", "Characters of per-request prompt sent to Gemini (system instructions excluded).",
+    ("kind",), CHARS_BUCKETS)
+tts_audio_bytes = Histogram("tts_audio_bytes", "Bytes of audio per ElevenLabs synthesis.", ("mode",), BYTES_BUCKETS)
+
+
+class observe_upstream:
+    """
+    Context manager timing a block as one upstream call. Exceptions count as
+    errors, and also as 429s when they are one of the rate_limited types or
+    carry a 429 status.
+    """
+
+    __slots__ = ("upstream", "operation", "rate_limited", "started")
+
+    def __init__(self, upstream: str, operation: str, rate_limited: tuple = ()):
+        self.upstream = upstream
+        self.operation = operation
+        self.rate_limited = rate_limited
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        upstream_duration.labels(self.upstream, self.operation).observe(time.perf_counter() - self.started)
+        if exc is not None:
+            record_failure(self.upstream, self.operation,
+                           isinstance(exc, self.rate_limited) or getattr(exc, "status", None) == 429)
+        return False
+
+
+def record_failure(upstream: str, operation: str, rate_limited: bool = False):
+    upstream_errors.labels(upstream, operation).inc()
+    if rate_limited:
+        upstream_rate_limited.labels(upstream, operation).inc()
+
+
+_unnamed_groups = re.compile(r"\(\?P<\w+>")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording in-flight requests and latency per route
+    template (e.g. /api/session/{session_id}/next), so ids never become
+    label values. Requests matching no route share the "unmatched" label.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes  # the app's live route list
+        self._matcher = None
+        self._templates = []
+        self._routes_seen = -1
+
+    def _route_of(self, path: str) -> str:
+        # All route patterns compiled into one alternation, so the lookup is a
+        # single regex match; rebuilt if routes were added. The method is its
+        # own label, so routes sharing a path share a template.
+        if self._routes_seen != len(self.routes):
+            self._templates = list(dict.fromkeys(route.path for route in self.routes if hasattr(route, "path_regex")))
+            patterns = {route.path: route.path_regex.pattern for route in self.routes if hasattr(route, "path_regex")}
+            self._matcher = re.compile("|".join(
+                f"(?P<r{i}>{_unnamed_groups.sub('(?:', patterns[template])})" for i, template in enumerate(self._templates)))
+            self._routes_seen = len(self.routes)
+        match = self._matcher.match(path) if self._templates else None
+        if match is None:
+            return "unmatched"
+        return self._templates[int(match.lastgroup[1:])]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route = self._route_of(scope["path"])
+        in_flight = http_requests_in_flight.labels(method, route)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            http_request_duration.labels(method, route, str(status)).observe(time.perf_counter() - started)
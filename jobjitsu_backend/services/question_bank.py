@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from fastapi import Depends
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from services.database import get_async_db
+from services.gemini_service import InterviewQuestions, generate_questions_async
+
+log = logging.getLogger(__name__)
+
+# Pre-generated question sets keyed by normalized (company, role). Each set is
+# served to at most QUESTION_BANK_MAX_USES sessions and expires after
+# QUESTION_BANK_MAX_AGE_SECONDS, so candidates keep seeing fresh questions.
+# A background refresher keeps QUESTION_BANK_SETS_PER_KEY fresh sets for the
+# most requested keys; a miss falls through to Gemini and feeds the bank.
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() in ("1", "true", "yes")
+QUESTION_BANK_SETS_PER_KEY = int(os.getenv("QUESTION_BANK_SETS_PER_KEY", "5"))
+QUESTION_BANK_MAX_USES = int(os.getenv("QUESTION_BANK_MAX_USES", "3"))
+QUESTION_BANK_MAX_AGE_SECONDS = float(os.getenv("QUESTION_BANK_MAX_AGE_SECONDS", "86400"))
+QUESTION_BANK_HOT_KEYS = int(os.getenv("QUESTION_BANK_HOT_KEYS", "20"))
+QUESTION_BANK_HOT_WINDOW_SECONDS = float(os.getenv("QUESTION_BANK_HOT_WINDOW_SECONDS", "3600"))
+QUESTION_BANK_HOT_MIN_REQUESTS = int(os.getenv("QUESTION_BANK_HOT_MIN_REQUESTS", "2"))
+QUESTION_BANK_REFRESH_SECONDS = float(os.getenv("QUESTION_BANK_REFRESH_SECONDS", "60"))
+QUESTION_BANK_MAX_GENERATE_PER_CYCLE = int(os.getenv("QUESTION_BANK_MAX_GENERATE_PER_CYCLE", "10"))
+# Always-hot keys, e.g. "Google:Software Engineer;Amazon:Data Analyst"
+QUESTION_BANK_SEED_KEYS = os.getenv("QUESTION_BANK_SEED_KEYS", "")
+
+ROLE_ALIASES = {
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "software developer": "software engineer",
+    "pm": "product manager",
+    "ds": "data scientist",
+}
+
+stats = {"hits": 0, "misses": 0, "stored": 0, "generated": 0, "pruned": 0, "refresh_errors": 0}
+
+
+def _normalize(value) -> str:
+    value = re.sub(r"[^\w\s&+#-]", " ", str(value or "").lower())
+    return " ".join(value.split())
+
+
+def bank_key(company: str, role: str) -> str:
+    """Normalized key shared by spelling variants ("Google / SWE" == "google / software engineer")."""
+    role = _normalize(role)
+    return f"{_normalize(company)}|{ROLE_ALIASES.get(role, role)}"
+
+
+def _fresh_filter(key: str) -> dict:
+    cutoff = datetime.utcnow() - timedelta(seconds=QUESTION_BANK_MAX_AGE_SECONDS)
+    return {"key": key, "uses": {"$lt": QUESTION_BANK_MAX_USES}, "created_at": {"$gte": cutoff}}
+
+
+class QuestionBank:
+    """
+    Question sets in the question_bank collection. Failures are logged and
+    treated as a miss: the bank is an accelerator, never a dependency.
+    """
+
+    def __init__(self, db):
+        self.collection = db.question_bank
+
+    async def take(self, company: str, role: str):
+        """Claim one use of the least-used fresh set for this key, or None."""
+        if not QUESTION_BANK_ENABLED:
+            return None
+        hot_keys.record(company, role)
+        try:
+            doc = await self.collection.find_one_and_update(
+                _fresh_filter(bank_key(company, role)),
+                {"$inc": {"uses": 1}},
+                sort=[("uses", 1), ("created_at", -1)],
+                projection={"questions": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError as e:
+            log.warning("Question bank lookup failed: %s", e)
+            return None
+        stats["hits" if doc else "misses"] += 1
+        return InterviewQuestions(**doc["questions"]) if doc else None
+
+    async def add(self, company: str, role: str, questions: InterviewQuestions, uses: int = 0):
+        if not QUESTION_BANK_ENABLED:
+            return
+        try:
+            await self.collection.insert_one({
+                "key": bank_key(company, role),
+                "company": company,
+                "role": role,
+                "questions": {
+                    "question1": questions.question1,
+                    "question2": questions.question2,
+                    "question3": questions.question3,
+                },
+                "uses": uses,
+                "created_at": datetime.utcnow(),
+            })
+            stats["stored"] += 1
+        except PyMongoError as e:
+            log.warning("Question bank insert failed: %s", e)
+
+    async def fresh_count(self, company: str, role: str) -> int:
+        return await self.collection.count_documents(_fresh_filter(bank_key(company, role)))
+
+    async def prune(self) -> int:
+        """Delete used-up and expired sets."""
+        cutoff = datetime.utcnow() - timedelta(seconds=QUESTION_BANK_MAX_AGE_SECONDS)
+        result = await self.collection.delete_many(
+            {"$or": [{"uses": {"$gte": QUESTION_BANK_MAX_USES}}, {"created_at": {"$lt": cutoff}}]}
+        )
+        return result.deleted_count
+
+
+class HotKeys:
+    """Recently requested (company, role) pairs, most requested first."""
+
+    def __init__(self, window_seconds: float, min_requests: int, seeds: str = ""):
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self._keys = {}
+        self._seeds = {}
+        for pair in filter(None, (p.strip() for p in seeds.split(";"))):
+            company, _, role = pair.partition(":")
+            if company.strip() and role.strip():
+                self._seeds[bank_key(company, role)] = (company.strip(), role.strip())
+
+    def record(self, company: str, role: str):
+        key = bank_key(company, role)
+        _, _, hits = self._keys.get(key, (None, 0, 0))
+        self._keys[key] = ((company, role), time.monotonic(), hits + 1)
+
+    def hot(self, limit: int) -> list:
+        """(company, role) display names for up to `limit` hot keys, seeds first."""
+        cutoff = time.monotonic() - self.window_seconds
+        self._keys = {k: v for k, v in self._keys.items() if v[1] >= cutoff}
+        ranked = sorted(self._keys.items(), key=lambda item: item[1][2], reverse=True)
+        pairs = dict(self._seeds)
+        for key, (names, _, hits) in ranked:
+            if len(pairs) >= limit or hits < self.min_requests:
+                break
+            pairs.setdefault(key, names)
+        return list(pairs.values())[:max(limit, len(self._seeds))]
+
+
+class QuestionBankRefresher:
+    """Background loop that tops up fresh sets for hot keys and prunes stale ones."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task = None
+
+    async def refresh_once(self, bank: QuestionBank) -> int:
+        stats["pruned"] += await bank.prune()
+        budget = QUESTION_BANK_MAX_GENERATE_PER_CYCLE
+        generated = 0
+        for company, role in hot_keys.hot(QUESTION_BANK_HOT_KEYS):
+            missing = min(QUESTION_BANK_SETS_PER_KEY - await bank.fresh_count(company, role), budget - generated)
+            if missing <= 0:
+                continue
+            results = await asyncio.gather(
+                *(generate_questions_async(role, company, coalesce=False) for _ in range(missing)),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    stats["refresh_errors"] += 1
+                    log.warning("Question bank refresh for %s / %s failed: %s", company, role, result)
+                    continue
+                await bank.add(company, role, result)
+                generated += 1
+            if generated >= budget:
+                break
+        stats["generated"] += generated
+        return generated
+
+    async def _run(self, db):
+        bank = QuestionBank(db)
+        while True:
+            try:
+                await self.refresh_once(bank)
+            except Exception:
+                stats["refresh_errors"] += 1
+                log.exception("Question bank refresh failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self, db):
+        if QUESTION_BANK_ENABLED and db is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(db), name="question-bank-refresher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def bank_stats() -> dict:
+    return {**stats, "hot_keys": len(hot_keys.hot(QUESTION_BANK_HOT_KEYS)), "enabled": QUESTION_BANK_ENABLED}
+
+
+def get_question_bank(db=Depends(get_async_db)) -> QuestionBank:
+    return QuestionBank(db)
+
+
+hot_keys = HotKeys(QUESTION_BANK_HOT_WINDOW_SECONDS, QUESTION_BANK_HOT_MIN_REQUESTS, QUESTION_BANK_SEED_KEYS)
+refresher = QuestionBankRefresher(QUESTION_BANK_REFRESH_SECONDS)
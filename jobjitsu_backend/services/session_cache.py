@@ -0,0 +1,106 @@
+import copy
+import os
+import time
+from collections import OrderedDict
+
+# In-process cache of active interview sessions, so the steps of an interview
+# do not re-read the same small document from MongoDB. SessionRepository
+# writes through it: every mutation increments the document's version field
+# and returns the whole updated document, which replaces the cached copy.
+# Reads trust an entry for SESSION_CACHE_TTL_SECONDS after it was last
+# written or loaded; callers that must see other workers' writes read
+# through. Writes are conditional on the cached version, so a session
+# written by another worker in between is caught at the next write (and
+# re-read); that entry was stale and is counted.
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "600"))
+
+VERSION_FIELD = "version"
+
+
+def project(document: dict, projection: dict = None) -> dict:
+    """Copy of document restricted to an inclusion projection ({"field": 1, ...}); _id is always kept."""
+    if projection is None:
+        return copy.deepcopy(document)
+    fields = {"_id", *(field for field, include in projection.items() if include)}
+    return {field: copy.deepcopy(document[field]) for field in fields if field in document}
+
+
+class SessionCache:
+    """LRU of session documents keyed by session id, each entry expiring after ttl_seconds."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+
+    def get(self, session_id: str):
+        """The cached document (not a copy; use project()), or None."""
+        item = self._items.get(session_id)
+        if item is None:
+            self.misses += 1
+            return None
+        document, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._items[session_id]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._items.move_to_end(session_id)
+        self.hits += 1
+        return document
+
+    def peek(self, session_id: str):
+        """The cached document (not a copy) without counting a lookup, or None."""
+        item = self._items.get(session_id)
+        if item is None or item[1] <= time.monotonic():
+            return None
+        return item[0]
+
+    def put(self, session_id: str, document: dict, stale: bool = False):
+        """
+        Store a document read from or returned by MongoDB (the cache takes
+        ownership; it is not copied), unless a newer version is cached.
+        stale=True: a write found the cached copy outdated.
+        """
+        version = document.get(VERSION_FIELD) or 0
+        item = self._items.get(session_id)
+        if item is not None:
+            cached_version = item[0].get(VERSION_FIELD) or 0
+            if version < cached_version:
+                return  # an older write finished after a newer one
+            if stale or version > cached_version + 1:
+                self.stale += 1  # written elsewhere since we cached it
+        self._items[session_id] = (document, time.monotonic() + self.ttl_seconds)
+        self._items.move_to_end(session_id)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, session_id: str):
+        self._items.pop(session_id, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": SESSION_CACHE_ENABLED,
+            "entries": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "stale": self.stale,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+cache = SessionCache(SESSION_CACHE_MAX_ENTRIES, SESSION_CACHE_TTL_SECONDS)
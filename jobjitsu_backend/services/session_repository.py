@@ -0,0 +1,157 @@
+import copy
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import Depends
+from pymongo import ReturnDocument
+from services import session_cache
+from services.database import get_async_db
+from services.session_cache import VERSION_FIELD, project
+
+
+def to_object_id(session_id: str):
+    """Parse a session id, returning None for malformed ids."""
+    try:
+        return ObjectId(session_id)
+    except (InvalidId, TypeError):
+        return None
+
+
+class SessionRepository:
+    """
+    Async data access for interview sessions (Motor).
+
+    Every method is at most one round trip. Mutations use find_one_and_update and
+    return the updated document (restricted to the given projection), or None
+    when the session does not exist, so callers never need a verification read.
+
+    With a cache (services/session_cache.py) every mutation also increments the
+    session's version and writes the whole returned document through to the
+    cache, so reads of an active session are usually served without a round trip.
+    Mutations of a cached session are conditional on the cached version, so a
+    copy made stale by another worker is caught at the next write.
+    """
+
+    def __init__(self, collection, cache: session_cache.SessionCache = None):
+        self.collection = collection
+        self.cache = cache
+
+    async def create(self, session: dict) -> str:
+        session[VERSION_FIELD] = 1
+        result = await self.collection.insert_one(session)
+        session_id = str(result.inserted_id)
+        if self.cache is not None:
+            self.cache.put(session_id, {**copy.deepcopy(session), "_id": result.inserted_id})
+        return session_id
+
+    async def get(self, session_id: str, projection: dict = None, read_through: bool = False):
+        """
+        The session, or None. Served from the cache when it holds the session;
+        read_through=True always reads MongoDB (and refreshes the cache), for
+        callers that must see writes made by other workers.
+        """
+        oid = to_object_id(session_id)
+        if oid is None:
+            return None
+        if self.cache is None:
+            return await self.collection.find_one({"_id": oid}, projection)
+        if not read_through:
+            cached = self.cache.get(session_id)
+            if cached is not None:
+                return project(cached, projection)
+        document = await self.collection.find_one({"_id": oid})
+        if document is None:
+            return None
+        self.cache.put(session_id, document)
+        return project(document, projection)
+
+    async def _update(self, session_id: str, query: dict, update: dict, projection: dict = None):
+        """
+        find_one_and_update on one session, bumping its version; the whole
+        document goes to the cache. A cached session is only updated at its
+        cached version. On a miss the session is re-read: the same version
+        means query's own conditions failed, and a newer one means another
+        worker wrote it, so the fresh copy is cached and the write retried.
+        """
+        update["$inc"] = {VERSION_FIELD: 1}
+        if self.cache is None:
+            return await self.collection.find_one_and_update(
+                query, update, projection=projection or {"_id": 1}, return_document=ReturnDocument.AFTER)
+        cached = self.cache.peek(session_id)
+        if cached is None:
+            document = await self.collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+        else:
+            version = cached.get(VERSION_FIELD)
+            document = await self.collection.find_one_and_update(
+                {**query, VERSION_FIELD: version}, update, return_document=ReturnDocument.AFTER)
+            if document is None:
+                current = await self.collection.find_one({"_id": query["_id"]})
+                if current is None:
+                    self.cache.discard(session_id)
+                    return None
+                if current.get(VERSION_FIELD) == version:
+                    return None
+                self.cache.put(session_id, current, stale=True)
+                document = await self.collection.find_one_and_update(
+                    {**query, VERSION_FIELD: current.get(VERSION_FIELD)}, update, return_document=ReturnDocument.AFTER)
+        if document is None:
+            return None
+        self.cache.put(session_id, document)
+        return project(document, projection or {"_id": 1})
+
+    async def _set(self, session_id: str, fields: dict, projection: dict = None, unset: tuple = ()):
+        oid = to_object_id(session_id)
+        if oid is None:
+            return None
+        update = {"$set": fields}
+        if unset:
+            update["$unset"] = {field: "" for field in unset}
+        return await self._update(session_id, {"_id": oid}, update, projection)
+
+    async def save_answer(self, session_id: str, question_number: int, answer: str, projection: dict = None):
+        # A follow-up speculated from the previous answers, and the grade of the
+        # previous answer, no longer apply
+        return await self._set(session_id, {f"questions.answer{question_number}": answer}, projection,
+                               unset=("speculative_followup", f"questions.feedback{question_number}"))
+
+    async def save_speculative_followup(self, session_id: str, answers: list, followup: dict) -> bool:
+        """Store a speculated follow-up, only if the answers it was built from are still current."""
+        oid = to_object_id(session_id)
+        if oid is None:
+            return False
+        query = {"_id": oid, **{f"questions.answer{i}": answer for i, answer in enumerate(answers, start=1)}}
+        return await self._update(session_id, query, {"$set": {"speculative_followup": followup}}) is not None
+
+    async def save_answer_feedback(self, session_id: str, answer_field: str, answer: str, feedback_field: str, feedback: dict) -> bool:
+        """
+        Store the grade of one answer (questions.feedbackN, or follow_up_feedback),
+        only if the answer it was built from is still current.
+        """
+        oid = to_object_id(session_id)
+        if oid is None:
+            return False
+        query = {"_id": oid, answer_field: answer}
+        return await self._update(session_id, query, {"$set": {feedback_field: feedback}}) is not None
+
+    async def save_followup(self, session_id: str, question: str, projection: dict = None):
+        return await self._set(session_id, {"follow_up_question": question, "follow_up_answer": ""}, projection,
+                               unset=("follow_up_feedback",))
+
+    async def save_followup_answer(self, session_id: str, answer: str, projection: dict = None):
+        return await self._set(session_id, {"follow_up_answer": answer}, projection, unset=("follow_up_feedback",))
+
+    async def save_feedback(self, session_id: str, feedback: dict, projection: dict = None):
+        # Feedback ends the interview, so the session leaves the cache instead
+        # of caching its final document
+        oid = to_object_id(session_id)
+        if oid is None:
+            return None
+        if self.cache is not None:
+            self.cache.discard(session_id)
+        return await self.collection.find_one_and_update(
+            {"_id": oid}, {"$set": {"feedback": feedback}, "$inc": {VERSION_FIELD: 1}},
+            projection=projection or {"_id": 1}, return_document=ReturnDocument.AFTER)
+
+
+def get_session_repository(db=Depends(get_async_db)) -> SessionRepository:
+    cache = session_cache.cache if session_cache.SESSION_CACHE_ENABLED else None
+    return SessionRepository(db.sessions, cache)
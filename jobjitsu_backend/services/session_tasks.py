@@ -0,0 +1,117 @@
+import asyncio
+import os
+import time
+
+# Background work started on behalf of an interview session (audio synthesis
+# and similar) is tracked here so request handlers can join in-flight tasks
+# and abandoned sessions can have their work cancelled and results released.
+SESSION_TASK_TTL_SECONDS = float(os.getenv("SESSION_TASK_TTL_SECONDS", "1800"))
+SESSION_TASK_SWEEP_SECONDS = float(os.getenv("SESSION_TASK_SWEEP_SECONDS", "60"))
+
+
+class _SessionEntry:
+    __slots__ = ("tasks", "last_access")
+
+    def __init__(self):
+        self.tasks = {}
+        self.last_access = time.monotonic()
+
+
+class SessionTaskRegistry:
+    """Per-session named slots holding asyncio tasks and their results."""
+
+    def __init__(self, ttl_seconds: float, sweep_interval: float):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._sessions = {}
+        self._sweeper = None
+        self.expired_sessions = 0
+
+    def spawn(self, session_id: str, slot: str, coro) -> asyncio.Task:
+        """Run coro in the background under (session_id, slot), replacing any previous task."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = _SessionEntry()
+        entry.last_access = time.monotonic()
+        previous = entry.tasks.get(slot)
+        if previous is not None and not previous.done():
+            previous.cancel()
+        task = asyncio.create_task(coro, name=f"session:{session_id}:{slot}")
+        task.add_done_callback(_consume_exception)
+        entry.tasks[slot] = task
+        return task
+
+    def get(self, session_id: str, slot: str):
+        """Return the task in a slot (running or finished), or None."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        entry.last_access = time.monotonic()
+        return entry.tasks.get(slot)
+
+    def pop(self, session_id: str, slot: str):
+        """Remove a slot without cancelling its task; drop the session when empty."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        task = entry.tasks.pop(slot, None)
+        if not entry.tasks:
+            del self._sessions[session_id]
+        return task
+
+    def cancel(self, session_id: str, slot: str):
+        """Cancel and remove a single slot."""
+        task = self.pop(session_id, slot)
+        if task is not None and not task.done():
+            task.cancel()
+
+    def discard(self, session_id: str):
+        """Cancel all pending work for a session and release its results."""
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return
+        for task in entry.tasks.values():
+            if not task.done():
+                task.cancel()
+
+    def sweep(self):
+        """Discard sessions that have not been touched within the TTL."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [sid for sid, entry in self._sessions.items() if entry.last_access < cutoff]
+        for session_id in expired:
+            self.discard(session_id)
+        self.expired_sessions += len(expired)
+        return len(expired)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop(), name="session-task-sweeper")
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for session_id in list(self._sessions):
+            self.discard(session_id)
+
+    def stats(self) -> dict:
+        pending = sum(1 for e in self._sessions.values() for t in e.tasks.values() if not t.done())
+        return {
+            "sessions": len(self._sessions),
+            "pending_tasks": pending,
+            "expired_sessions": self.expired_sessions,
+        }
+
+
+def _consume_exception(task: asyncio.Task):
+    # Mark failures as retrieved; callers that join the task still see them.
+    if not task.cancelled():
+        task.exception()
+
+
+registry = SessionTaskRegistry(SESSION_TASK_TTL_SECONDS, SESSION_TASK_SWEEP_SECONDS)
@@ -0,0 +1,72 @@
+import asyncio
+
+# Request coalescing: concurrent callers asking for the same key share one
+# upstream call and all receive its result (or its exception). The shared
+# call runs as its own task; each caller awaits it through a shield, so one
+# caller being cancelled (client disconnect, timeout) does not cancel it for
+# the others. The upstream call is cancelled only when its last waiter leaves.
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """One in-flight upstream call per key, shared by every concurrent caller."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self.upstream_calls = 0
+        self.saved_calls = 0
+        self.cancelled_calls = 0
+        _groups.append(self)
+
+    async def do(self, key, func):
+        """Return await func() for this key, joining an identical call already in flight."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(func(), name=f"single-flight:{self.name}"))
+            call.task.add_done_callback(lambda task, key=key, call=call: self._finished(key, call))
+            self._calls[key] = call
+            self.upstream_calls += 1
+        else:
+            self.saved_calls += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to receive the result; stop the upstream work
+                # and let the next caller start a fresh call.
+                self._finished(key, call)
+                call.task.cancel()
+                self.cancelled_calls += 1
+
+    def _finished(self, key, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if call.task.done() and not call.task.cancelled():
+            call.task.exception()  # retrieved here; waiters still see it
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "upstream_calls": self.upstream_calls,
+            "saved_calls": self.saved_calls,
+            "cancelled_calls": self.cancelled_calls,
+        }
+
+
+_groups = []
+
+
+def stats() -> dict:
+    """Counters for every SingleFlight group, keyed by name."""
+    return {group.name: group.stats() for group in _groups}
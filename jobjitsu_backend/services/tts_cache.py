@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# Two-tier cache for synthesized audio. The memory tier is an LRU bounded by
+# total bytes; the disk tier is a sharded directory so clips survive restarts
+# and are shared by every worker on the host, pruned to TTS_CACHE_DISK_BYTES
+# (least recently used first). Set TTS_CACHE_DIR to an empty string to run
+# memory-only.
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".tts_cache"))
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different strings share one cache entry."""
+    return _whitespace.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(voice_id: str, model_id: str, voice_settings: dict, text: str) -> str:
+    """Content address for a clip: everything that changes the synthesized audio."""
+    material = json.dumps(
+        [voice_id, model_id, voice_settings or {}, normalize_text(text)],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryLRU:
+    """In-process LRU of audio clips, evicting by total byte size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+
+    def get(self, key: str):
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._items[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DiskStore:
+    """
+    Sharded directory of clips: <root>/ab/cd/abcd....mp3. Reads refresh a
+    clip's mtime; once the clips outgrow max_bytes the least recently used
+    are deleted down to PRUNE_TO of it, so pruning does not run on every write.
+    """
+
+    PRUNE_TO = 0.9
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.size = None  # bytes on disk, from a scan on first write; other workers' writes show up at the next prune
+        self.evictions = 0
+        self._lock = threading.Lock()  # writes run on worker threads
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}.mp3")
+
+    def read(self, key: str):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # pruned in between; the bytes are still good
+        return data
+
+    def write(self, key: str, data: bytes):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see partial clips
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self._clips())
+            else:
+                self.size += len(data)
+            if self.size > self.max_bytes:
+                self._prune()
+
+    def _clips(self):
+        clips = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".mp3"):
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    clips.append((stat.st_mtime, stat.st_size, path))
+        return clips
+
+    def _prune(self):
+        clips = sorted(self._clips(), reverse=True)
+        total = 0
+        for _, size, path in clips:
+            if total + size > self.max_bytes * self.PRUNE_TO:
+                try:
+                    os.unlink(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+            else:
+                total += size
+        self.size = total
+
+
+class TTSCache:
+    def __init__(self, memory_bytes: int, disk_dir: str = None, enabled: bool = True, disk_bytes: int = TTS_CACHE_DISK_BYTES):
+        self.enabled = enabled
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk = DiskStore(disk_dir, disk_bytes) if disk_dir else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.disk_errors = 0
+
+    async def get(self, key: str):
+        """Return cached audio bytes for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory_hits += 1
+            return data
+        if self.disk is not None:
+            try:
+                data = await asyncio.to_thread(self.disk.read, key)
+            except OSError as e:
+                self.disk_errors += 1
+                log.warning("TTS cache disk read failed for %s: %s", key, e)
+                data = None
+            if data is not None:
+                self.disk_hits += 1
+                self.memory.put(key, data)
+                return data
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes):
+        """Store audio in both tiers. Disk failures are logged, never raised."""
+        if not self.enabled or not data:
+            return
+        self.memory.put(key, data)
+        self.stores += 1
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.write, key, data)
+            except OSError as e:
+                self.disk_errors += 1
+                log.warning("TTS cache disk write failed for %s: %s", key, e)
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.memory.evictions,
+            "disk_errors": self.disk_errors,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.size,
+            "memory_max_bytes": self.memory.max_bytes,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+            "disk_bytes": self.disk.size if self.disk is not None else None,
+        }
+
+
+cache = TTSCache(TTS_CACHE_MEMORY_BYTES, TTS_CACHE_DIR or None, TTS_CACHE_ENABLED, TTS_CACHE_DISK_BYTES)
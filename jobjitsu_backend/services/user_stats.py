@@ -0,0 +1,365 @@
+import asyncio
+import logging
+from datetime import datetime
+from fastapi import Depends
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from services.database import get_async_db
+
+log = logging.getLogger(__name__)
+
+RECENT_SESSIONS_LIMIT = 10
+
+RECENT_SESSION_PROJECTION = {
+    "_id": 1,
+    "user_id": 1,
+    "role": 1,
+    "company": 1,
+    "created_at": 1,
+    "follow_up_question": 1,
+    "follow_up_answer": 1,
+    "feedback": 1,
+}
+
+# A session counts towards the score stats when feedback.score is a positive number
+def _scored_filter(user_id: str) -> dict:
+    return {"user_id": user_id, "feedback.score": {"$type": "number", "$gt": 0}}
+
+
+def _score_pipeline(user_id: str) -> list:
+    return [
+        {"$match": _scored_filter(user_id)},
+        {"$group": {
+            "_id": None,
+            "scored_sessions": {"$sum": 1},
+            "score_sum": {"$sum": "$feedback.score"},
+            "best_score": {"$max": "$feedback.score"},
+        }},
+    ]
+
+
+def format_recent_session(session: dict) -> dict:
+    """Shape a session document the way /user/stats returns recentSessions."""
+    entry = {
+        "_id": str(session.get('_id')),
+        "user_id": session.get('user_id'),
+        "role": session.get('role', 'Unknown'),
+        "company": session.get('company', 'Unknown'),
+        "created_at": (session.get('created_at') or datetime.utcnow()).isoformat(),
+        "follow_up_question": session.get('follow_up_question'),
+        "follow_up_answer": session.get('follow_up_answer')
+    }
+    fb = session.get('feedback')
+    if fb:
+        if isinstance(fb, dict):
+            entry['feedback'] = fb
+        else:
+            entry['feedback'] = {"score": 0, "description": str(fb)}
+    return entry
+
+
+async def recent_sessions(db, user_id: str) -> list:
+    """The user's newest sessions, scored or not, via a projected, limited, indexed query."""
+    cursor = (
+        db.sessions.find({"user_id": user_id}, RECENT_SESSION_PROJECTION)
+        .sort("created_at", DESCENDING)
+        .limit(RECENT_SESSIONS_LIMIT)
+    )
+    return await cursor.to_list(length=RECENT_SESSIONS_LIMIT)
+
+
+async def compute_user_stats(db, user_id: str) -> dict:
+    """
+    Session count, score stats via a server-side aggregation, and the newest
+    sessions via a projected, limited query, run concurrently. Only numbers
+    and ten documents cross the wire, however many sessions the user has.
+    """
+    score_cursor = db.sessions.aggregate(_score_pipeline(user_id))
+    total_sessions, scores, recent = await asyncio.gather(
+        db.sessions.count_documents({"user_id": user_id}),
+        score_cursor.to_list(length=1),
+        recent_sessions(db, user_id),
+    )
+    scores = scores[0] if scores else {}
+    scored = scores.get("scored_sessions", 0)
+    average_score = (scores.get("score_sum", 0) / scored) if scored else 0
+    best_score = scores.get("best_score") if scored else 0
+
+    return {
+        "totalSessions": total_sessions,
+        "averageScore": round(average_score, 1),
+        "bestScore": best_score,
+        "recentSessions": [format_recent_session(s) for s in recent],
+    }
+
+
+# --- Incrementally maintained per-user stats document (user_stats collection) ---
+
+HISTOGRAM_MAX_SCORE = 10
+
+
+def _is_score(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def breakdown_key(value) -> str:
+    """Normalize a company/role name into a safe sub-document key."""
+    key = " ".join(str(value or "").lower().split())
+    key = key.replace(".", "_").replace("$", "_")
+    return key or "unknown"
+
+
+def _histogram_bucket(score) -> str:
+    return str(min(HISTOGRAM_MAX_SCORE, max(0, int(round(score)))))
+
+
+def _started_update(session: dict) -> dict:
+    inc = {"total_sessions": 1}
+    labels = {}
+    for field in ("company", "role"):
+        key = f"by_{field}.{breakdown_key(session.get(field))}"
+        inc[f"{key}.sessions"] = 1
+        labels[f"{key}.label"] = session.get(field) or "Unknown"
+    return {"$inc": inc, "$set": {**labels, "updated_at": datetime.utcnow()}}
+
+
+def _score_update(session: dict, score, sign: int = 1) -> dict:
+    inc = {
+        "scored_sessions": sign,
+        "score_sum": sign * score,
+        f"score_histogram.{_histogram_bucket(score)}": sign,
+    }
+    for field in ("company", "role"):
+        key = f"by_{field}.{breakdown_key(session.get(field))}"
+        inc[f"{key}.scored"] = sign
+        inc[f"{key}.score_sum"] = sign * score
+    update = {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}}
+    if sign > 0:
+        update["$max"] = {
+            "best_score": score,
+            f"by_company.{breakdown_key(session.get('company'))}.best_score": score,
+            f"by_role.{breakdown_key(session.get('role'))}.best_score": score,
+        }
+    return update
+
+
+def _fold_session(stats: dict, session: dict) -> None:
+    """Apply one session to an in-memory stats document (same rules as the updates)."""
+    score = (session.get("feedback") or {}).get("score") if isinstance(session.get("feedback"), dict) else None
+    stats["total_sessions"] += 1
+    for field in ("company", "role"):
+        part = stats[f"by_{field}"].setdefault(breakdown_key(session.get(field)), {
+            "label": session.get(field) or "Unknown", "sessions": 0, "scored": 0, "score_sum": 0,
+        })
+        part["sessions"] += 1
+        if _is_score(score):
+            part["scored"] += 1
+            part["score_sum"] += score
+            part["best_score"] = max(part.get("best_score", score), score)
+    if _is_score(score):
+        stats["scored_sessions"] += 1
+        stats["score_sum"] += score
+        stats["best_score"] = max(stats.get("best_score", score), score)
+        bucket = _histogram_bucket(score)
+        stats["score_histogram"][bucket] = stats["score_histogram"].get(bucket, 0) + 1
+
+
+def _empty_stats(user_id: str) -> dict:
+    return {
+        "_id": user_id,
+        "total_sessions": 0,
+        "scored_sessions": 0,
+        "score_sum": 0,
+        "score_histogram": {},
+        "by_company": {},
+        "by_role": {},
+    }
+
+
+def _format_breakdown(parts: dict) -> list:
+    rows = []
+    for part in parts.values():
+        scored = part.get("scored", 0)
+        rows.append({
+            "name": part.get("label", "Unknown"),
+            "sessions": part.get("sessions", 0),
+            "averageScore": round(part.get("score_sum", 0) / scored, 1) if scored else 0,
+            "bestScore": part.get("best_score", 0) if scored else 0,
+        })
+    return sorted(rows, key=lambda row: row["sessions"], reverse=True)
+
+
+def format_user_stats(stats: dict, recent: list) -> dict:
+    """Shape a user_stats document and the newest sessions into the /user/stats response."""
+    scored = stats.get("scored_sessions", 0)
+    return {
+        "totalSessions": stats.get("total_sessions", 0),
+        "averageScore": round(stats.get("score_sum", 0) / scored, 1) if scored else 0,
+        "bestScore": stats.get("best_score", 0) if scored else 0,
+        "recentSessions": [format_recent_session(s) for s in recent],
+        "scoreHistogram": stats.get("score_histogram", {}),
+        "byCompany": _format_breakdown(stats.get("by_company", {})),
+        "byRole": _format_breakdown(stats.get("by_role", {})),
+    }
+
+
+class UserStatsStore:
+    """
+    One pre-aggregated document per user, kept current with atomic
+    $inc/$max updates as sessions start and get scored. Recent sessions are
+    not kept in it: in-progress ones belong in the list too, and the indexed
+    recent_sessions query already reads only ten small documents.
+
+    Updates never upsert: a missing document is built from `sessions` on
+    first read and inserted only if still missing, so users who predate the
+    collection get their full history and concurrent increments survive.
+    The sessions collection stays the source of truth; a failed stats update
+    is logged and repaired by `rebuild`.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.user_stats
+
+    async def _update(self, user_id, update: dict) -> None:
+        if not user_id:
+            return
+        try:
+            await self.collection.update_one({"_id": user_id}, update)
+        except PyMongoError as e:
+            log.warning("user_stats update failed for %s: %s", user_id, e)
+
+    async def record_session_started(self, session: dict) -> None:
+        await self._update(session.get("user_id"), _started_update(session))
+
+    async def record_feedback(self, session: dict, feedback: dict) -> None:
+        """
+        `session` is the document as read before the feedback write (it must
+        include _id, user_id, role, company, created_at and feedback).
+        """
+        user_id = session.get("user_id")
+        previous = session.get("feedback")
+        previous_score = previous.get("score") if isinstance(previous, dict) else None
+        if _is_score(previous_score) and user_id:
+            # Regraded session: back out the old score first. $max cannot lower
+            # the best scores, so they are reset from the user's other sessions;
+            # the new score is then folded in as usual.
+            undo = _score_update(session, previous_score, sign=-1)
+            try:
+                best = await self._best_scores_without(session)
+            except PyMongoError as e:
+                log.warning("user_stats best scores for %s not recomputed: %s", user_id, e)
+            else:
+                undo["$set"].update({path: value for path, value in best.items() if value is not None})
+                unset = {path: "" for path, value in best.items() if value is None}
+                if unset:
+                    undo["$unset"] = unset
+            await self._update(user_id, undo)
+
+        score = feedback.get("score")
+        if not _is_score(score):
+            return
+        await self._update(user_id, _score_update(session, score))
+
+    async def _best_scores_without(self, session: dict) -> dict:
+        """{best_score path: value or None} over the user's scored sessions other than this one."""
+        company = breakdown_key(session.get("company"))
+        role = breakdown_key(session.get("role"))
+        best = {"best_score": None, f"by_company.{company}.best_score": None, f"by_role.{role}.best_score": None}
+        query = {**_scored_filter(session.get("user_id")), "_id": {"$ne": session.get("_id")}}
+        async for other in self.db.sessions.find(query, {"company": 1, "role": 1, "feedback.score": 1}):
+            score = other["feedback"]["score"]
+            paths = ["best_score"]
+            if breakdown_key(other.get("company")) == company:
+                paths.append(f"by_company.{company}.best_score")
+            if breakdown_key(other.get("role")) == role:
+                paths.append(f"by_role.{role}.best_score")
+            for path in paths:
+                if best[path] is None or score > best[path]:
+                    best[path] = score
+        return best
+
+    async def recent_sessions(self, user_id: str) -> list:
+        return await recent_sessions(self.db, user_id)
+
+    async def get(self, user_id: str) -> dict:
+        stats = await self.collection.find_one({"_id": user_id})
+        if stats is None:
+            stats = await self._build(user_id)
+            stats["updated_at"] = datetime.utcnow()
+            try:
+                # Insert, never replace: a document created meanwhile (by
+                # another first read) may already hold increments we must keep
+                await self.collection.insert_one(stats)
+            except DuplicateKeyError:
+                stats = await self.collection.find_one({"_id": user_id}) or stats
+        return stats
+
+    async def _build(self, user_id: str) -> dict:
+        stats = _empty_stats(user_id)
+        async for session in self.db.sessions.find({"user_id": user_id}, RECENT_SESSION_PROJECTION):
+            _fold_session(stats, session)
+        return stats
+
+    async def rebuild_user(self, user_id: str) -> dict:
+        """Replace the user's document with one rebuilt from sessions (repair; not for the request path)."""
+        stats = await self._build(user_id)
+        await self._save(stats)
+        return stats
+
+    async def rebuild_all(self) -> int:
+        """Regenerate every user's document in one pass over sessions."""
+        users = 0
+        stats = None
+        cursor = self.db.sessions.find({"user_id": {"$ne": None}}, RECENT_SESSION_PROJECTION).sort(
+            [("user_id", ASCENDING), ("created_at", DESCENDING)]
+        )
+        async for session in cursor:
+            if stats is None or stats["_id"] != session["user_id"]:
+                if stats is not None:
+                    await self._save(stats)
+                    users += 1
+                stats = _empty_stats(session["user_id"])
+            _fold_session(stats, session)
+        if stats is not None:
+            await self._save(stats)
+            users += 1
+        return users
+
+    async def _save(self, stats: dict) -> None:
+        stats["updated_at"] = datetime.utcnow()
+        await self.collection.replace_one({"_id": stats["_id"]}, stats, upsert=True)
+
+
+def get_user_stats_store(db=Depends(get_async_db)) -> UserStatsStore:
+    return UserStatsStore(db)
+
+
+if __name__ == "__main__":
+    # Backfill/rebuild: python -m services.user_stats [--user USER_ID] [--check]
+    import argparse
+    from services import database
+
+    parser = argparse.ArgumentParser(description="Rebuild user_stats documents from the sessions collection")
+    parser.add_argument("--user", help="Only rebuild this user id")
+    parser.add_argument("--check", action="store_true", help="Compare the stored document against a fresh aggregation")
+    args = parser.parse_args()
+
+    async def _run():
+        database.connect()
+        store = UserStatsStore(database.async_db)
+        try:
+            if args.check and args.user:
+                stored = format_user_stats(await store.get(args.user), [])
+                fresh = await compute_user_stats(database.async_db, args.user)
+                drift = {k: (stored[k], fresh[k]) for k in ("totalSessions", "averageScore", "bestScore") if stored[k] != fresh[k]}
+                print(f"user_stats for {args.user}: {'OK' if not drift else f'drift {drift}'}")
+            elif args.user:
+                stats = await store.rebuild_user(args.user)
+                print(f"Rebuilt user_stats for {args.user}: {stats['total_sessions']} sessions")
+            else:
+                print(f"Rebuilt user_stats for {await store.rebuild_all()} users")
+        finally:
+            database.close()
+
+    asyncio.run(_run())
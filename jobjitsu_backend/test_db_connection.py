@@ -13,12 +13,15 @@ print(f"DB_NAME: {os.getenv('DB_NAME')}")
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from interviewHubDB.db_service import db, client
+    from services import database
+    db = database.connect()
+    client = database.client
     print(f"Database object: {db}")
     print(f"Client object: {client}")
     
-    if db:
+    if db is not None and database.ping():
         print("Database connection successful!")
+        print(f"Pool stats: {database.pool_stats()}")
         # Test a simple operation
         result = db.users.find_one({"email": "test@example.com"})
         print(f"Test query result: {result}")
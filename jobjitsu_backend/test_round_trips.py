@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Round-trip budget check for the session endpoints.
+
+Runs every session endpoint in-process against an in-memory MongoDB stand-in
+(mongomock-motor) whose collection counts each call, and fails when an
+endpoint makes more database round trips than its budget. Gemini and
+ElevenLabs are replaced with canned responses, and the app's lifespan with
+one that only runs the session task registry, so the check never connects
+to the MongoDB cluster in MONGO_URI or starts the question-bank refresher.
+Needs the dev requirements (pip install -r requirements-dev.txt).
+
+Usage: python test_round_trips.py   (or: pytest test_round_trips.py)
+"""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from main import app
+import routers.session as session_router
+from services import answer_grading, session_tasks
+from services.auth_guard import get_current_user
+from services.database import get_async_db
+from services.gemini_service import InterviewQuestions, FollowUp, Feedback
+
+# Endpoints that must read the session before calling Gemini and then store
+# the result get one round trip per phase; everything else gets one. Starting
+# a session and storing feedback also update the user's user_stats document;
+# starting also claims a question-bank set (and stores a new one on a miss).
+# Reads of an active session come from the write-through session cache, so
+# /next and the read in /followup are free; /feedback always reads through.
+BUDGETS = {
+    "start": 4,
+    "next": 0,
+    "answer": 1,
+    "followup": 1,
+    "followup-answer": 1,
+    "feedback": 3,
+}
+
+
+class CountingCollection:
+    """Proxy that counts every collection call (each one is a server round trip)."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.calls.append(name)
+            return attr(*args, **kwargs)
+        return call
+
+
+class CountingDatabase:
+    def __init__(self):
+        self._db = AsyncMongoMockClient().round_trips
+        self.sessions = CountingCollection(self._db.sessions)
+        self.user_stats = CountingCollection(self._db.user_stats)
+        self.question_bank = CountingCollection(self._db.question_bank)
+
+    @property
+    def calls(self):
+        return len(self.sessions.calls) + len(self.user_stats.calls) + len(self.question_bank.calls)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+async def _questions(role, company):
+    return InterviewQuestions("Q1?", "Q2?", "Q3?")
+
+
+async def _followup(qa_pairs):
+    return FollowUp("Tell me more?")
+
+
+async def _feedback(qa_pairs):
+    return Feedback(8, "Solid answers.")
+
+
+async def _grade(question, answer):
+    return Feedback(8, "Solid answer.")
+
+
+async def _summary(graded):
+    return "Solid answers."
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    session_tasks.registry.start()
+    yield
+    await session_tasks.registry.stop()
+
+
+def run_interview():
+    """Walk one interview through every endpoint; return {endpoint: round trips}."""
+    db = CountingDatabase()
+    app.dependency_overrides[get_async_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user=SimpleNamespace(id="round-trip-user"))
+    lifespan = app.router.lifespan_context
+    app.router.lifespan_context = _lifespan
+    originals = (
+        session_router.generate_questions_async,
+        session_router.generate_followup_async,
+        answer_grading.generate_feedback_async,
+        answer_grading.generate_grade_async,
+        answer_grading.generate_feedback_summary_async,
+        session_router.prefetch_question_audio,
+        session_router.speculate_followup,
+        session_router.grade_answer,
+        session_router.grade_followup_answer,
+    )
+    session_router.generate_questions_async = _questions
+    session_router.generate_followup_async = _followup
+    answer_grading.generate_feedback_async = _feedback
+    answer_grading.generate_grade_async = _grade
+    answer_grading.generate_feedback_summary_async = _summary
+    session_router.prefetch_question_audio = lambda *args: None
+    # Background work runs after the response; only request-path trips count
+    session_router.speculate_followup = lambda *args: None
+    session_router.grade_answer = lambda *args: None
+    session_router.grade_followup_answer = lambda *args: None
+
+    counts = {}
+
+    def call(name, method, path, **params):
+        before = db.calls
+        response = client.request(method, f"/api{path}", params=params)
+        assert response.status_code == 200, f"{name}: HTTP {response.status_code} {response.text}"
+        counts[name] = max(counts.get(name, 0), db.calls - before)
+        return response.json()
+
+    try:
+        with TestClient(app) as client:
+            session_id = call("start", "POST", "/session/start", role="Software Engineer", company="Google")["session_id"]
+            for i in (1, 2, 3):
+                call("next", "GET", f"/session/{session_id}/next")
+                call("answer", "POST", f"/session/{session_id}/answer", question_number=i, answer=f"Answer {i}")
+            call("followup", "POST", f"/session/{session_id}/followup")
+            call("followup-answer", "POST", f"/session/{session_id}/followup-answer", answer="More detail")
+            call("feedback", "POST", f"/session/{session_id}/feedback")
+    finally:
+        app.dependency_overrides.clear()
+        app.router.lifespan_context = lifespan
+        (session_router.generate_questions_async,
+         session_router.generate_followup_async,
+         answer_grading.generate_feedback_async,
+         answer_grading.generate_grade_async,
+         answer_grading.generate_feedback_summary_async,
+         session_router.prefetch_question_audio,
+         session_router.speculate_followup,
+         session_router.grade_answer,
+         session_router.grade_followup_answer) = originals
+    return counts
+
+
+def test_round_trip_budgets():
+    counts = run_interview()
+    over = {name: (counts.get(name), budget) for name, budget in BUDGETS.items() if counts.get(name, 0) > budget}
+    assert not over, f"endpoints over their round-trip budget (used, budget): {over}"
+
+
+def main():
+    print("🚀 Checking MongoDB round trips per session endpoint")
+    print("=" * 50)
+    counts = run_interview()
+    failed = False
+    for name, budget in BUDGETS.items():
+        used = counts.get(name, 0)
+        ok = used <= budget
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {name:<16} {used} round trip(s), budget {budget}")
+    print("=" * 50)
+    if failed:
+        raise SystemExit(1)
+    print("🎉 All endpoints within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Drift check for the incrementally maintained user_stats document.
+
+Plays sessions through UserStatsStore against an in-memory MongoDB stand-in
+(mongomock-motor), including a session regraded downward, and fails when the
+stored stats differ from a fresh compute_user_stats aggregation or a full
+rebuild, the same comparison `python -m services.user_stats --check` makes.
+Needs the dev requirements (pip install -r requirements-dev.txt).
+
+Usage: python test_user_stats.py   (or: pytest test_user_stats.py)
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from services.user_stats import UserStatsStore, compute_user_stats, format_user_stats
+
+USER_ID = "stats-user"
+
+
+async def _feedback(db, store, session, score):
+    """What POST /feedback does: record against the session as read, then store the feedback."""
+    feedback = {"score": score, "description": f"Scored {score}"}
+    await store.record_feedback(session, feedback)
+    await db.sessions.update_one({"_id": session["_id"]}, {"$set": {"feedback": feedback}})
+    session["feedback"] = feedback
+
+
+async def play():
+    """Return (stored, fresh, rebuilt) /user/stats responses after a downward regrade."""
+    db = AsyncMongoMockClient().user_stats_check
+    store = UserStatsStore(db)
+    await store.get(USER_ID)  # builds the (empty) document, as the dashboard would
+
+    started = datetime.utcnow()
+    sessions = []
+    for i, (company, role) in enumerate([("Google", "Engineer"), ("Google", "Designer"), ("Meta", "Engineer")]):
+        session = {"user_id": USER_ID, "company": company, "role": role, "created_at": started + timedelta(minutes=i)}
+        await db.sessions.insert_one(session)
+        await store.record_session_started(session)
+        sessions.append(session)
+
+    await _feedback(db, store, sessions[0], 9)
+    await _feedback(db, store, sessions[1], 6)
+    await _feedback(db, store, sessions[2], 7)
+    await _feedback(db, store, sessions[0], 4)  # regraded: Google's and Engineer's best drop too
+
+    recent = await store.recent_sessions(USER_ID)
+    stored = format_user_stats(await store.get(USER_ID), recent)
+    fresh = await compute_user_stats(db, USER_ID)
+    rebuilt = format_user_stats(await store.rebuild_user(USER_ID), recent)
+    return stored, fresh, rebuilt
+
+
+def _breakdown(stats: dict) -> dict:
+    return {(kind, row["name"]): (row["sessions"], row["averageScore"], row["bestScore"])
+            for kind in ("byCompany", "byRole") for row in stats[kind]}
+
+
+def test_regrade_lowers_best_scores():
+    stored, fresh, rebuilt = asyncio.run(play())
+    for key in ("totalSessions", "averageScore", "bestScore"):
+        assert stored[key] == fresh[key], f"{key}: stored {stored[key]}, aggregation {fresh[key]}"
+    assert stored["bestScore"] == 7
+    assert _breakdown(stored) == _breakdown(rebuilt), f"stored {_breakdown(stored)}, rebuilt {_breakdown(rebuilt)}"
+    assert _breakdown(stored)[("byCompany", "Google")] == (2, 5.0, 6)
+
+
+def main():
+    print("🚀 Checking user_stats against a fresh aggregation after a downward regrade")
+    print("=" * 50)
+    test_regrade_lowers_best_scores()
+    print("🎉 user_stats matches the sessions collection")
+
+
+if __name__ == "__main__":
+    main()